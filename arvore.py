@@ -0,0 +1,421 @@
+# NÓS DA ÁRVORE SINTÁTICA ABSTRATA
+#
+# Cada tipo de nó é uma classe com __slots__, construída diretamente pelas
+# ações do yacc.py. O formato em dicionário (o mesmo do ast.json lido pelo
+# ver-ast.py) continua disponível por to_dict() / No.from_dict().
+#
+# A análise semântica anota os nós com os endereços resolvidos: 'endereco' é o
+# par (nível do escopo, slot no quadro) de uma variável, ou (nível, índice) de
+# uma sub-rotina chamada; programas e sub-rotinas recebem 'tamanho_quadro'.
+# As anotações só aparecem no dicionário depois de preenchidas.
+#
+# Todo nó guarda em 'posicao' o deslocamento (em caracteres, desde o início do
+# arquivo) do primeiro token da construção, ou None se não foi criado pelo
+# parser. Linha e coluna não ficam no nó: saem da diagnosticos.TabelaLinhas.
+#
+# Com o compartilhamento de expressões (yacc.analisar com compartilhar=True),
+# a AST é um grafo acíclico: expressões puras iguais de um mesmo corpo são um
+# só nó, com a posição da primeira ocorrência. to_dict() e iterar_nos()
+# expandem o compartilhamento; iterar_nos(raiz, distintos=True) não.
+
+# Como cada campo aparece no dicionário
+VALOR = 'valor'   # valor simples (str, int)
+NO = 'no'         # um nó filho (ou None)
+NOS = 'nos'       # lista de nós filhos
+ID = 'id'         # nome guardado como str, exportado como {'tipo': 'id', 'nome': ...}
+IDS = 'ids'       # lista de nomes, exportada como lista de nós 'id'
+OPCIONAL = 'opcional'  # nó filho que só aparece no dicionário quando existe
+ANOTACAO = 'anotacao'  # preenchido pela análise semântica; omitido enquanto for None
+
+
+def _anotacao_de_json(valor):
+    # No JSON as tuplas viram listas: [n, s] -> (n, s) e [[n, s], ...] -> [(n, s), ...]
+    # (um dicionário vindo direto do to_dict() ainda tem as tuplas)
+    if isinstance(valor, list):
+        if valor and isinstance(valor[0], (list, tuple, type(None))):
+            return [None if item is None else tuple(item) for item in valor]
+        return tuple(valor)
+    return valor
+
+
+class No:
+    __slots__ = ('posicao',)
+    tipo = None
+    # (atributo, chave no dicionário, tipo do campo), na ordem do ast.json
+    _campos = ()
+
+    def __repr__(self):
+        campos = ', '.join(f"{a}={getattr(self, a)!r}" for a, _, _ in self._campos)
+        return f"{type(self).__name__}({campos})"
+
+    def filhos(self):
+        """Nós filhos diretos, na ordem dos campos."""
+        for atributo, _, tipo_campo in self._campos:
+            valor = getattr(self, atributo)
+            if tipo_campo == NO or tipo_campo == OPCIONAL:
+                if valor is not None:
+                    yield valor
+            elif tipo_campo == NOS:
+                yield from valor
+
+    def to_dict(self):
+        """Converte a subárvore para o formato em dicionário do ast.json."""
+        raiz = {}
+        pilha = [(self, raiz)]
+        while pilha:
+            no, destino = pilha.pop()
+            destino['tipo'] = no.tipo
+            if no.posicao is not None:
+                destino['posicao'] = no.posicao
+            for atributo, chave, tipo_campo in no._campos:
+                valor = getattr(no, atributo)
+                if tipo_campo == NO or tipo_campo == OPCIONAL:
+                    if valor is None:
+                        if tipo_campo == NO:
+                            destino[chave] = None
+                    else:
+                        filho = destino[chave] = {}
+                        pilha.append((valor, filho))
+                elif tipo_campo == NOS:
+                    lista = destino[chave] = []
+                    for item in valor:
+                        filho = {}
+                        lista.append(filho)
+                        pilha.append((item, filho))
+                elif tipo_campo == ID:
+                    destino[chave] = {'tipo': 'id', 'nome': valor}
+                elif tipo_campo == IDS:
+                    destino[chave] = [{'tipo': 'id', 'nome': nome} for nome in valor]
+                elif tipo_campo == ANOTACAO:
+                    if valor is not None:
+                        destino[chave] = valor
+                else:
+                    destino[chave] = valor
+        return raiz
+
+    @staticmethod
+    def from_dict(dados):
+        """Reconstrói os nós a partir do formato em dicionário do ast.json."""
+        caixa = [None]
+        pilha = [(dados, caixa, 0)]
+        while pilha:
+            d, destino, posicao = pilha.pop()
+            classe = CLASSES[d['tipo']]
+            no = classe.__new__(classe)
+            no.posicao = d.get('posicao')
+            if isinstance(posicao, str):
+                setattr(destino, posicao, no)
+            else:
+                destino[posicao] = no
+
+            for atributo, chave, tipo_campo in classe._campos:
+                valor = d.get(chave)
+                if tipo_campo == NO or tipo_campo == OPCIONAL:
+                    setattr(no, atributo, None)
+                    if valor is not None:
+                        pilha.append((valor, no, atributo))
+                elif tipo_campo == NOS:
+                    lista = [None] * len(valor)
+                    setattr(no, atributo, lista)
+                    for i, item in enumerate(valor):
+                        pilha.append((item, lista, i))
+                elif tipo_campo == ID:
+                    setattr(no, atributo, valor['nome'])
+                elif tipo_campo == IDS:
+                    setattr(no, atributo, [item['nome'] for item in valor])
+                elif tipo_campo == ANOTACAO:
+                    setattr(no, atributo, _anotacao_de_json(valor))
+                else:
+                    setattr(no, atributo, valor)
+        return caixa[0]
+
+
+def para_lista_plana(raiz):
+    """
+    Serializa a árvore numa lista plana de registros [tipo, campo1, campo2, ...].
+
+    Os filhos são referenciados pelo índice do registro na lista, então o
+    resultado tem profundidade fixa e pode ser gravado com json/pickle mesmo
+    para árvores muito profundas. O registro 0 é a raiz. Um nó compartilhado
+    tem um só registro, e de_lista_plana() reconstrói o compartilhamento.
+    """
+    registros = []
+    indices = {}
+    for no in iterar_nos(raiz, distintos=True):
+        indices[id(no)] = len(registros)
+        registros.append(no)
+
+    for i, no in enumerate(registros):
+        registro = [no.tipo]
+        for atributo, _, tipo_campo in no._campos:
+            valor = getattr(no, atributo)
+            if tipo_campo == NO or tipo_campo == OPCIONAL:
+                registro.append(None if valor is None else indices[id(valor)])
+            elif tipo_campo == NOS:
+                registro.append([indices[id(item)] for item in valor])
+            else:
+                registro.append(valor)
+        registro.append(no.posicao)
+        registros[i] = registro
+    return registros
+
+
+def de_lista_plana(registros):
+    """Inverso de para_lista_plana()."""
+    nos = []
+    for registro in registros:
+        classe = CLASSES[registro[0]]
+        nos.append(classe.__new__(classe))
+
+    for no, registro in zip(nos, registros):
+        no.posicao = registro[-1]
+        for (atributo, _, tipo_campo), valor in zip(no._campos, registro[1:]):
+            if tipo_campo == NO or tipo_campo == OPCIONAL:
+                valor = None if valor is None else nos[valor]
+            elif tipo_campo == NOS:
+                valor = [nos[i] for i in valor]
+            elif tipo_campo == ANOTACAO:
+                valor = _anotacao_de_json(valor)
+            setattr(no, atributo, valor)
+    return nos[0] if nos else None
+
+
+def iterar_nos(raiz, distintos=False):
+    """
+    Percorre a subárvore em pré-ordem, sem recursão. Com distintos=True, um nó
+    compartilhado (ver yacc.analisar com compartilhar=True) aparece uma só vez,
+    e a sua subárvore só é percorrida na primeira ocorrência.
+    """
+    vistos = set() if distintos else None
+    pilha = [raiz]
+    while pilha:
+        no = pilha.pop()
+        if vistos is not None:
+            if id(no) in vistos:
+                continue
+            vistos.add(id(no))
+        yield no
+        filhos = list(no.filhos())
+        filhos.reverse()
+        pilha.extend(filhos)
+
+
+# --- PROGRAMA E BLOCOS ---
+class Programa(No):
+    __slots__ = ('nome', 'corpo', 'tamanho_quadro')
+    tipo = 'programa'
+    _campos = (('nome', 'nome', VALOR), ('corpo', 'corpo', NO),
+               ('tamanho_quadro', 'tamanho_quadro', ANOTACAO))
+
+    def __init__(self, nome, corpo, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.corpo = corpo
+        self.tamanho_quadro = None
+
+class Bloco(No):
+    __slots__ = ('vars', 'subrotinas', 'comandos')
+    tipo = 'bloco'
+    _campos = (('vars', 'vars', NOS), ('subrotinas', 'subrotinas', NOS), ('comandos', 'comandos', NO))
+
+    def __init__(self, vars, subrotinas, comandos, posicao=None):
+        self.posicao = posicao
+        self.vars = vars
+        self.subrotinas = subrotinas
+        self.comandos = comandos
+
+# --- DECLARAÇÕES ---
+class DeclVar(No):
+    __slots__ = ('nome', 'tipo_var', 'endereco')
+    tipo = 'decl_var'
+    _campos = (('nome', 'id', ID), ('tipo_var', 'tipo_var', VALOR), ('endereco', 'endereco', ANOTACAO))
+
+    def __init__(self, nome, tipo_var, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.tipo_var = tipo_var
+        self.endereco = None
+
+class DeclParam(No):
+    __slots__ = ('nome', 'tipo_var', 'endereco')
+    tipo = 'decl_param'
+    _campos = (('nome', 'id', ID), ('tipo_var', 'tipo_var', VALOR), ('endereco', 'endereco', ANOTACAO))
+
+    def __init__(self, nome, tipo_var, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.tipo_var = tipo_var
+        self.endereco = None
+
+class DeclProc(No):
+    __slots__ = ('nome', 'params', 'corpo', 'endereco', 'tamanho_quadro')
+    tipo = 'decl_proc'
+    _campos = (('nome', 'nome', VALOR), ('params', 'params', NOS), ('corpo', 'corpo', NO),
+               ('endereco', 'endereco', ANOTACAO), ('tamanho_quadro', 'tamanho_quadro', ANOTACAO))
+
+    def __init__(self, nome, params, corpo, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.params = params
+        self.corpo = corpo
+        self.endereco = None
+        self.tamanho_quadro = None
+
+class DeclFunc(No):
+    __slots__ = ('nome', 'params', 'retorno', 'corpo', 'endereco', 'tamanho_quadro', 'slot_retorno')
+    tipo = 'decl_func'
+    _campos = (('nome', 'nome', VALOR), ('params', 'params', NOS),
+               ('retorno', 'retorno', VALOR), ('corpo', 'corpo', NO),
+               ('endereco', 'endereco', ANOTACAO), ('tamanho_quadro', 'tamanho_quadro', ANOTACAO),
+               ('slot_retorno', 'slot_retorno', ANOTACAO))
+
+    def __init__(self, nome, params, retorno, corpo, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.params = params
+        self.retorno = retorno
+        self.corpo = corpo
+        self.endereco = None
+        self.tamanho_quadro = None
+        self.slot_retorno = None  # slot do valor de retorno no quadro da função
+
+# --- COMANDOS ---
+class SeqComandos(No):
+    __slots__ = ('primeiro', 'resto')
+    tipo = 'seq_comandos'
+    _campos = (('primeiro', 'primeiro', NO), ('resto', 'resto', NO))
+
+    def __init__(self, primeiro, resto, posicao=None):
+        self.posicao = posicao
+        self.primeiro = primeiro
+        self.resto = resto
+
+class CmdAtrib(No):
+    __slots__ = ('nome', 'exp', 'endereco')
+    tipo = 'cmd_atrib'
+    _campos = (('nome', 'id', ID), ('exp', 'exp', NO), ('endereco', 'endereco', ANOTACAO))
+
+    def __init__(self, nome, exp, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.exp = exp
+        self.endereco = None
+
+class ChamadaProc(No):
+    __slots__ = ('nome', 'args', 'endereco')
+    tipo = 'chamada_proc'
+    _campos = (('nome', 'nome', VALOR), ('args', 'args', NOS), ('endereco', 'endereco', ANOTACAO))
+
+    def __init__(self, nome, args, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.args = args
+        self.endereco = None
+
+class CmdCondicional(No):
+    __slots__ = ('condicao', 'corpo', 'senao')
+    tipo = 'cmd_condicional'
+    _campos = (('condicao', 'condicao', NO), ('corpo', 'corpo', NO), ('senao', 'senao', OPCIONAL))
+
+    def __init__(self, condicao, corpo, senao=None, posicao=None):
+        self.posicao = posicao
+        self.condicao = condicao
+        self.corpo = corpo
+        self.senao = senao
+
+class CmdRepeticao(No):
+    __slots__ = ('condicao', 'corpo')
+    tipo = 'cmd_repeticao'
+    _campos = (('condicao', 'condicao', NO), ('corpo', 'corpo', NO))
+
+    def __init__(self, condicao, corpo, posicao=None):
+        self.posicao = posicao
+        self.condicao = condicao
+        self.corpo = corpo
+
+class CmdEscrita(No):
+    __slots__ = ('expressoes',)
+    tipo = 'cmd_escrita'
+    _campos = (('expressoes', 'expressoes', NOS),)
+
+    def __init__(self, expressoes, posicao=None):
+        self.posicao = posicao
+        self.expressoes = expressoes
+
+class CmdLeitura(No):
+    __slots__ = ('vars', 'enderecos')
+    tipo = 'cmd_leitura'
+    _campos = (('vars', 'vars', IDS), ('enderecos', 'enderecos', ANOTACAO))
+
+    def __init__(self, vars, posicao=None):
+        self.posicao = posicao
+        self.vars = vars
+        self.enderecos = None  # um endereço por variável lida
+
+# --- EXPRESSÕES ---
+class ExpBinaria(No):
+    __slots__ = ('op', 'esq', 'dir')
+    tipo = 'exp_binaria'
+    _campos = (('op', 'op', VALOR), ('esq', 'esq', NO), ('dir', 'dir', NO))
+
+    def __init__(self, op, esq, dir, posicao=None):
+        self.posicao = posicao
+        self.op = op
+        self.esq = esq
+        self.dir = dir
+
+class ExpUnaria(No):
+    __slots__ = ('op', 'exp')
+    tipo = 'exp_unaria'
+    _campos = (('op', 'op', VALOR), ('exp', 'exp', NO))
+
+    def __init__(self, op, exp, posicao=None):
+        self.posicao = posicao
+        self.op = op
+        self.exp = exp
+
+class ExpNum(No):
+    __slots__ = ('valor',)
+    tipo = 'exp_num'
+    _campos = (('valor', 'valor', VALOR),)
+
+    def __init__(self, valor, posicao=None):
+        self.posicao = posicao
+        self.valor = valor
+
+class Logico(No):
+    __slots__ = ('valor',)
+    tipo = 'logico'
+    _campos = (('valor', 'valor', VALOR),)
+
+    def __init__(self, valor, posicao=None):
+        self.posicao = posicao
+        self.valor = valor
+
+class ExpVar(No):
+    __slots__ = ('nome', 'endereco')
+    tipo = 'exp_var'
+    _campos = (('nome', 'id', ID), ('endereco', 'endereco', ANOTACAO))
+
+    def __init__(self, nome, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.endereco = None
+
+class ChamadaFunc(No):
+    __slots__ = ('nome', 'args', 'endereco')
+    tipo = 'chamada_func'
+    _campos = (('nome', 'nome', VALOR), ('args', 'args', NOS), ('endereco', 'endereco', ANOTACAO))
+
+    def __init__(self, nome, args, posicao=None):
+        self.posicao = posicao
+        self.nome = nome
+        self.args = args
+        self.endereco = None
+
+
+CLASSES = {classe.tipo: classe for classe in (
+    Programa, Bloco, DeclVar, DeclParam, DeclProc, DeclFunc,
+    SeqComandos, CmdAtrib, ChamadaProc, CmdCondicional, CmdRepeticao, CmdEscrita, CmdLeitura,
+    ExpBinaria, ExpUnaria, ExpNum, Logico, ExpVar, ChamadaFunc,
+)}
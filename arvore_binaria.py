@@ -0,0 +1,376 @@
+# FORMATO BINÁRIO DA AST
+#
+# Alternativa compacta ao ast.json: python yacc.py programa.ras --binario grava
+# ast.bin, e semantico.py (--ast ast.bin) e ver-ast.py (ver-ast.py ast.bin)
+# aceitam os dois formatos (ver carregar_ast).
+#
+# Layout do arquivo (inteiros little-endian):
+#   cabeçalho   MAGICO + número de constantes, de nós e de palavras
+#   constantes  tabela única de textos: nomes de tipo de nó, identificadores,
+#               operadores, números (em decimal) e anotações (em JSON); cada
+#               uma é [espécie:u8][tamanho:u32][bytes UTF-8], com preenchimento
+#               até múltiplo de 4
+#   inicios     int32 por nó: onde começa o registro do nó em 'palavras'
+#   fins        int32 por nó: índice seguinte ao último nó da sua subárvore
+#   palavras    int32: os registros dos nós, um após o outro
+#
+# Os nós são numerados em pré-ordem (a raiz é o 0), então a subárvore do nó i
+# ocupa os nós i .. fins[i]-1. Cada registro é [tipo, posição, campos...], com
+# os campos na ordem de _campos: um nó filho é o seu índice, um valor, nome ou
+# anotação é o índice da constante (-1 para None) e uma lista é o tamanho
+# seguido dos elementos. O arquivo é lido por mmap e LeitorBinario decodifica
+# só as subárvores pedidas.
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+from arvore import CLASSES, No, NO, NOS, IDS, OPCIONAL, ANOTACAO, _anotacao_de_json
+
+MAGICO = b'RASCALB1'
+CABECALHO = struct.Struct('<8sIII')   # mágico, constantes, nós, palavras
+CONSTANTE = struct.Struct('<BI')      # espécie, tamanho em bytes
+
+# Espécies de constante
+TEXTO, INTEIRO, JSON = range(3)
+
+
+def para_binario(raiz):
+    """Serializa a árvore no formato binário e devolve os bytes."""
+    constantes = {}  # (espécie, texto) -> índice
+
+    def constante(especie, texto):
+        indice = constantes.get((especie, texto))
+        if indice is None:
+            indice = constantes[(especie, texto)] = len(constantes)
+        return indice
+
+    def valor(v):
+        if v is None:
+            return -1
+        if isinstance(v, int):
+            return constante(INTEIRO, str(v))
+        return constante(TEXTO, v)
+
+    inicios = array('i')
+    ultimos = array('i')  # último filho de cada nó em pré-ordem (-1 numa folha)
+    palavras = array('i')
+    # O índice de um filho só é conhecido quando ele sai da pilha: o registro
+    # do pai guarda a palavra a preencher. Assim um nó compartilhado é gravado
+    # em cada ocorrência e o arquivo é sempre uma árvore.
+    pilha = [(raiz, -1, -1)]  # (nó, palavra do pai que recebe o índice, pai)
+    while pilha:
+        no, referencia, pai = pilha.pop()
+        i = len(inicios)
+        if referencia >= 0:
+            palavras[referencia] = i
+            ultimos[pai] = i
+        inicios.append(len(palavras))
+        ultimos.append(-1)
+        palavras.append(constante(TEXTO, no.tipo))
+        palavras.append(-1 if no.posicao is None else no.posicao)
+        filhos = []
+        for atributo, _, tipo_campo in no._campos:
+            v = getattr(no, atributo)
+            if tipo_campo == NO or tipo_campo == OPCIONAL:
+                if v is not None:
+                    filhos.append((v, len(palavras)))
+                palavras.append(-1)
+            elif tipo_campo == NOS:
+                palavras.append(len(v))
+                for filho in v:
+                    filhos.append((filho, len(palavras)))
+                    palavras.append(-1)
+            elif tipo_campo == IDS:
+                palavras.append(len(v))
+                palavras.extend(constante(TEXTO, nome) for nome in v)
+            elif tipo_campo == ANOTACAO:
+                palavras.append(-1 if v is None else constante(JSON, json.dumps(v)))
+            else:
+                palavras.append(valor(v))
+        pilha.extend((filho, palavra, i) for filho, palavra in reversed(filhos))
+
+    # Fim de cada subárvore: em pré-ordem, é o fim da subárvore do último filho
+    n_nos = len(inicios)
+    fins = array('i', range(1, n_nos + 1))
+    for i in range(n_nos - 1, -1, -1):
+        if ultimos[i] >= 0:
+            fins[i] = fins[ultimos[i]]
+
+    tabela = bytearray()
+    for especie, texto in constantes:
+        dados = texto.encode('utf-8')
+        tabela += CONSTANTE.pack(especie, len(dados))
+        tabela += dados
+    tabela += bytes(-len(tabela) % 4)
+
+    for vetor in (inicios, fins, palavras):
+        if sys.byteorder != 'little':
+            vetor.byteswap()
+    return b''.join((CABECALHO.pack(MAGICO, len(constantes), n_nos, len(palavras)), tabela,
+                     inicios.tobytes(), fins.tobytes(), palavras.tobytes()))
+
+
+def salvar_binario(raiz, caminho):
+    with open(caminho, 'wb') as f:
+        f.write(para_binario(raiz))
+
+
+class LeitorBinario:
+    """
+    Leitor preguiçoso de uma AST binária, sobre bytes ou um arquivo mapeado.
+
+    Só a tabela de constantes é decodificada ao abrir; no(i) decodifica a
+    subárvore do nó i (uma cópia nova a cada chamada) e tipo(i), posicao(i),
+    filhos(i) e valor(i, atributo) consultam um nó sem construir objetos.
+    """
+    def __init__(self, dados):
+        self._mapa = None
+        self._dados = memoryview(dados)
+        magico, n_constantes, self.n_nos, n_palavras = CABECALHO.unpack_from(self._dados)
+        if magico != MAGICO:
+            raise ValueError("não é uma AST no formato binário")
+
+        self.constantes = []
+        posicao = CABECALHO.size
+        for _ in range(n_constantes):
+            especie, tamanho = CONSTANTE.unpack_from(self._dados, posicao)
+            posicao += CONSTANTE.size
+            texto = str(self._dados[posicao:posicao + tamanho], 'utf-8')
+            posicao += tamanho
+            if especie == INTEIRO:
+                self.constantes.append(int(texto))
+            elif especie == JSON:
+                self.constantes.append(_anotacao_de_json(json.loads(texto)))
+            else:
+                self.constantes.append(texto)
+        posicao += -posicao % 4
+
+        vetores = []
+        for tamanho in (self.n_nos, self.n_nos, n_palavras):
+            bruto = self._dados[posicao:posicao + 4 * tamanho]
+            posicao += 4 * tamanho
+            if sys.byteorder == 'little':
+                vetores.append(bruto.cast('i'))
+            else:
+                vetor = array('i', bruto)
+                vetor.byteswap()
+                vetores.append(vetor)
+        self.inicios, self.fins, self.palavras = vetores
+
+    @classmethod
+    def abrir(cls, caminho):
+        """Leitor sobre o arquivo mapeado em memória; feche com fechar() (ou use 'with')."""
+        with open(caminho, 'rb') as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        leitor = cls(mapa)
+        leitor._mapa = mapa
+        return leitor
+
+    def fechar(self):
+        # As visões sobre o mmap precisam ser liberadas antes de fechá-lo
+        for visao in (self.inicios, self.fins, self.palavras, self._dados):
+            if isinstance(visao, memoryview):
+                visao.release()
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def __len__(self):
+        return self.n_nos
+
+    def tipo(self, i):
+        return self.constantes[self.palavras[self.inicios[i]]]
+
+    def posicao(self, i):
+        posicao = self.palavras[self.inicios[i] + 1]
+        return None if posicao < 0 else posicao
+
+    def _campos(self, i):
+        """(atributo, tipo do campo, palavra onde o campo começa) de cada campo do nó i."""
+        p = self.inicios[i] + 2
+        for atributo, _, tipo_campo in CLASSES[self.tipo(i)]._campos:
+            yield atributo, tipo_campo, p
+            p += 1 + (self.palavras[p] if tipo_campo == NOS or tipo_campo == IDS else 0)
+
+    def filhos(self, i):
+        """Índices dos filhos diretos do nó i, na ordem dos campos."""
+        filhos = []
+        for _, tipo_campo, p in self._campos(i):
+            if tipo_campo == NO or tipo_campo == OPCIONAL:
+                if self.palavras[p] >= 0:
+                    filhos.append(self.palavras[p])
+            elif tipo_campo == NOS:
+                filhos.extend(self.palavras[p + 1:p + 1 + self.palavras[p]])
+        return filhos
+
+    def valor(self, i, atributo):
+        """Valor de um campo que não é nó (nome, operador, anotação...) do nó i."""
+        constantes = self.constantes
+        for nome, tipo_campo, p in self._campos(i):
+            if nome == atributo:
+                if tipo_campo == IDS:
+                    return [constantes[c] for c in self.palavras[p + 1:p + 1 + self.palavras[p]]]
+                c = self.palavras[p]
+                return None if c < 0 else constantes[c]
+        raise KeyError(atributo)
+
+    def no(self, i=0):
+        """Decodifica a subárvore do nó i (nós i .. fins[i]-1) e devolve a sua raiz."""
+        fim = self.fins[i]
+        inicio_palavras = self.inicios[i]
+        fim_palavras = self.inicios[fim] if fim < self.n_nos else len(self.palavras)
+        palavras = self.palavras[inicio_palavras:fim_palavras].tolist()
+        inicios = self.inicios[i:fim].tolist()
+        constantes = self.constantes
+
+        nos = []
+        for p in inicios:
+            classe = CLASSES[constantes[palavras[p - inicio_palavras]]]
+            nos.append(classe.__new__(classe))
+
+        for no, p in zip(nos, inicios):
+            p -= inicio_palavras
+            posicao = palavras[p + 1]
+            no.posicao = None if posicao < 0 else posicao
+            p += 2
+            for atributo, _, tipo_campo in no._campos:
+                v = palavras[p]
+                p += 1
+                if tipo_campo == NO or tipo_campo == OPCIONAL:
+                    v = None if v < 0 else nos[v - i]
+                elif tipo_campo == NOS:
+                    v, p = [nos[f - i] for f in palavras[p:p + v]], p + v
+                elif tipo_campo == IDS:
+                    v, p = [constantes[c] for c in palavras[p:p + v]], p + v
+                elif tipo_campo == ANOTACAO and v >= 0 and isinstance(constantes[v], list):
+                    v = list(constantes[v])  # a constante é compartilhada; cada nó tem a sua lista
+                else:
+                    v = None if v < 0 else constantes[v]
+                setattr(no, atributo, v)
+        return nos[0]
+
+
+def ler_binario(caminho):
+    """AST completa de um arquivo no formato binário."""
+    with LeitorBinario.abrir(caminho) as leitor:
+        return leitor.no(0)
+
+
+def eh_binario(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read(len(MAGICO)) == MAGICO
+
+
+def carregar_json(caminho):
+    """Dicionário de um ast.json, lido com pilha grande (ver em_pilha_grande)."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return em_pilha_grande(lambda: json.load(f))
+
+
+# Níveis além desse não aumentam o recuo do ast.json: numa cadeia de 20k
+# seq_comandos, o recuo completo faria o arquivo crescer com o quadrado da profundidade
+NIVEL_MAXIMO_RECUO = 64
+
+
+def escrever_json(dados, arquivo, indentacao=2, nivel_maximo=NIVEL_MAXIMO_RECUO):
+    """
+    Grava 'dados' em 'arquivo' com o mesmo texto de json.dump(dados, arquivo,
+    indent=2, ensure_ascii=False) até o nível 'nivel_maximo', a partir do
+    qual o recuo para de crescer. A pilha é explícita: o json.dump indentado
+    tem um gerador por nível, estoura a recursão numa cadeia de seq_comandos
+    e fica quadrático com a profundidade.
+    """
+    recuos = ['\n' + ' ' * (indentacao * nivel) for nivel in range(nivel_maximo + 1)]
+    partes = []
+    pilha = [(dados, 0)]  # (valor, nível); nível None: texto pronto
+    while pilha:
+        valor, nivel = pilha.pop()
+        if nivel is None:
+            partes.append(valor)
+        elif isinstance(valor, dict) and valor:
+            pilha.append((recuos[min(nivel, nivel_maximo)] + '}', None))
+            recuo = recuos[min(nivel + 1, nivel_maximo)]
+            itens = list(valor.items())
+            for i in range(len(itens) - 1, -1, -1):
+                chave, filho = itens[i]
+                pilha.append((filho, nivel + 1))
+                pilha.append((('{' if i == 0 else ',') + recuo + json.dumps(chave, ensure_ascii=False) + ': ', None))
+        elif isinstance(valor, (list, tuple)) and valor:
+            pilha.append((recuos[min(nivel, nivel_maximo)] + ']', None))
+            recuo = recuos[min(nivel + 1, nivel_maximo)]
+            for i in range(len(valor) - 1, -1, -1):
+                pilha.append((valor[i], nivel + 1))
+                pilha.append((('[' if i == 0 else ',') + recuo, None))
+        elif isinstance(valor, dict):
+            partes.append('{}')
+        elif isinstance(valor, (list, tuple)):
+            partes.append('[]')
+        else:
+            partes.append(json.dumps(valor, ensure_ascii=False))
+        if len(partes) >= 65536:
+            arquivo.write(''.join(partes))
+            partes.clear()
+    arquivo.write(''.join(partes))
+
+
+def salvar_json(raiz, caminho):
+    """
+    Grava o ast.json da árvore. O texto vai para um arquivo temporário,
+    renomeado só no fim: uma falha no meio não deixa um ast.json truncado.
+    """
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, 'w', encoding='utf-8') as f:
+            escrever_json(raiz.to_dict(), f)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def carregar_ast(caminho):
+    """AST de um arquivo no formato binário ou no ast.json, conforme o conteúdo."""
+    if eh_binario(caminho):
+        return ler_binario(caminho)
+    return No.from_dict(carregar_json(caminho))
+
+
+def em_pilha_grande(funcao, pilha=512 * 1024 * 1024, limite=1000000):
+    """
+    Executa funcao() numa thread com pilha grande e limite de recursão alto:
+    o módulo json grava e lê os dicionários aninhados recursivamente, e uma
+    cadeia de 100k seq_comandos passa muito do limite padrão.
+    """
+    saida = {}
+
+    def executar():
+        try:
+            saida['resultado'] = funcao()
+        except BaseException as e:
+            saida['erro'] = e
+
+    pilha_anterior = threading.stack_size(pilha)
+    limite_anterior = sys.getrecursionlimit()
+    sys.setrecursionlimit(limite)
+    try:
+        thread = threading.Thread(target=executar)
+        thread.start()
+        thread.join()
+    finally:
+        threading.stack_size(pilha_anterior)
+        sys.setrecursionlimit(limite_anterior)
+    if 'erro' in saida:
+        raise saida['erro']
+    return saida['resultado']
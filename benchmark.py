@@ -0,0 +1,1250 @@
+# BENCHMARKS DO COMPILADOR RASCAL
+#
+# Como usar: python benchmark.py <experimento> [opções]
+#   comandos   -> tempo de análise sintática de blocos com 1k a 100k comandos
+#   semantico  -> análise semântica de um bloco com 200k comandos (sem estourar a pilha);
+#                 tests/test_semantico.py confere o mesmo com 20k
+#   despacho   -> nós visitados por segundo: tabela de despacho x getattr por nó
+#   memoria    -> bytes por nó da AST (nós com __slots__ x dicionários), via tracemalloc
+#   partida    -> partida a frio: de 'import yacc' até o fim da primeira análise
+#   estresse   -> 10k compilações paralelas do corpus tests/ em threads, conferindo os resultados;
+#                 tests/test_sessoes.py confere o mesmo com menos compilações
+#   lexico     -> tokens/s e pico de RSS lendo arquivos de vários MB (com comentários de 1 MB)
+#   lexer-dfa  -> mesmos tokens do lexer do PLY e do lexer_dfa.py (corpus e mutações); tokens/s de cada um
+#                 (tests/test_lexer_dfa.py confere os tokens com sementes fixas)
+#   vm         -> instruções/s da máquina virtual em programas de laço, recursão e aritmética
+#   interpretador -> closures x caminhada ingênua nos dicionários do ast.json x máquina virtual
+#   otimizador -> nós removidos pelo otimizador e conferência da saída com e sem otimização;
+#                 tests/test_otimizador.py confere a saída num subconjunto com sementes fixas
+#   fluxo      -> construção do grafo de fluxo e resolução dos problemas de fluxo de dados
+#   c          -> compila os programas para C e confere a saída com o interpretador; tempo nativo x VM
+#                 (tests/test_codigo_c.py confere a saída, se houver um compilador C)
+#   ast-binaria -> tamanho e tempo de gravação/leitura da AST em JSON x formato binário (100k comandos)
+#   lsp        -> latência do servidor_lsp.py num arquivo de 50k linhas: diagnósticos após cada
+#                 alteração, hover e definição; confere o p95 com um limite (--limite, em ms)
+#                 (tests/test_servidor_lsp.py confere os resultados com a análise inteira)
+#   compartilhamento -> expressões repetidas compartilhadas na AST: nós, memória, tempo das análises,
+#                 expressões verificadas e subexpressões comuns eliminadas (com a saída conferida)
+#   suite      -> programas sintéticos (gerador.py): linhas/s, nós/s e pico de memória por fase,
+#                 gravados em JSON e comparados com uma linha de base (--baseline)
+
+import argparse
+import contextlib
+import gc
+import glob
+import io
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from arvore import No, Programa, Bloco, SeqComandos, iterar_nos, NO, NOS, OPCIONAL
+from arvore_binaria import LeitorBinario, em_pilha_grande, ler_binario, para_binario, salvar_binario, salvar_json
+from concurrent.futures import ThreadPoolExecutor
+
+from compilador import analisar_sintaxe as analisar, SessaoCompilador, ErroSintatico
+from diagnosticos import TabelaLinhas
+from codigo_c import gerar_c, compilar_executavel, ErroCompiladorC
+from fluxo import AnalisadorFluxo, DefinicoesAlcancam, construir_grafos, vivas
+from estatisticas import estatisticas_compilacao
+from fonte import tokens_arquivo
+from gerador import FORMAS, gerar_programa
+from interpretador import compilar_closures
+from maquina import compilar_bytecode, MaquinaVirtual, ErroExecucao, dividir
+from yacc import novos_analisadores, t_COMMENT
+from semantico import AnalisadorSemantico
+from subexpressoes import AnalisadorSubexpressoes, eliminar_subexpressoes
+from visitante import NoDesconhecido
+
+
+def gerar_programa_linear(n_comandos):
+    """Programa com um único 'begin ... end' contendo n_comandos atribuições."""
+    linhas = ["program escala;", "var x, y: integer;", "begin"]
+    comandos = [f"    x := x + {i % 97}" if i % 2 == 0 else f"    y := x * 2"
+                for i in range(n_comandos)]
+    linhas.append(";\n".join(comandos))
+    linhas.append("end.")
+    return "\n".join(linhas)
+
+
+def cronometrar(funcao, repeticoes=3):
+    """Executa a função algumas vezes e devolve o menor tempo (em segundos)."""
+    melhor = None
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        decorrido = time.perf_counter() - inicio
+        if melhor is None or decorrido < melhor:
+            melhor = decorrido
+    return melhor, resultado
+
+
+def bench_comandos(args):
+    print(f"{'comandos':>10} {'tempo (s)':>10} {'us/comando':>11} {'razão':>7}")
+    anterior = None
+    for n in args.tamanhos:
+        codigo = gerar_programa_linear(n)
+        tempo, _ = cronometrar(lambda: analisar(codigo), args.repeticoes)
+        por_comando = tempo / n * 1e6
+        # Razão entre o custo por comando deste tamanho e o do tamanho anterior:
+        # fica perto de 1.0 quando o crescimento é linear.
+        razao = f"{por_comando / anterior:.2f}" if anterior else "-"
+        print(f"{n:>10} {tempo:>10.3f} {por_comando:>11.2f} {razao:>7}")
+        anterior = por_comando
+
+
+def bench_semantico(args):
+    codigo = gerar_programa_linear(args.comandos)
+    ast = analisar(codigo)
+
+    analisador = AnalisadorSemantico()
+    inicio = time.perf_counter()
+    analisador.visitar(ast)
+    decorrido = time.perf_counter() - inicio
+
+    print(f"{args.comandos} comandos analisados em {decorrido:.3f} s "
+          f"({args.comandos / decorrido:,.0f} comandos/s), {len(analisador.erros)} erro(s)")
+    if analisador.erros:
+        raise SystemExit(1)
+
+
+class AnalisadorDespachoPorNome(AnalisadorSemantico):
+    # Despacho antigo: monta 'visitar_<tipo>' e faz getattr a cada nó visitado
+    def visitar(self, no):
+        pilha = [self._visitar_raiz(no)]
+        valor = None
+        while pilha:
+            try:
+                filho = pilha[-1].send(valor)
+            except StopIteration as fim:
+                pilha.pop()
+                valor = fim.value
+                continue
+            valor = None
+            if not filho:
+                continue
+            if isinstance(filho, list):
+                pilha.append(self._visitar_lista(filho))
+                continue
+            resultado = getattr(self, f"visitar_{filho.tipo}")(filho)
+            if hasattr(resultado, 'send'):
+                pilha.append(resultado)
+            else:
+                valor = resultado
+        return valor
+
+
+class NoInventado(No):
+    __slots__ = ()
+    tipo = 'no_inventado'
+
+
+class AnalisadorContador(AnalisadorSemantico):
+    def __init__(self):
+        super().__init__()
+        self.visitados = 0
+        for tipo, (metodo, gerador) in self._despacho.items():
+            self._despacho[tipo] = (self._contar(metodo), gerador)
+
+    def _contar(self, metodo):
+        def contado(no):
+            self.visitados += 1
+            return metodo(no)
+        return contado
+
+
+def escalar_programa(ast, vezes):
+    """Repete 'vezes' vezes o bloco de comandos principal do programa."""
+    comandos = ast.corpo.comandos
+    cabeca = None
+    for _ in range(vezes):
+        cabeca = SeqComandos(comandos, cabeca)
+    corpo = Bloco(ast.corpo.vars, ast.corpo.subrotinas, cabeca)
+    return Programa(ast.nome, corpo)
+
+
+def bench_despacho(args):
+    with open(args.arquivo) as f:
+        ast = escalar_programa(analisar(f.read()), args.vezes)
+
+    contador = AnalisadorContador()
+    contador.visitar(ast)
+    nos = contador.visitados
+
+    for nome, classe in (("getattr por nó", AnalisadorDespachoPorNome),
+                         ("tabela por classe", AnalisadorSemantico)):
+        tempo, _ = cronometrar(lambda: classe().visitar(ast), args.repeticoes)
+        print(f"{nome:<18} {nos} nós em {tempo:.3f} s -> {nos / tempo:,.0f} nós/s")
+
+    try:
+        AnalisadorSemantico().visitar(NoInventado())
+    except NoDesconhecido as e:
+        print(f"tipo desconhecido reportado: {e}")
+
+
+def medir_alocacao(funcao):
+    """Bytes que continuam alocados depois de funcao() (o resultado é mantido vivo)."""
+    tracemalloc.start()
+    antes, _ = tracemalloc.get_traced_memory()
+    resultado = funcao()
+    depois, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return depois - antes, resultado
+
+
+def bench_memoria(args):
+    codigo = gerar_programa_linear(args.comandos)
+    bytes_nos, ast = medir_alocacao(lambda: analisar(codigo))
+    bytes_dicts, _ = medir_alocacao(lambda: ast.to_dict())
+    n_nos = sum(1 for _ in iterar_nos(ast))
+
+    print(f"{n_nos} nós, código-fonte com {len(codigo)} bytes")
+    print(f"{'__slots__':<12} {bytes_nos:>12} bytes  {bytes_nos / n_nos:>7.1f} bytes/nó")
+    print(f"{'dicionários':<12} {bytes_dicts:>12} bytes  {bytes_dicts / n_nos:>7.1f} bytes/nó")
+
+
+SCRIPT_PARTIDA = '''
+import time
+inicio = time.perf_counter()
+import yacc
+yacc.parser.parse(open({arquivo!r}).read(), lexer=yacc.lexer)
+print(time.perf_counter() - inicio)
+'''
+
+def bench_partida(args):
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    script = SCRIPT_PARTIDA.format(arquivo=os.path.abspath(args.arquivo))
+    tempos = []
+    for _ in range(args.execucoes):
+        saida = subprocess.run([sys.executable, '-c', script], cwd=diretorio,
+                               capture_output=True, text=True, check=True)
+        tempos.append(float(saida.stdout.split()[-1]) * 1000)
+    print(f"{args.execucoes} processos novos, import yacc + primeira análise de {args.arquivo}")
+    print(f"mediana {statistics.median(tempos):.1f} ms, mínimo {min(tempos):.1f} ms, "
+          f"máximo {max(tempos):.1f} ms")
+
+
+def resumo_compilacao(sessao, codigo):
+    """Resultado comparável de uma compilação: AST em dicionário e erros."""
+    try:
+        resultado = sessao.compilar(codigo)
+    except ErroSintatico as e:
+        return ('sintatico', str(e))
+    return ('ok', resultado.ast.to_dict(), tuple(resultado.erros))
+
+
+def bench_estresse(args):
+    codigos = []
+    for padrao in args.arquivos:
+        for caminho in sorted(glob.glob(padrao)):
+            with open(caminho) as f:
+                codigos.append(f.read())
+
+    local = threading.local()
+
+    def compilar(i):
+        if not hasattr(local, 'sessao'):
+            local.sessao = SessaoCompilador()
+        return i, resumo_compilacao(local.sessao, codigos[i % len(codigos)])
+
+    # Os erros léxicos ainda são impressos; descarta a saída durante o teste
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        sessao = SessaoCompilador()
+        esperados = [resumo_compilacao(sessao, codigo) for codigo in codigos]
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            resultados = list(executor.map(compilar, range(args.compilacoes)))
+        decorrido = time.perf_counter() - inicio
+
+    divergentes = sum(1 for i, r in resultados if r != esperados[i % len(codigos)])
+    print(f"{args.compilacoes} compilações de {len(codigos)} arquivos em {args.threads} threads: "
+          f"{decorrido:.2f} s ({args.compilacoes / decorrido:,.0f}/s), {divergentes} divergente(s)")
+    if divergentes:
+        raise SystemExit(1)
+
+
+# Regra de comentário usada antes da varredura linear (uma alternância por caractere)
+COMENTARIO_ANTIGO = r'(\{(.|\n)*?\})|(\(\*(.|\n)*?\*\))'
+
+def gerar_arquivo_grande(caminho, megabytes, comentario_mb):
+    """Programa com ~megabytes MB, intercalando comandos e comentários de comentario_mb MB."""
+    comentario = "{" + ("comentario longo " * 64 + "\n") * int(comentario_mb * 1024 * 1024 / 1089) + "}"
+    alvo = megabytes * 1024 * 1024
+    with open(caminho, 'w') as f:
+        f.write("program grande;\nvar x, y: integer;\nbegin\n")
+        escrito = 0
+        i = 0
+        while escrito < alvo:
+            if i % 20000 == 19999:
+                escrito += f.write(f"    {comentario}\n")
+            escrito += f.write(f"    x := x + {i % 97};\n    y := x * 2 - y;\n")
+            i += 1
+        f.write("    x := 0\nend.\n")
+    return comentario
+
+
+def bench_lexico_processo(args):
+    # Executado num processo separado para que o pico de RSS seja só deste modo
+    lexer, _ = novos_analisadores()
+    partida_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    if args.modo == 'leitura':
+        # Como yacc.analisar com o texto inteiro, que também monta a TabelaLinhas
+        with open(args.arquivo) as f:
+            texto = f.read()
+        lexer.linhas = TabelaLinhas(texto)
+        lexer.input(texto)
+        tokens = sum(1 for _ in iter(lexer.token, None))
+    else:
+        tokens = sum(1 for _ in tokens_arquivo(lexer, args.arquivo))
+    decorrido = time.perf_counter() - inicio
+    pico_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'tokens': tokens, 'tempo': decorrido, 'pico_kb': pico_kb, 'partida_kb': partida_kb}))
+
+
+def bench_lexico(args):
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'grande.ras')
+        comentario = gerar_arquivo_grande(caminho, args.megabytes, args.comentario_mb)
+        tamanho = os.path.getsize(caminho) / (1024 * 1024)
+        print(f"arquivo de {tamanho:.1f} MB, comentários de {len(comentario) / (1024 * 1024):.1f} MB")
+
+        # O pico de RSS inclui o interpretador e o PLY (a partida); o que cada modo acrescenta vem entre parênteses
+        for modo, descricao in (('leitura', "f.read() + input()"), ('mmap', "mmap em blocos")):
+            saida = subprocess.run([sys.executable, __file__, 'lexico-processo', modo, caminho],
+                                   capture_output=True, text=True, check=True)
+            r = json.loads(saida.stdout)
+            print(f"{descricao:<20} {r['tokens']:>10} tokens em {r['tempo']:6.2f} s "
+                  f"({r['tokens'] / r['tempo']:>10,.0f} tokens/s), pico RSS {r['pico_kb'] / 1024:7.1f} MB "
+                  f"(+{(r['pico_kb'] - r['partida_kb']) / 1024:.1f} MB)")
+
+        for nome, regra in (("regra antiga", COMENTARIO_ANTIGO), ("regra linear", t_COMMENT.__doc__)):
+            regex = re.compile(regra)
+            tempo, casou = cronometrar(lambda: regex.match(comentario), 1)
+            print(f"{nome}: um comentário de {len(comentario) / (1024 * 1024):.1f} MB em {tempo:.3f} s"
+                  + ("" if casou else " (não casou)"))
+
+
+# Caracteres inseridos ao acaso nos programas do corpus para exercitar os erros léxicos
+CARACTERES_MUTACAO = "aZ09 \t\n\r{}()*.:;=<>+-_@é٣,"
+
+def mutar(texto, aleatorio, insercoes):
+    caracteres = list(texto)
+    for _ in range(insercoes):
+        caracteres.insert(aleatorio.randint(0, len(caracteres)), aleatorio.choice(CARACTERES_MUTACAO))
+    return ''.join(caracteres)
+
+
+def fluxo_tokens(lexer, texto):
+    """(tipo, valor, linha, posição) de cada token, os diagnósticos e a linha final do lexer."""
+    lexer.lineno = 1
+    lexer.deslocamento = 0
+    lexer.linhas = TabelaLinhas(texto)
+    lexer.diagnosticos = []
+    lexer.input(texto)
+    tokens = [(t.type, t.value, t.lineno, t.lexpos) for t in iter(lexer.token, None)]
+    return tokens, [d.to_dict() for d in lexer.diagnosticos], lexer.lineno
+
+
+def contar_tokens(lexer, texto):
+    lexer.lineno = 1
+    lexer.input(texto)
+    return sum(1 for _ in iter(lexer.token, None))
+
+
+def bench_lexer_dfa(args):
+    ply, _ = novos_analisadores()
+    dfa, _ = novos_analisadores(lexer_dfa=True)
+    ply.ecoar_erros = dfa.ecoar_erros = False
+    aleatorio = random.Random(args.semente)
+
+    caminhos = sorted(c for padrao in args.arquivos for c in glob.glob(padrao))
+    casos = divergentes = 0
+    for caminho in caminhos:
+        with open(caminho) as f:
+            texto = f.read()
+        variantes = [texto] + [mutar(texto, aleatorio, aleatorio.randint(1, 8)) for _ in range(args.mutacoes)]
+        for i, variante in enumerate(variantes):
+            casos += 1
+            if fluxo_tokens(ply, variante) != fluxo_tokens(dfa, variante):
+                divergentes += 1
+                print(f"  divergência: {caminho}" + (f" (mutação {i})" if i else ""))
+        # Também lido em blocos pequenos (fonte.py), com lineno e posições seguindo entre blocos
+        casos += 1
+        for lexer in (ply, dfa):
+            lexer.lineno = 1
+            lexer.diagnosticos = []
+        blocos = [[(t.type, t.value, t.lineno, t.lexpos) for t in tokens_arquivo(lexer, caminho, 64)]
+                  + [d.to_dict() for d in lexer.diagnosticos] for lexer in (ply, dfa)]
+        if blocos[0] != blocos[1]:
+            divergentes += 1
+            print(f"  divergência: {caminho} (em blocos)")
+    print(f"{casos} fluxos de tokens comparados ({len(caminhos)} arquivos, {args.mutacoes} mutações "
+          f"de cada, leitura em blocos): {divergentes} divergente(s)")
+
+    codigo = gerar_programa(args.semente, 'misto', args.escala)
+    print(f"\nprograma sintético de {len(codigo) / 1024:.0f} KB")
+    print(f"{'lexer':<6} {'tokens':>8} {'léxico (s)':>11} {'tokens/s':>11} {'+ sintático (s)':>16}")
+    # Sem o coletor cíclico durante as medidas: ele dispara conforme o heap cresce
+    # e sozinho varia mais do que a diferença entre os lexers
+    gc.disable()
+    try:
+        for nome, lexer_dfa in (("PLY", False), ("DFA", True)):
+            sessao = SessaoCompilador(lexer_dfa)
+            sessao.lexer.ecoar_erros = False
+            tempo_lexico, tokens = cronometrar(lambda: contar_tokens(sessao.lexer, codigo), args.repeticoes)
+            tempo_total, _ = cronometrar(lambda: sessao.analisar_sintaxe(codigo), args.repeticoes)
+            gc.collect()
+            print(f"{nome:<6} {tokens:>8} {tempo_lexico:>11.3f} {tokens / tempo_lexico:>11,.0f} {tempo_total:>16.3f}")
+    finally:
+        gc.enable()
+
+    if divergentes:
+        raise SystemExit(1)
+
+
+# Programas da suíte da máquina virtual; {n} é o tamanho do problema
+PROGRAMAS_VM = {
+    'laco': ("""
+program laco;
+var i, soma: integer;
+begin
+    i := 0; soma := 0;
+    while i < {n} do
+    begin
+        soma := soma + i;
+        i := i + 1
+    end;
+    write(soma)
+end.""", 1000000),
+    'recursao': ("""
+program recursao;
+var r: integer;
+    function fib(n: integer): integer;
+    begin
+        if n < 2 then fib := n
+        else fib := fib(n - 1) + fib(n - 2)
+    end;
+begin
+    r := fib({n});
+    write(r)
+end.""", 22),
+    'aritmetica': ("""
+program aritmetica;
+var i, a, b, c: integer; par: boolean;
+begin
+    i := 1; a := 7; b := 3; c := 0;
+    while i <= {n} do
+    begin
+        c := (a * i + b * (i div 3) - c div 7) div 2;
+        par := (i div 2) * 2 = i;
+        if par and (c > 0) then a := a + 1 else b := b - 1;
+        i := i + 1
+    end;
+    write(a, b, c, par)
+end.""", 200000),
+}
+
+def bench_vm(args):
+    sessao = SessaoCompilador()
+    for nome in args.programas:
+        modelo, n = PROGRAMAS_VM[nome]
+        n = int(n * args.escala)
+        resultado = sessao.compilar(modelo.replace('{n}', str(n)))
+        assert resultado.sucesso, resultado.erros
+        programa = compilar_bytecode(resultado.ast)
+
+        def executar():
+            saida = io.StringIO()
+            maquina = MaquinaVirtual(programa, entrada=[], saida=saida)
+            maquina.executar()
+            return maquina.instrucoes, saida.getvalue().strip()
+
+        tempo, (instrucoes, saida) = cronometrar(executar, args.repeticoes)
+        print(f"{nome:<11} n={n:<8} {len(programa.codigo):>5} palavras de bytecode, "
+              f"{instrucoes:>11,} instruções em {tempo:6.3f} s ({instrucoes / tempo:>12,.0f} instruções/s)"
+              f"  -> {saida}")
+
+
+class InterpretadorIngenuo:
+    # Caminhada direta nos dicionários do ast.json: cada nó é despachado por
+    # nome e cada variável é procurada por nome nos escopos a cada uso
+    def __init__(self, ast_dict, saida):
+        self.ast = ast_dict
+        self.saida = saida
+        self.rotinas = {}
+        self.escopos = []
+        self.retorno = []
+
+    def executar(self):
+        self.escopos.append({})
+        self.executar_bloco(self.ast['corpo'])
+
+    def executar_bloco(self, bloco):
+        for decl in bloco['vars']:
+            self.escopos[-1][decl['id']['nome']] = 0 if decl['tipo_var'] == 'integer' else False
+        for sub in bloco['subrotinas']:
+            self.rotinas[sub['nome']] = sub
+        self.comando(bloco['comandos'])
+
+    def buscar(self, nome):
+        for escopo in reversed(self.escopos):
+            if nome in escopo:
+                return escopo
+        return None
+
+    def comando(self, no):
+        if no is not None:
+            getattr(self, 'cmd_' + no['tipo'])(no)
+
+    def cmd_seq_comandos(self, no):
+        while no:
+            self.comando(no['primeiro'])
+            no = no['resto']
+
+    def cmd_cmd_atrib(self, no):
+        nome = no['id']['nome']
+        valor = self.avaliar(no['exp'])
+        escopo = self.buscar(nome)
+        if escopo is None:
+            self.retorno[-1] = valor
+        else:
+            escopo[nome] = valor
+
+    def cmd_cmd_condicional(self, no):
+        if self.avaliar(no['condicao']):
+            self.comando(no['corpo'])
+        elif 'senao' in no:
+            self.comando(no['senao'])
+
+    def cmd_cmd_repeticao(self, no):
+        while self.avaliar(no['condicao']):
+            self.comando(no['corpo'])
+
+    def cmd_cmd_escrita(self, no):
+        valores = [self.avaliar(e) for e in no['expressoes']]
+        self.saida.write(' '.join(('true' if v else 'false') if isinstance(v, bool) else str(v)
+                                  for v in valores) + '\n')
+
+    def cmd_chamada_proc(self, no):
+        self.chamar(no)
+
+    def chamar(self, no):
+        sub = self.rotinas[no['nome']]
+        valores = [self.avaliar(a) for a in no['args']]
+        self.escopos.append({p['id']['nome']: v for p, v in zip(sub['params'], valores)})
+        self.retorno.append(0)
+        self.executar_bloco(sub['corpo'])
+        self.escopos.pop()
+        return self.retorno.pop()
+
+    def avaliar(self, no):
+        return getattr(self, 'exp_' + no['tipo'])(no)
+
+    def exp_exp_num(self, no):
+        return no['valor']
+
+    def exp_logico(self, no):
+        return no['valor'] == 'true'
+
+    def exp_exp_var(self, no):
+        nome = no['id']['nome']
+        escopo = self.buscar(nome)
+        return self.retorno[-1] if escopo is None else escopo[nome]
+
+    def exp_chamada_func(self, no):
+        return self.chamar(no)
+
+    def exp_exp_unaria(self, no):
+        valor = self.avaliar(no['exp'])
+        return (not valor) if no['op'] == 'not' else -valor
+
+    def exp_exp_binaria(self, no):
+        op = no['op']
+        esq = self.avaliar(no['esq'])
+        if op == 'and':
+            return esq and self.avaliar(no['dir'])
+        if op == 'or':
+            return esq or self.avaliar(no['dir'])
+        dir = self.avaliar(no['dir'])
+        if op == '+': return esq + dir
+        if op == '-': return esq - dir
+        if op == '*': return esq * dir
+        if op == 'div': return dividir(esq, dir)
+        if op == '=': return esq == dir
+        if op == '<>': return esq != dir
+        if op == '<': return esq < dir
+        if op == '<=': return esq <= dir
+        if op == '>': return esq > dir
+        return esq >= dir
+
+
+def bench_interpretador(args):
+    sessao = SessaoCompilador()
+    for nome in args.programas:
+        modelo, n = PROGRAMAS_VM[nome]
+        n = int(n * args.escala)
+        resultado = sessao.compilar(modelo.replace('{n}', str(n)))
+        assert resultado.sucesso, resultado.erros
+        ast_dict = resultado.ast.to_dict()
+        closures = compilar_closures(resultado.ast)
+        bytecode = compilar_bytecode(resultado.ast)
+
+        def ingenuo(saida):
+            InterpretadorIngenuo(ast_dict, saida).executar()
+
+        motores = (("dicionários", ingenuo),
+                   ("closures", lambda saida: closures.executar(entrada=[], saida=saida)),
+                   ("máquina virtual", lambda saida: MaquinaVirtual(bytecode, entrada=[], saida=saida).executar()))
+        print(f"{nome} (n={n})")
+        referencia = None
+        base = None
+        for descricao, motor in motores:
+            def executar():
+                saida = io.StringIO()
+                motor(saida)
+                return saida.getvalue()
+            tempo, saida = cronometrar(executar, args.repeticoes)
+            base = base or tempo
+            referencia = referencia if referencia is not None else saida
+            conferido = "" if saida == referencia else "  SAÍDA DIFERENTE"
+            print(f"  {descricao:<16} {tempo:7.3f} s  {base / tempo:5.1f}x{conferido}")
+
+
+def gerar_programa_guardado(n_blocos):
+    """Programa no estilo do código gerado: aritmética literal e guardas constantes."""
+    linhas = ["program guardado;", "var x, y, i: integer; ok: boolean;", "begin", "    x := 1; y := 0; i := 0;"]
+    for k in range(n_blocos):
+        linhas.append(f"""    if true then x := x + ({k % 7} * 3 - 1) else x := 0;
+    if {k % 5} > 2 then y := y + 5 else y := y - (10 div 3);
+    while false do y := y + 1;
+    begin begin ok := not (1 = 2) and (x > 0) end end;
+    i := 0;
+    while i < 3 + 2 do
+    begin
+        y := y + x div (4 + 1) - -1;
+        i := i + 1
+    end;""")
+    linhas.append("    write(x, y, ok)")
+    linhas.append("end.")
+    return "\n".join(linhas)
+
+
+def saidas_otimizacao(sessao, codigo, entrada):
+    """
+    Saídas do programa sem e com otimização, no interpretador e na máquina
+    virtual (quatro textos que devem ser iguais), o resultado da compilação
+    otimizada e os nós da AST antes da otimização.
+    """
+    saidas = []
+    for otimizar in (False, True):
+        resultado = sessao.compilar(codigo, otimizar=otimizar)
+        assert resultado.sucesso, resultado.erros
+        for executar in (lambda s: compilar_closures(resultado.ast).executar(entrada=[entrada], saida=s),
+                         lambda s: MaquinaVirtual(compilar_bytecode(resultado.ast), [entrada], s).executar()):
+            saida = io.StringIO()
+            try:
+                executar(saida)
+            except Exception as e:  # erro de execução também faz parte da saída
+                saida.write(f"<{type(e).__name__}: {e}>")
+            saidas.append(saida.getvalue())
+        if not otimizar:
+            nos = sum(1 for _ in iterar_nos(resultado.ast))
+    return saidas, resultado, nos
+
+
+def bench_otimizador(args):
+    programas = []
+    for caminho in sorted(p for padrao in args.arquivos for p in glob.glob(padrao)):
+        with open(caminho) as f:
+            programas.append((caminho, f.read()))
+    for nome, (modelo, n) in PROGRAMAS_VM.items():
+        programas.append((nome, modelo.replace('{n}', str(max(1, n // 100)))))
+    programas.append(('guardado', gerar_programa_guardado(args.blocos)))
+
+    sessao = SessaoCompilador()
+    divergentes = 0
+    print(f"{'programa':<22} {'nós':>7} {'removidos':>9} {'otimização (s)':>14}  saída")
+    for nome, codigo in programas:
+        saidas, resultado, nos = saidas_otimizacao(sessao, codigo, args.entrada)
+        igual = all(s == saidas[0] for s in saidas)
+        divergentes += not igual
+        print(f"{os.path.basename(nome):<22} {nos:>7} {resultado.nos_removidos:>9} "
+              f"{resultado.tempos['otimizacao']:>14.4f}  {'igual' if igual else 'DIFERENTE'}")
+    print(f"{len(programas)} programa(s), {divergentes} com saída diferente")
+    if divergentes:
+        raise SystemExit(1)
+
+
+def gerar_procedimento_grande(n_comandos, n_variaveis=40, semente=0):
+    """Programa com um procedimento de ~n_comandos comandos, misturando if e while."""
+    rng = random.Random(semente)
+    nomes = [f"v{i}" for i in range(n_variaveis)]
+
+    def atribuicao():
+        a, b, c = rng.sample(nomes, 3)
+        return f"{a} := {b} + {c}" if rng.random() < 0.7 else f"{a} := {b} * 2"
+
+    def condicao():
+        a, b = rng.sample(nomes, 2)
+        return f"{a} < {b}"
+
+    comandos = []
+    gerados = 0
+    while gerados < n_comandos:
+        sorteio = rng.random()
+        if sorteio < 0.6:
+            comandos.extend(atribuicao() for _ in range(10))
+        elif sorteio < 0.85:
+            entao = "; ".join(atribuicao() for _ in range(5))
+            senao = "; ".join(atribuicao() for _ in range(4))
+            comandos.append(f"if {condicao()} then begin {entao} end else begin {senao} end")
+        else:
+            corpo = "; ".join(atribuicao() for _ in range(9))
+            comandos.append(f"while {condicao()} do begin {corpo} end")
+        gerados += 10
+    return "\n".join([
+        "program fluxo_grande;",
+        "var r: integer;",
+        "procedure grande(" + ", ".join(nomes[:4]) + ": integer);",
+        "var " + ", ".join(nomes[4:]) + ": integer;",
+        "begin",
+        ";\n".join("    " + c for c in comandos),
+        "end;",
+        "begin",
+        "    grande(1, 2, 3, 4)",
+        "end.",
+    ])
+
+
+def bench_fluxo(args):
+    sessao = SessaoCompilador()
+    print(f"{'comandos':>9} {'blocos':>7} {'grafo (s)':>10} {'alcance (s)':>12} {'vivas (s)':>10} {'avisos (s)':>11}")
+    for n in args.tamanhos:
+        resultado = sessao.compilar(gerar_procedimento_grande(n))
+        assert resultado.sucesso, resultado.erros
+        tempo_grafo, grafos = cronometrar(lambda: construir_grafos(resultado.ast), args.repeticoes)
+        grafo = grafos[1]
+        tempo_alcance, _ = cronometrar(lambda: DefinicoesAlcancam(grafo), args.repeticoes)
+        tempo_vivas, _ = cronometrar(lambda: vivas(grafo), args.repeticoes)
+        tempo_avisos, analisador = cronometrar(lambda: AnalisadorFluxo(resultado.ast).analisar(), args.repeticoes)
+        print(f"{n:>9} {len(grafo.blocos):>7} {tempo_grafo:>10.3f} {tempo_alcance:>12.3f} "
+              f"{tempo_vivas:>10.3f} {tempo_avisos:>11.3f}  ({len(analisador.avisos)} avisos)")
+
+
+def executar_interpretador(ast, entrada):
+    """(saída, código de saída) do interpretador por closures, como no terminal."""
+    saida = io.StringIO()
+    try:
+        compilar_closures(ast).executar(entrada=[entrada], saida=saida)
+    except ErroExecucao as e:
+        return saida.getvalue() + f"Erro de Execução: {e}\n", 1
+    return saida.getvalue(), 0
+
+
+def saidas_c(ast, entrada, executavel):
+    """
+    (saída, código de saída) do programa compilado para C em 'executavel' e
+    os mesmos do interpretador; levanta ErroCompiladorC se o C não compilar.
+    """
+    compilar_executavel(gerar_c(ast), executavel)
+    nativo = subprocess.run([executavel], input=entrada, capture_output=True, text=True)
+    return (nativo.stdout + nativo.stderr, nativo.returncode), executar_interpretador(ast, entrada)
+
+
+def bench_c(args):
+    sessao = SessaoCompilador()
+    arquivos = sorted(p for padrao in args.arquivos for p in glob.glob(padrao))
+    divergentes = 0
+    with tempfile.TemporaryDirectory() as diretorio:
+        executavel = os.path.join(diretorio, 'programa')
+        for caminho in arquivos:
+            resultado = sessao.compilar_arquivo(caminho)
+            assert resultado.sucesso, (caminho, resultado.erros)
+            try:
+                obtido, esperado = saidas_c(resultado.ast, args.entrada, executavel)
+            except ErroCompiladorC as e:
+                print(f"{caminho}: falha ao compilar o C\n{e}")
+                divergentes += 1
+                continue
+            igual = obtido == esperado
+            divergentes += not igual
+            print(f"{caminho:<24} {'igual' if igual else 'DIFERENTE'}")
+            if not igual:
+                print(f"  interpretador: {esperado!r}\n  C:             {obtido!r}")
+        print(f"{len(arquivos)} programa(s), {divergentes} com saída diferente")
+
+        print(f"\n{'programa':<11} {'C -O2 (s)':>10} {'VM (s)':>8} {'closures (s)':>13}")
+        for nome, (modelo, n) in PROGRAMAS_VM.items():
+            resultado = sessao.compilar(modelo.replace('{n}', str(n)))
+            compilar_executavel(gerar_c(resultado.ast), executavel)
+            tempo_c, nativo = cronometrar(lambda: subprocess.run([executavel], capture_output=True, text=True), 1)
+            tempo_vm, _ = cronometrar(lambda: MaquinaVirtual(compilar_bytecode(resultado.ast), [], io.StringIO()).executar(), 1)
+            tempo_cl, (saida, _) = cronometrar(lambda: executar_interpretador(resultado.ast, ''), 1)
+            conferido = "" if nativo.stdout == saida else "  SAÍDA DIFERENTE"
+            print(f"{nome:<11} {tempo_c:>10.3f} {tempo_vm:>8.3f} {tempo_cl:>13.3f}{conferido}")
+    if divergentes:
+        raise SystemExit(1)
+
+
+def primeira_subrotina(leitor):
+    """Índice da primeira sub-rotina do programa, navegando só pelos índices (ou None)."""
+    bloco = leitor.filhos(0)[0]
+    for filho in leitor.filhos(bloco):
+        if leitor.tipo(filho) in ('decl_proc', 'decl_func'):
+            return filho
+    return None
+
+
+def diferencas_ast(original, lida):
+    """
+    Campos em que duas árvores diferem, comparadas nó a nó: tipo, posição,
+    valores, nomes e anotações da análise semântica (o to_dict() omite as
+    anotações None, então não separa None de um valor que sobrou de outro nó).
+    """
+    diferencas = []
+    pilha = [(original, lida, original.tipo)]
+    while pilha:
+        a, b, caminho = pilha.pop()
+        if type(a) is not type(b):
+            diferencas.append(f"{caminho}: {a.tipo} x {b.tipo}")
+            continue
+        if a.posicao != b.posicao:
+            diferencas.append(f"{caminho}.posicao: {a.posicao!r} x {b.posicao!r}")
+        for atributo, _, tipo_campo in a._campos:
+            va, vb = getattr(a, atributo), getattr(b, atributo)
+            if (tipo_campo == NO or tipo_campo == OPCIONAL) and va is not None and vb is not None:
+                pilha.append((va, vb, f"{caminho}.{atributo}"))
+            elif tipo_campo == NOS and len(va) == len(vb):
+                pilha.extend((x, y, f"{caminho}.{atributo}[{i}]") for i, (x, y) in enumerate(zip(va, vb)))
+            elif tipo_campo == NOS or va != vb or type(va) is not type(vb):
+                diferencas.append(f"{caminho}.{atributo}: {va!r} x {vb!r}")
+    return diferencas
+
+
+# A segunda declaração de x fica sem endereço (None) e a última constante da
+# tabela do binário é uma anotação em lista: o leitor não pode confundir as duas
+DECLARACAO_REPETIDA = "program p; var x, x, y: integer; begin read(y) end."
+
+def bench_ast_binaria(args):
+    sessao = SessaoCompilador()
+    sessao.lexer.ecoar_erros = False
+    # ASTs anotadas pela análise semântica, também com erros semânticos (anotações
+    # None no meio das preenchidas), lidas de volta do binário
+    caminhos = sorted(c for padrao in args.arquivos for c in glob.glob(padrao))
+    conferidas = 0
+    for nome in caminhos + ['declaracao_repetida']:
+        try:
+            if nome == 'declaracao_repetida':
+                ast = sessao.compilar(DECLARACAO_REPETIDA).ast
+            else:
+                ast = sessao.compilar_arquivo(nome).ast
+        except ErroSintatico:
+            continue
+        conferidas += 1
+        for diferenca in diferencas_ast(ast, LeitorBinario(para_binario(ast)).no(0)):
+            print(f"{nome}: {diferenca}")
+            raise SystemExit(1)
+    print(f"{conferidas} ASTs anotadas iguais campo a campo depois do binário\n")
+
+    programas = {
+        'comandos': gerar_programa(args.semente, 'comandos', comandos=args.comandos),
+        'subrotinas': gerar_programa(args.semente, 'subrotinas', subrotinas=args.comandos // 10,
+                                     comandos_subrotina=10),
+    }
+    print(f"{'forma':<11} {'formato':<15} {'nós':>8} {'tamanho (MB)':>13} {'grava (s)':>10} "
+          f"{'lê (s)':>8} {'sub-rotina (ms)':>16}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'ast')
+        for forma, codigo in programas.items():
+            # Anotada, como no 'semantico.py --json'
+            ast = sessao.compilar(codigo).ast
+            nos = sum(1 for _ in iterar_nos(ast))
+
+            def linha(formato, gravar, ler, subrotina=None):
+                grava, _ = cronometrar(gravar, args.repeticoes)
+                le, lida = cronometrar(ler, args.repeticoes)
+                diferencas = diferencas_ast(ast, lida)
+                if diferencas:
+                    print(f"{forma}: a AST lida do formato '{formato}' difere da original: {diferencas[0]}")
+                    raise SystemExit(1)
+                tamanho = os.path.getsize(caminho) / (1024 * 1024)
+                tempo_sub = f"{cronometrar(subrotina, args.repeticoes)[0] * 1000:>16.2f}" if subrotina else f"{'-':>16}"
+                print(f"{forma:<11} {formato:<15} {nos:>8} {tamanho:>13.2f} {grava:>10.3f} {le:>8.3f} {tempo_sub}")
+
+            def gravar_json_compacto():
+                with open(caminho, 'w') as f:
+                    f.write(json.dumps(ast.to_dict(), ensure_ascii=False))
+
+            def ler_json():
+                with open(caminho) as f:
+                    return No.from_dict(json.load(f))
+
+            # Como o yacc.py grava o ast.json (a gravação inclui o to_dict(), como no
+            # binário), e sem indentação (codificador em C)
+            linha("json indent=2", lambda: salvar_json(ast, caminho), lambda: em_pilha_grande(ler_json))
+            linha("json compacto", lambda: em_pilha_grande(gravar_json_compacto),
+                  lambda: em_pilha_grande(ler_json))
+
+            # Leitura preguiçosa: abrir o arquivo e decodificar só a primeira sub-rotina
+            def uma_subrotina():
+                with LeitorBinario.abrir(caminho) as leitor:
+                    indice = primeira_subrotina(leitor)
+                    return None if indice is None else leitor.no(indice)
+            tem_subrotina = bool(ast.corpo.subrotinas)
+            linha("binário", lambda: salvar_binario(ast, caminho), lambda: ler_binario(caminho),
+                  uma_subrotina if tem_subrotina else None)
+
+
+def bench_compartilhamento(args):
+    print(f"{'forma':<11} {'modo':<14} {'nós':>8} {'memória (KB)':>13} {'sintática (s)':>14} "
+          f"{'semântica (s)':>14} {'exp. verificadas':>17}")
+    for forma in args.formas:
+        codigo = gerar_programa(args.semente, forma, args.escala)
+        for compartilhar in (False, True):
+            sessao = SessaoCompilador(compartilhar=compartilhar)
+            memoria, _ = medir_alocacao(lambda: sessao.analisar_sintaxe(codigo))
+            tempo_sintatico, ast = cronometrar(lambda: sessao.analisar_sintaxe(codigo), args.repeticoes)
+            def verificar():
+                analisador = sessao.novo_analisador_semantico()
+                analisador.visitar(ast)
+                return analisador
+            tempo_semantico, analisador = cronometrar(verificar, args.repeticoes)
+            assert not analisador.erros, analisador.erros
+            nos = sum(1 for _ in iterar_nos(ast, distintos=True))
+            expressoes = sum(1 for no in iterar_nos(ast) if no.tipo in ('exp_binaria', 'exp_unaria'))
+            # O analisador compartilhado verifica cada nó de expressão uma vez só
+            verificadas = len(analisador.tipos) if compartilhar else expressoes
+            modo = 'compartilhada' if compartilhar else 'árvore'
+            print(f"{forma:<11} {modo:<14} {nos:>8} {memoria / 1024:>13.1f} {tempo_sintatico:>14.4f} "
+                  f"{tempo_semantico:>14.4f} {verificadas:>8} de {expressoes:<5}")
+
+        # Subexpressões comuns, sobre a AST compartilhada
+        repetidas = AnalisadorSubexpressoes(ast).analisar().repeticoes
+        tempo_eliminacao, evitados = cronometrar(lambda: eliminar_subexpressoes(ast), 1)
+        print(f"{forma:<11} {len(repetidas)} expressão(ões) repetida(s); {evitados} cálculo(s) "
+              f"eliminado(s) em {tempo_eliminacao:.4f} s\n")
+
+    # Os programas das formas acima crescem os inteiros sem limite e demoram a
+    # executar; a saída é conferida em programas pequenos com muitas repetições
+    divergentes = 0
+    programas = [gerar_programa(semente, 'repetidas', 0.03, aninhamento=1) for semente in range(args.programas)]
+    for codigo in programas:
+        for compartilhar in (False, True):
+            resultado = SessaoCompilador(compartilhar=compartilhar).compilar(codigo)
+            assert resultado.sucesso, resultado.erros
+            antes = executar_interpretador(resultado.ast, args.entrada)
+            eliminar_subexpressoes(resultado.ast)
+            divergentes += executar_interpretador(resultado.ast, args.entrada) != antes
+    print(f"{len(programas)} programa(s) executados antes e depois da eliminação, nas duas ASTs: "
+          f"{divergentes} com saída diferente")
+    if divergentes:
+        raise SystemExit(1)
+
+
+class ClienteLSP:
+    """Cliente mínimo do servidor_lsp.py, num subprocesso, falando o protocolo pela entrada e saída."""
+    def __init__(self):
+        diretorio = os.path.dirname(os.path.abspath(__file__))
+        self.processo = subprocess.Popen([sys.executable, os.path.join(diretorio, 'servidor_lsp.py')],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.ultimo_id = 0
+
+    def enviar(self, mensagem):
+        corpo = json.dumps(dict(mensagem, jsonrpc='2.0')).encode('utf-8')
+        self.processo.stdin.write(b'Content-Length: %d\r\n\r\n' % len(corpo) + corpo)
+        self.processo.stdin.flush()
+
+    def ler(self):
+        tamanho = None
+        while True:
+            linha = self.processo.stdout.readline()
+            if not linha:
+                raise EOFError("o servidor terminou")
+            if not linha.strip():
+                break
+            nome, _, valor = linha.decode('ascii').partition(':')
+            if nome.lower() == 'content-length':
+                tamanho = int(valor)
+        return json.loads(self.processo.stdout.read(tamanho))
+
+    def pedir(self, metodo, params):
+        self.ultimo_id += 1
+        self.enviar({'id': self.ultimo_id, 'method': metodo, 'params': params})
+        while True:
+            resposta = self.ler()
+            if resposta.get('id') == self.ultimo_id:
+                return resposta.get('result')
+
+    def diagnosticos(self):
+        """(linha, mensagem) de cada diagnóstico da próxima publicação, com linhas a partir de 1."""
+        while True:
+            mensagem = self.ler()
+            if mensagem.get('method') == 'textDocument/publishDiagnostics':
+                return [(d['range']['start']['line'] + 1, d['message']) for d in mensagem['params']['diagnostics']]
+
+    def encerrar(self):
+        self.pedir('shutdown', None)
+        self.enviar({'method': 'exit'})
+        return self.processo.wait()
+
+
+def bench_lsp(args):
+    # Sub-rotinas de ~50 linhas, como as da forma 'subrotinas' do gerador
+    amostra = gerar_programa(args.semente, 'subrotinas', subrotinas=100, comandos_subrotina=10).count('\n')
+    codigo = gerar_programa(args.semente, 'subrotinas', subrotinas=max(1, args.linhas * 100 // amostra),
+                            comandos_subrotina=10)
+    linhas = codigo.split('\n')
+    cabecalhos = [i for i, l in enumerate(linhas) if l.startswith(('procedure ', 'function '))]
+    corpos = [linhas.index('begin', i) for i in cabecalhos]  # 'begin' de cada sub-rotina
+    corpo_principal = len(linhas) - 1 - linhas[::-1].index('begin')
+    uri = 'file:///benchmark.ras'
+    aleatorio = random.Random(args.semente)
+    tempos = {}
+
+    cliente = ClienteLSP()
+    cliente.pedir('initialize', {'capabilities': {}})
+    inicio = time.perf_counter()
+    cliente.enviar({'method': 'textDocument/didOpen', 'params': {'textDocument': {
+        'uri': uri, 'languageId': 'rascal', 'version': 1, 'text': codigo}}})
+    cliente.diagnosticos()
+    abertura = time.perf_counter() - inicio
+    print(f"{len(linhas)} linhas, {len(cabecalhos)} sub-rotinas; abertura em {abertura:.2f} s")
+
+    def alterar(operacao, linha, texto, apagar=False):
+        """Insere 'texto' antes da linha (ou apaga a linha) e mede até a publicação dos diagnósticos."""
+        fim = {'line': linha + 1 if apagar else linha, 'character': 0}
+        mudanca = {'range': {'start': {'line': linha, 'character': 0}, 'end': fim}, 'text': texto}
+        inicio = time.perf_counter()
+        cliente.enviar({'method': 'textDocument/didChange', 'params': {
+            'textDocument': {'uri': uri, 'version': 0}, 'contentChanges': [mudanca]}})
+        cliente.diagnosticos()
+        tempos.setdefault(operacao, []).append(time.perf_counter() - inicio)
+
+    def consultar(operacao, metodo, linha, coluna):
+        inicio = time.perf_counter()
+        cliente.pedir(metodo, {'textDocument': {'uri': uri}, 'position': {'line': linha, 'character': coluna}})
+        tempos.setdefault(operacao, []).append(time.perf_counter() - inicio)
+
+    for _ in range(args.edicoes):
+        k = aleatorio.randrange(len(cabecalhos))
+        linha = corpos[k] + 1
+        # Comando válido, consultas sobre a variável local x0 e um erro de tipo
+        alterar('sub-rotina', linha, "    x0 := x0 + 1;\n")
+        consultar('definição', 'textDocument/definition', linha, 5)
+        consultar('hover', 'textDocument/hover', linha, 5)
+        alterar('sub-rotina', linha, "", apagar=True)
+        alterar('sub-rotina (erro)', linha, "    x0 := true;\n")
+        alterar('sub-rotina (erro)', linha, "", apagar=True)
+        alterar('corpo principal', corpo_principal + 1, "    g0 := g0 + 1;\n")
+        alterar('corpo principal', corpo_principal + 1, "", apagar=True)
+    for _ in range(2):
+        # O cabeçalho muda as globais: o documento é analisado inteiro
+        alterar('cabeçalho', 1, "{ comentário }\n")
+        alterar('cabeçalho', 1, "", apagar=True)
+    cliente.encerrar()
+
+    print(f"{'operação':<18} {'n':>4} {'mediana (ms)':>13} {'p95 (ms)':>9} {'máx (ms)':>9}")
+    acima = []
+    for operacao, medidas in tempos.items():
+        medidas.sort()
+        p95 = medidas[int(0.95 * (len(medidas) - 1))] * 1000
+        print(f"{operacao:<18} {len(medidas):>4} {statistics.median(medidas) * 1000:>13.1f} "
+              f"{p95:>9.1f} {medidas[-1] * 1000:>9.1f}")
+        if operacao != 'cabeçalho' and p95 > args.limite:
+            acima.append(operacao)
+    if acima:
+        print(f"p95 acima de {args.limite:g} ms: {', '.join(acima)}")
+        raise SystemExit(1)
+
+
+def medir_forma(sessao, codigo, repeticoes):
+    """Tempos (o menor de várias compilações) e pico de memória de cada fase de um programa."""
+    execucoes = [estatisticas_compilacao(codigo, memoria=False, sessao=sessao) for _ in range(repeticoes)]
+    memoria = estatisticas_compilacao(codigo, memoria=True, sessao=sessao)
+    assert memoria['status'] == 'ok', memoria['erros']
+    linhas = codigo.count('\n')
+    nos = memoria['nos']['total']
+    fases = {}
+    for fase, registro in memoria['fases'].items():
+        tempo = min(e['fases'][fase]['tempo'] for e in execucoes)
+        fases[fase] = {'tempo': tempo, 'linhas_s': linhas / tempo, 'nos_s': nos / tempo,
+                       'memoria_pico': registro['memoria_alocada']}
+    return {'linhas': linhas, 'tokens': memoria['tokens']['total'], 'nos': nos,
+            'profundidade_ast': memoria['profundidade_ast'], 'fases': fases}
+
+
+def comparar_baseline(resultados, baseline, tolerancia):
+    """Linhas (forma, fase, medida, base, atual, razão) das medidas que pioraram além da tolerância."""
+    regressoes = []
+    for forma, atual in resultados['formas'].items():
+        base = baseline['formas'].get(forma)
+        if base is None or base['linhas'] != atual['linhas']:
+            continue  # programa diferente (outra escala ou semente): não há o que comparar
+        for fase, medidas in atual['fases'].items():
+            if 'erro' in medidas or 'erro' in base['fases'].get(fase, {'erro': None}):
+                continue
+            for medida in ('tempo', 'memoria_pico'):
+                antes, agora = base['fases'][fase][medida], medidas[medida]
+                if antes > 0 and agora / antes > 1 + tolerancia:
+                    regressoes.append((forma, fase, medida, antes, agora, agora / antes))
+    return regressoes
+
+
+def bench_suite(args):
+    sessao = SessaoCompilador()
+    resultados = {'escala': args.escala, 'semente': args.semente, 'python': sys.version.split()[0],
+                  'formas': {}}
+    print(f"{'forma':<12} {'fase':<10} {'linhas':>7} {'nós':>7} {'tempo (s)':>10} "
+          f"{'linhas/s':>10} {'nós/s':>10} {'pico (KB)':>10}")
+    for forma in args.formas:
+        codigo = gerar_programa(args.semente, forma, args.escala)
+        medida = resultados['formas'][forma] = medir_forma(sessao, codigo, args.repeticoes)
+        for fase, m in medida['fases'].items():
+            print(f"{forma:<12} {fase:<10} {medida['linhas']:>7} {medida['nos']:>7} {m['tempo']:>10.4f} "
+                  f"{m['linhas_s']:>10.0f} {m['nos_s']:>10.0f} {m['memoria_pico'] / 1024:>10.1f}")
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nResultados gravados em '{args.saida}'")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressoes = comparar_baseline(resultados, baseline, args.tolerancia)
+        print(f"\nComparação com '{args.baseline}' (tolerância de {args.tolerancia:.0%}): "
+              f"{len(regressoes)} regressão(ões)")
+        for forma, fase, medida, antes, agora, razao in regressoes:
+            print(f"  {forma}/{fase} {medida}: {antes:.4g} -> {agora:.4g} ({razao:.2f}x)")
+        if regressoes:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    argp = argparse.ArgumentParser(description="Benchmarks do compilador Rascal")
+    sub = argp.add_subparsers(dest='experimento', required=True)
+
+    p_cmd = sub.add_parser('comandos', help="escala da análise sintática com o número de comandos")
+    p_cmd.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 100000])
+    p_cmd.add_argument('--repeticoes', type=int, default=3)
+    p_cmd.set_defaults(funcao=bench_comandos)
+
+    p_sem = sub.add_parser('semantico', help="análise semântica de um bloco muito longo")
+    p_sem.add_argument('--comandos', type=int, default=200000)
+    p_sem.set_defaults(funcao=bench_semantico)
+
+    p_desp = sub.add_parser('despacho', help="custo do despacho de métodos do visitante")
+    p_desp.add_argument('--arquivo', default='tests/correto08.ras')
+    p_desp.add_argument('--vezes', type=int, default=10000)
+    p_desp.add_argument('--repeticoes', type=int, default=3)
+    p_desp.set_defaults(funcao=bench_despacho)
+
+    p_mem = sub.add_parser('memoria', help="memória ocupada por nó da AST")
+    p_mem.add_argument('--comandos', type=int, default=100000)
+    p_mem.set_defaults(funcao=bench_memoria)
+
+    p_part = sub.add_parser('partida', help="tempo de partida a frio do parser")
+    p_part.add_argument('--arquivo', default='tests/correto08.ras')
+    p_part.add_argument('--execucoes', type=int, default=20)
+    p_part.set_defaults(funcao=bench_partida)
+
+    p_est = sub.add_parser('estresse', help="compilações paralelas em threads")
+    p_est.add_argument('--arquivos', nargs='+', default=['tests/*.ras'])
+    p_est.add_argument('--compilacoes', type=int, default=10000)
+    p_est.add_argument('--threads', type=int, default=16)
+    p_est.set_defaults(funcao=bench_estresse)
+
+    p_lex = sub.add_parser('lexico', help="lexer sobre arquivos grandes: leitura inteira x mmap em blocos")
+    p_lex.add_argument('--megabytes', type=int, default=8)
+    p_lex.add_argument('--comentario-mb', type=float, default=1.0)
+    p_lex.set_defaults(funcao=bench_lexico)
+
+    p_lexp = sub.add_parser('lexico-processo', help="(uso interno do experimento 'lexico')")
+    p_lexp.add_argument('modo', choices=['leitura', 'mmap'])
+    p_lexp.add_argument('arquivo')
+    p_lexp.set_defaults(funcao=bench_lexico_processo)
+
+    p_ldfa = sub.add_parser('lexer-dfa', help="lexer por tabela x lexer do PLY: mesmos tokens e tokens/s")
+    p_ldfa.add_argument('--arquivos', nargs='+', default=['tests/*.ras', 'tests2/*.ras'])
+    p_ldfa.add_argument('--mutacoes', type=int, default=20, help="variantes com caracteres inseridos por arquivo")
+    p_ldfa.add_argument('--semente', type=int, default=0)
+    p_ldfa.add_argument('--escala', type=float, default=2.0, help="tamanho do programa sintético medido")
+    p_ldfa.add_argument('--repeticoes', type=int, default=5)
+    p_ldfa.set_defaults(funcao=bench_lexer_dfa)
+
+    p_vm = sub.add_parser('vm', help="instruções por segundo da máquina virtual")
+    p_vm.add_argument('--programas', nargs='+', choices=sorted(PROGRAMAS_VM), default=list(PROGRAMAS_VM))
+    p_vm.add_argument('--escala', type=float, default=1.0, help="multiplica o tamanho de cada problema")
+    p_vm.add_argument('--repeticoes', type=int, default=3)
+    p_vm.set_defaults(funcao=bench_vm)
+
+    p_int = sub.add_parser('interpretador', help="interpretador por closures x caminhada ingênua x máquina virtual")
+    p_int.add_argument('--programas', nargs='+', choices=sorted(PROGRAMAS_VM), default=list(PROGRAMAS_VM))
+    p_int.add_argument('--escala', type=float, default=1.0, help="multiplica o tamanho de cada problema")
+    p_int.add_argument('--repeticoes', type=int, default=1)
+    p_int.set_defaults(funcao=bench_interpretador)
+
+    p_otim = sub.add_parser('otimizador', help="nós removidos e saída idêntica com e sem otimização")
+    p_otim.add_argument('--arquivos', nargs='+', default=['tests/correto*.ras'])
+    p_otim.add_argument('--blocos', type=int, default=2000, help="blocos do programa com guardas constantes")
+    p_otim.add_argument('--entrada', default="7 2 true 4 5 6 7 8", help="entrada dos comandos read")
+    p_otim.set_defaults(funcao=bench_otimizador)
+
+    p_fluxo = sub.add_parser('fluxo', help="custo do grafo de fluxo e do resolvedor de fluxo de dados")
+    p_fluxo.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 50000])
+    p_fluxo.add_argument('--repeticoes', type=int, default=1)
+    p_fluxo.set_defaults(funcao=bench_fluxo)
+
+    p_c = sub.add_parser('c', help="backend C: saída igual à do interpretador e tempo nativo")
+    p_c.add_argument('--arquivos', nargs='+', default=['tests/correto*.ras'])
+    p_c.add_argument('--entrada', default="7 2 true 4 5 6 7 8", help="entrada dos comandos read")
+    p_c.set_defaults(funcao=bench_c)
+
+    p_bin = sub.add_parser('ast-binaria', help="AST em JSON x formato binário: tamanho, gravação e leitura")
+    p_bin.add_argument('--comandos', type=int, default=100000, help="comandos de cada programa gerado")
+    p_bin.add_argument('--arquivos', nargs='+', default=['tests/*.ras', 'tests2/*.ras'],
+                       help="programas conferidos campo a campo depois do binário")
+    p_bin.add_argument('--semente', type=int, default=0)
+    p_bin.add_argument('--repeticoes', type=int, default=3)
+    p_bin.set_defaults(funcao=bench_ast_binaria)
+
+    p_lsp = sub.add_parser('lsp', help="latência do servidor de linguagem num arquivo grande")
+    p_lsp.add_argument('--linhas', type=int, default=50000, help="tamanho aproximado do documento")
+    p_lsp.add_argument('--edicoes', type=int, default=50, help="rodadas de alterações em sub-rotinas")
+    p_lsp.add_argument('--limite', type=float, default=50.0, help="p95 aceito para cada operação, em ms")
+    p_lsp.add_argument('--semente', type=int, default=0)
+    p_lsp.set_defaults(funcao=bench_lsp)
+
+    p_comp = sub.add_parser('compartilhamento', help="AST com expressões compartilhadas e subexpressões comuns")
+    p_comp.add_argument('--formas', nargs='+', choices=sorted(FORMAS), default=['misto', 'expressoes', 'repetidas'])
+    p_comp.add_argument('--escala', type=float, default=1.0)
+    p_comp.add_argument('--semente', type=int, default=0)
+    p_comp.add_argument('--repeticoes', type=int, default=3)
+    p_comp.add_argument('--programas', type=int, default=20, help="programas executados para conferir a saída")
+    p_comp.add_argument('--entrada', default=' '.join(str(i % 13 - 6) for i in range(200)),
+                        help="entrada dos comandos read")
+    p_comp.set_defaults(funcao=bench_compartilhamento)
+
+    p_suite = sub.add_parser('suite', help="fases do compilador sobre programas sintéticos, com linha de base")
+    p_suite.add_argument('--formas', nargs='+', choices=sorted(FORMAS), default=list(FORMAS))
+    p_suite.add_argument('--escala', type=float, default=1.0, help="multiplica o tamanho de cada forma")
+    p_suite.add_argument('--semente', type=int, default=0)
+    p_suite.add_argument('--repeticoes', type=int, default=3)
+    p_suite.add_argument('--saida', help="grava os resultados neste arquivo JSON")
+    p_suite.add_argument('--baseline', help="JSON de uma execução anterior para comparar")
+    p_suite.add_argument('--tolerancia', type=float, default=0.25, help="piora relativa aceita (0.25 = 25%%)")
+    p_suite.set_defaults(funcao=bench_suite)
+
+    args = argp.parse_args()
+    args.funcao(args)
@@ -0,0 +1,135 @@
+# CACHE DE COMPILAÇÃO
+#
+# Guarda em disco, para cada programa já compilado, o status, os erros e os
+# diagnósticos produzidos (o que o compile-batch grava de cada arquivo). A chave é o hash do código-fonte junto com a versão
+# da gramática e do analisador, então qualquer mudança no compilador invalida
+# as entradas antigas. O tamanho total é limitado com descarte LRU: cada acerto
+# atualiza o horário de modificação da entrada e, ao passar do limite, as
+# entradas usadas há mais tempo são removidas primeiro. Vários processos
+# (os do compile-batch) gravam no mesmo diretório: cada um reconta o total
+# no disco com frequência maior à medida que o cache se aproxima do limite.
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from yacc import assinatura_gramatica
+
+# Módulos cujo código influencia o resultado guardado no cache
+MODULOS_ANALISADOR = ('yacc.py', 'fonte.py', 'arvore.py', 'visitante.py', 'semantico.py', 'compilador.py', 'diagnosticos.py')
+
+# Um .tmp mais velho que isso (em segundos) é de um processo que morreu no meio da gravação
+IDADE_TEMPORARIO_ABANDONADO = 600
+
+_versao = None
+
+def versao_compilador():
+    """Hash da gramática e do código do analisador (calculado uma vez por processo)."""
+    global _versao
+    if _versao is None:
+        h = hashlib.sha256(assinatura_gramatica().encode('utf-8'))
+        diretorio = os.path.dirname(os.path.abspath(__file__))
+        for nome in MODULOS_ANALISADOR:
+            with open(os.path.join(diretorio, nome), 'rb') as f:
+                h.update(f.read())
+        _versao = h.hexdigest()
+    return _versao
+
+
+class CacheCompilacao:
+    def __init__(self, diretorio='.rascal-cache', tamanho_maximo=256 * 1024 * 1024):
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo
+        self.acertos = 0
+        self.faltas = 0
+        os.makedirs(diretorio, exist_ok=True)
+        self._tamanho_total = 0  # estimativa: o total da última contagem mais o que este processo gravou
+        self._gravado = 0        # bytes gravados por este processo desde a última contagem
+        self._folga = 0          # quanto faltava para o limite na última contagem
+        self.descartar()
+
+    def chave(self, codigo):
+        h = hashlib.sha256(versao_compilador().encode('utf-8'))
+        h.update(codigo.encode('utf-8'))
+        return h.hexdigest()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + '.json')
+
+    def _entradas(self, sufixo='.json'):
+        """(caminho, tamanho, último uso) de cada entrada gravada (ou de cada temporário, com sufixo='.tmp')."""
+        with os.scandir(self.diretorio) as itens:
+            for item in itens:
+                if item.name.endswith(sufixo):
+                    try:
+                        info = item.stat()
+                    except FileNotFoundError:
+                        continue  # removida por outro processo
+                    yield item.path, info.st_size, info.st_mtime
+
+    def obter(self, codigo):
+        """Entrada guardada para o código ({'diagnosticos': ...}) ou None."""
+        caminho = self._caminho(self.chave(codigo))
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                entrada = json.load(f)
+            os.utime(caminho)  # marca o uso para o LRU
+        except (OSError, ValueError):
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        return entrada
+
+    def guardar(self, codigo, diagnosticos):
+        """Grava a entrada com os diagnósticos (o registro do compilador.diagnosticos_arquivo)."""
+        caminho = self._caminho(self.chave(codigo))
+        dados = json.dumps({'diagnosticos': diagnosticos},
+                           ensure_ascii=False, separators=(',', ':'))
+        # Grava num arquivo temporário e renomeia, para que leitores
+        # concorrentes nunca vejam uma entrada pela metade
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            f.write(dados)
+        try:
+            anterior = os.stat(caminho).st_size  # a entrada substituída sai do total
+        except FileNotFoundError:
+            anterior = 0
+        os.replace(temporario, caminho)
+
+        tamanho = len(dados.encode('utf-8'))
+        self._tamanho_total += tamanho - anterior
+        self._gravado += tamanho
+        # O que os outros processos gravaram só aparece numa nova contagem, feita
+        # quando este processo já gravou uma fração da folga da contagem anterior
+        if self._tamanho_total > self.tamanho_maximo or self._gravado > self._folga // 8:
+            self.descartar()
+
+    def descartar(self):
+        """
+        Reconta o total no disco, apaga os temporários abandonados e, se o
+        total passar do limite, remove as entradas menos usadas até ele voltar
+        ao limite.
+        """
+        abandonado = time.time() - IDADE_TEMPORARIO_ABANDONADO
+        for caminho, _, modificado in list(self._entradas('.tmp')):
+            if modificado < abandonado:
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+
+        entradas = sorted(self._entradas(), key=lambda e: e[2])
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for caminho, tamanho, _ in entradas:
+            if total <= self.tamanho_maximo:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+        self._tamanho_total = total
+        self._gravado = 0
+        self._folga = self.tamanho_maximo - total
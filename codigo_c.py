@@ -0,0 +1,387 @@
+# GERAÇÃO DE CÓDIGO C
+#
+# Como usar: python codigo_c.py programa.ras [-O] [-o executavel] [--c arquivo.c] [--executar]
+#
+# Traduz a AST já verificada para um arquivo C portável (C99), compilado com
+# o 'cc' do sistema (ou o indicado na variável de ambiente CC). A semântica é
+# a mesma da máquina virtual e do interpretador: variáveis começam com 0/false,
+# 'div' trunca em direção a zero, 'and'/'or' em curto-circuito, e os erros de
+# execução (divisão por zero, entrada inválida) encerram com código 1 e a mesma
+# mensagem. Diferença: inteiros são 'long long' (64 bits), então valores fora
+# dessa faixa não se comportam como os inteiros sem limite do Python.
+#
+# Como o C não fixa a ordem de avaliação dos operandos nem dos argumentos, os
+# que vêm antes de uma chamada de função são guardados em temporários com o
+# operador vírgula, preservando a avaliação da esquerda para a direita.
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from arvore import iterar_nos
+from visitante import Visitante
+
+TIPOS_C = {'integer': 'long long', 'boolean': 'int'}
+
+OPERADORES_C = {
+    '+': '+', '-': '-', '*': '*',
+    '=': '==', '<>': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>=',
+    'and': '&&', 'or': '||',
+}
+
+TIPOS_OPERADORES = {
+    '+': 'integer', '-': 'integer', '*': 'integer', 'div': 'integer',
+    '=': 'boolean', '<>': 'boolean', '<': 'boolean', '<=': 'boolean',
+    '>': 'boolean', '>=': 'boolean', 'and': 'boolean', 'or': 'boolean',
+}
+
+# Funções de apoio incluídas em todo programa gerado
+SUPORTE = r'''#include <errno.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+static void rascal_erro(const char *mensagem, const char *item) {
+    fflush(stdout);
+    fputs("Erro de Execução: ", stderr);
+    fprintf(stderr, mensagem, item);
+    fputc('\n', stderr);
+    exit(1);
+}
+
+static long long rascal_div(long long a, long long b) {
+    if (b == 0) rascal_erro("Divisão por zero.", "");
+    return a / b;
+}
+
+static const char *rascal_item(void) {
+    static char item[256];
+    if (scanf("%255s", item) != 1) rascal_erro("Fim da entrada durante 'read'.", "");
+    return item;
+}
+
+static long long rascal_le_inteiro(void) {
+    const char *item = rascal_item();
+    char *fim;
+    long long valor;
+    errno = 0;
+    valor = strtoll(item, &fim, 10);
+    if (fim == item || *fim != '\0' || errno != 0)
+        rascal_erro("Valor inteiro inválido na entrada: '%s'.", item);
+    return valor;
+}
+
+static int rascal_le_logico(void) {
+    const char *item = rascal_item();
+    if (strcmp(item, "true") == 0) return 1;
+    if (strcmp(item, "false") == 0) return 0;
+    rascal_erro("Valor booleano inválido na entrada: '%s'.", item);
+    return 0;
+}
+
+static void rascal_escreve_inteiro(long long valor) {
+    printf("%lld", valor);
+}
+
+static void rascal_escreve_logico(int valor) {
+    fputs(valor ? "true" : "false", stdout);
+}
+'''
+
+
+class ErroCompiladorC(Exception):
+    pass
+
+
+def tem_chamada(exp):
+    return any(no.tipo == 'chamada_func' for no in iterar_nos(exp))
+
+
+class GeradorC(Visitante):
+    """Traduz uma AST aceita pelo AnalisadorSemantico para o texto de um programa C."""
+    def __init__(self):
+        super().__init__()
+        self.linhas = []
+        self.indentacao = 0
+        self.globais = {}       # nome -> tipo
+        self.locais = None      # idem, dentro de uma sub-rotina
+        self.rotinas = {}       # nome -> tipo de retorno (None para procedimentos)
+        self.rotina_atual = None
+        self.temporarios = 0    # usados na função C atual
+
+    def gerar(self, ast):
+        self.visitar(ast)
+        return '\n'.join(self.linhas) + '\n'
+
+    # --- AUXILIARES ---
+    def emitir(self, linha=''):
+        self.linhas.append('    ' * self.indentacao + linha if linha else '')
+
+    def resolver(self, nome):
+        """(expressão C, tipo) da variável visível com esse nome."""
+        if self.locais is not None:
+            if nome in self.locais:
+                return f"r_{nome}", self.locais[nome]
+            if nome == self.rotina_atual and self.rotinas[nome] is not None:
+                return "rascal_ret", self.rotinas[nome]
+        return f"r_{nome}", self.globais[nome]
+
+    def assinatura(self, sub):
+        retorno = TIPOS_C[sub.retorno] if sub.tipo == 'decl_func' else 'void'
+        params = ', '.join(f"{TIPOS_C[p.tipo_var]} r_{p.nome}" for p in sub.params) or 'void'
+        return f"static {retorno} rf_{sub.nome}({params})"
+
+    def novo_temporario(self):
+        self.temporarios += 1
+        return f"rascal_t{self.temporarios}"
+
+    def abrir_funcao(self, cabecalho):
+        self.emitir(cabecalho + " {")
+        self.indentacao += 1
+        self.temporarios = 0
+        return len(self.linhas)
+
+    def fechar_funcao(self, posicao):
+        # Os temporários só são conhecidos depois de gerar o corpo
+        if self.temporarios:
+            nomes = ', '.join(f"rascal_t{i}" for i in range(1, self.temporarios + 1))
+            self.linhas.insert(posicao, '    ' * self.indentacao + f"long long {nomes};")
+        self.indentacao -= 1
+        self.emitir("}")
+
+    def chamada(self, nome, args, textos):
+        """Chamada C que avalia os argumentos da esquerda para a direita."""
+        if not any(tem_chamada(arg) for arg in args[1:]):
+            return f"rf_{nome}({', '.join(textos)})"
+        guardados = []
+        finais = []
+        for texto in textos[:-1]:
+            t = self.novo_temporario()
+            guardados.append(f"{t} = {texto}")
+            finais.append(t)
+        finais.append(textos[-1])
+        return f"({', '.join(guardados)}, rf_{nome}({', '.join(finais)}))"
+
+    def declarar_variaveis(self, decls, tabela, prefixo=''):
+        for decl in decls:
+            tabela[decl.nome] = decl.tipo_var
+            self.emitir(f"{prefixo}{TIPOS_C[decl.tipo_var]} r_{decl.nome} = 0;")
+
+    # --- PROGRAMA E BLOCOS ---
+    def visitar_programa(self, no):
+        self.emitir(f"/* Programa Rascal '{no.nome}', gerado por codigo_c.py */")
+        self.linhas.extend(SUPORTE.splitlines())
+        yield no.corpo
+
+    def visitar_bloco(self, no):
+        if self.locais is not None:
+            self.declarar_variaveis(no.vars, self.locais)
+            yield no.comandos
+            return
+
+        self.emitir()
+        self.declarar_variaveis(no.vars, self.globais, 'static ')
+        if no.subrotinas:
+            self.emitir()
+            for sub in no.subrotinas:
+                self.emitir(self.assinatura(sub) + ';')
+        for sub in no.subrotinas:
+            yield sub
+
+        self.emitir()
+        posicao = self.abrir_funcao("int main(void)")
+        yield no.comandos
+        self.emitir("return 0;")
+        self.fechar_funcao(posicao)
+
+    def _visitar_subrotina(self, no, tipo_retorno):
+        self.rotinas[no.nome] = tipo_retorno
+        self.rotina_atual = no.nome
+        self.locais = {p.nome: p.tipo_var for p in no.params}
+
+        self.emitir()
+        posicao = self.abrir_funcao(self.assinatura(no))
+        if tipo_retorno is not None:
+            self.emitir(f"{TIPOS_C[tipo_retorno]} rascal_ret = 0;")
+        yield no.corpo
+        if tipo_retorno is not None:
+            self.emitir("return rascal_ret;")
+        self.fechar_funcao(posicao)
+
+        self.locais = None
+        self.rotina_atual = None
+
+    def visitar_decl_proc(self, no):
+        yield from self._visitar_subrotina(no, None)
+
+    def visitar_decl_func(self, no):
+        yield from self._visitar_subrotina(no, no.retorno)
+
+    # --- COMANDOS ---
+    def visitar_seq_comandos(self, no):
+        while no:
+            if no.primeiro:
+                yield no.primeiro
+            no = no.resto
+
+    def visitar_cmd_atrib(self, no):
+        exp, _ = yield no.exp
+        alvo, _ = self.resolver(no.nome)
+        self.emitir(f"{alvo} = {exp};")
+
+    def visitar_cmd_condicional(self, no):
+        condicao, _ = yield no.condicao
+        self.emitir(f"if ({condicao}) {{")
+        self.indentacao += 1
+        yield no.corpo
+        self.indentacao -= 1
+        if no.senao is not None:
+            self.emitir("} else {")
+            self.indentacao += 1
+            yield no.senao
+            self.indentacao -= 1
+        self.emitir("}")
+
+    def visitar_cmd_repeticao(self, no):
+        condicao, _ = yield no.condicao
+        self.emitir(f"while ({condicao}) {{")
+        self.indentacao += 1
+        yield no.corpo
+        self.indentacao -= 1
+        self.emitir("}")
+
+    def _argumentos(self, args):
+        textos = []
+        for arg in args:
+            texto, _ = yield arg
+            textos.append(texto)
+        return textos
+
+    def visitar_chamada_proc(self, no):
+        textos = yield from self._argumentos(no.args)
+        self.emitir(self.chamada(no.nome, no.args, textos) + ";")
+
+    def visitar_cmd_leitura(self, no):
+        for nome in no.vars:
+            alvo, tipo = self.resolver(nome)
+            leitura = 'rascal_le_logico' if tipo == 'boolean' else 'rascal_le_inteiro'
+            self.emitir(f"{alvo} = {leitura}();")
+
+    def visitar_cmd_escrita(self, no):
+        # Todos os valores são calculados antes de escrever, para que um erro
+        # de execução no meio da lista não deixe uma linha pela metade
+        valores = []
+        for exp in no.expressoes:
+            valores.append((yield exp))
+        self.emitir("{")
+        self.indentacao += 1
+        for i, (texto, tipo) in enumerate(valores):
+            self.emitir(f"{TIPOS_C[tipo]} rascal_v{i} = {texto};")
+        for i, (_, tipo) in enumerate(valores):
+            if i:
+                self.emitir("putchar(' ');")
+            escrita = 'rascal_escreve_logico' if tipo == 'boolean' else 'rascal_escreve_inteiro'
+            self.emitir(f"{escrita}(rascal_v{i});")
+        self.emitir("putchar('\\n');")
+        self.indentacao -= 1
+        self.emitir("}")
+
+    # --- EXPRESSÕES (devolvem (texto C, tipo)) ---
+    def visitar_exp_binaria(self, no):
+        esq, _ = yield no.esq
+        dir, _ = yield no.dir
+        guarda = ''
+        if no.op not in ('and', 'or') and tem_chamada(no.dir):
+            t = self.novo_temporario()
+            guarda = f"{t} = {esq}, "
+            esq = t
+        if no.op == 'div':
+            texto = f"rascal_div({esq}, {dir})"
+        else:
+            texto = f"{esq} {OPERADORES_C[no.op]} {dir}"
+        return f"({guarda}{texto})", TIPOS_OPERADORES[no.op]
+
+    def visitar_exp_unaria(self, no):
+        exp, _ = yield no.exp
+        if no.op == 'not':
+            return f"(!{exp})", 'boolean'
+        return f"(-{exp})", 'integer'
+
+    def visitar_exp_num(self, no):
+        return f"{no.valor}LL", 'integer'
+
+    def visitar_logico(self, no):
+        return ('1' if no.valor == 'true' else '0'), 'boolean'
+
+    def visitar_exp_var(self, no):
+        return self.resolver(no.nome)
+
+    def visitar_chamada_func(self, no):
+        textos = yield from self._argumentos(no.args)
+        return self.chamada(no.nome, no.args, textos), self.rotinas[no.nome]
+
+
+def gerar_c(ast):
+    return GeradorC().gerar(ast)
+
+
+def compilar_executavel(codigo_c, executavel, cc=None, opcoes=('-O2',)):
+    """Compila o texto C com o compilador do sistema; levanta ErroCompiladorC se falhar."""
+    cc = cc or os.environ.get('CC', 'cc')
+    with tempfile.TemporaryDirectory() as diretorio:
+        fonte = os.path.join(diretorio, 'programa.c')
+        with open(fonte, 'w') as f:
+            f.write(codigo_c)
+        try:
+            processo = subprocess.run([cc, *opcoes, '-o', executavel, fonte],
+                                      capture_output=True, text=True)
+        except OSError as e:
+            raise ErroCompiladorC(f"Não foi possível executar '{cc}': {e}") from None
+    if processo.returncode != 0:
+        raise ErroCompiladorC(processo.stderr.strip())
+    return executavel
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    if not argumentos:
+        print("Como usar: python codigo_c.py programa.ras [-O] [-o executavel] [--c arquivo.c] [--executar]")
+        sys.exit(1)
+
+    def opcao(nome):
+        if nome in argumentos:
+            return argumentos[argumentos.index(nome) + 1]
+        return None
+
+    from compilador import SessaoCompilador, ErroSintatico
+
+    caminho = argumentos[0]
+    try:
+        resultado = SessaoCompilador().compilar_arquivo(caminho, otimizar='-O' in argumentos)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{caminho}' não encontrado.")
+        sys.exit(1)
+    except ErroSintatico as e:
+        print(e)
+        sys.exit(1)
+    if resultado.erros:
+        for e in resultado.erros:
+            print(e)
+        sys.exit(1)
+
+    codigo = gerar_c(resultado.ast)
+    if opcao('--c'):
+        with open(opcao('--c'), 'w') as f:
+            f.write(codigo)
+        sys.exit(0)
+
+    executavel = os.path.abspath(opcao('-o') or os.path.splitext(caminho)[0])
+    try:
+        compilar_executavel(codigo, executavel)
+    except ErroCompiladorC as e:
+        print(f"Erro ao compilar o código C:\n{e}")
+        sys.exit(1)
+    if '--executar' in argumentos:
+        sys.exit(subprocess.run([executavel]).returncode)
+    print(f"Executável gerado em '{executavel}'.")
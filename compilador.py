@@ -0,0 +1,234 @@
+# PIPELINE DO COMPILADOR RASCAL
+#
+# Executa em memória as fases léxica/sintática (yacc.py) e semântica
+# (semantico.py), sem passar pelo ast.json. O JSON só é gravado quando pedido.
+#
+# Cada SessaoCompilador tem o seu próprio lexer e parser, então sessões
+# diferentes podem compilar ao mesmo tempo em threads distintas. Erros de
+# sintaxe são levantados como ErroSintatico, nunca encerram o processo. O
+# parser se recupera de cada erro, então um único ErroSintatico traz todos os
+# erros de sintaxe do programa.
+#
+# Os erros das três fases também ficam em Resultado.diagnosticos como
+# diagnosticos.Diagnostico (fase, mensagem, linha e coluna); verificar()
+# devolve essa lista mesmo quando há erro de sintaxe. Resultado.linhas é a
+# TabelaLinhas do programa, para localizar a posição de qualquer nó da AST.
+
+import time
+
+from diagnosticos import LEXICO
+from fonte import tokens_arquivo, TAMANHO_BLOCO
+from yacc import novos_analisadores, analisar, ErroSintatico
+from semantico import AnalisadorSemantico, AnalisadorSemanticoCompartilhado
+
+
+class Resultado:
+    def __init__(self):
+        self.ast = None
+        self.erros = []
+        self.tempos = {}  # fase -> segundos
+        self.diagnosticos = []  # Diagnostico léxicos, sintáticos e semânticos, nessa ordem
+        self.nos_removidos = 0  # pelo otimizador, quando pedido
+        self.linhas = None  # diagnosticos.TabelaLinhas do código compilado
+
+    @property
+    def sucesso(self):
+        return self.ast is not None and not self.erros
+
+    def salvar_json(self, caminho):
+        """Grava a AST no ast.json (ver arvore_binaria.salvar_json)."""
+        from arvore_binaria import salvar_json
+
+        inicio = time.perf_counter()
+        salvar_json(self.ast, caminho)
+        self.tempos['json'] = time.perf_counter() - inicio
+
+    def salvar_binario(self, caminho):
+        """Grava a AST no formato binário do arvore_binaria.py."""
+        from arvore_binaria import salvar_binario
+
+        inicio = time.perf_counter()
+        salvar_binario(self.ast, caminho)
+        self.tempos['binario'] = time.perf_counter() - inicio
+
+
+class SessaoCompilador:
+    """
+    Lexer e parser próprios para compilar vários programas em sequência.
+
+    Uma sessão não deve ser usada por duas threads ao mesmo tempo; para
+    compilar em paralelo, use uma sessão por thread. Com lexer_dfa=True, a
+    sessão usa o lexer por tabela do lexer_dfa.py no lugar do lexer do PLY.
+    Com compartilhar=True, expressões puras iguais de um corpo são um só nó
+    da AST (ver yacc.analisar) e a análise semântica verifica cada uma uma vez.
+    Por isso um erro numa expressão repetida só é reportado na primeira
+    ocorrência: em 'x := a + true; y := a + true', em linhas seguidas, o
+    modo compartilhado dá um erro na linha do x e nenhum na do y, enquanto
+    o modo normal dá um em cada linha.
+    """
+    def __init__(self, lexer_dfa=False, compartilhar=False):
+        self.lexer, self.parser = novos_analisadores(lexer_dfa)
+        self.compartilhar = compartilhar
+
+    def analisar_sintaxe(self, codigo):
+        """Análise léxica e sintática; devolve a AST ou levanta ErroSintatico."""
+        return analisar(self.parser, self.lexer, codigo, compartilhar=self.compartilhar)
+
+    def analisar_arquivo(self, caminho, tamanho_bloco=TAMANHO_BLOCO):
+        """Como analisar_sintaxe, mas lendo o arquivo mapeado em memória, em blocos."""
+        tokens = tokens_arquivo(self.lexer, caminho, tamanho_bloco)
+        return analisar(self.parser, self.lexer, tokenfunc=lambda: next(tokens, None),
+                        compartilhar=self.compartilhar)
+
+    def novo_analisador_semantico(self):
+        return AnalisadorSemanticoCompartilhado() if self.compartilhar else AnalisadorSemantico()
+
+    def compilar(self, codigo, semantica=True, saida_json=None, otimizar=False):
+        """
+        Compila o texto de um programa Rascal em memória.
+
+        Com semantica=False para depois da análise sintática. Com otimizar=True,
+        um programa sem erros semânticos passa pelo otimizador.py. Se saida_json
+        for informado e a AST tiver sido construída, ela também é gravada nesse arquivo.
+        """
+        return self._compilar(lambda: self.analisar_sintaxe(codigo), semantica, saida_json, otimizar)
+
+    def compilar_arquivo(self, caminho, semantica=True, saida_json=None, otimizar=False):
+        """Como compilar, lendo o programa direto do arquivo com analisar_arquivo."""
+        return self._compilar(lambda: self.analisar_arquivo(caminho), semantica, saida_json, otimizar)
+
+    def verificar(self, codigo=None, caminho=None, otimizar=False):
+        """
+        Compila 'codigo' (ou o arquivo em 'caminho') sem levantar ErroSintatico:
+        os diagnósticos de todas as fases ficam em resultado.diagnosticos. Com
+        erro de sintaxe, resultado.ast é None e a análise semântica não é feita.
+        """
+        try:
+            if caminho is not None:
+                return self.compilar_arquivo(caminho, otimizar=otimizar)
+            return self.compilar(codigo, otimizar=otimizar)
+        except ErroSintatico as e:
+            resultado = Resultado()
+            resultado.diagnosticos = e.diagnosticos
+            resultado.linhas = self.lexer.linhas
+            return resultado
+
+    def estatisticas(self, codigo=None, caminho=None, memoria=True, diretorio_perfil=None, saida_json=None):
+        """Compila medindo cada fase com esta sessão; ver estatisticas.estatisticas_compilacao."""
+        from estatisticas import estatisticas_compilacao
+
+        return estatisticas_compilacao(codigo, caminho, memoria, diretorio_perfil, saida_json, sessao=self)
+
+    def _compilar(self, analisar, semantica, saida_json, otimizar=False):
+        resultado = Resultado()
+
+        inicio = time.perf_counter()
+        resultado.ast = analisar()
+        resultado.tempos['sintatico'] = time.perf_counter() - inicio
+        resultado.diagnosticos = list(self.lexer.diagnosticos)
+        resultado.linhas = self.lexer.linhas
+
+        if resultado.ast is None:
+            return resultado
+
+        if semantica:
+            inicio = time.perf_counter()
+            analisador = self.novo_analisador_semantico()
+            analisador.visitar(resultado.ast)
+            resultado.erros.extend(analisador.erros)
+            resultado.diagnosticos.extend(d.localizar(resultado.linhas) for d in analisador.diagnosticos)
+            resultado.tempos['semantico'] = time.perf_counter() - inicio
+
+            if otimizar and not resultado.erros:
+                from otimizador import Otimizador
+
+                inicio = time.perf_counter()
+                resultado.ast, resultado.nos_removidos = Otimizador().otimizar(resultado.ast)
+                resultado.tempos['otimizacao'] = time.perf_counter() - inicio
+
+        if saida_json:
+            resultado.salvar_json(saida_json)
+        return resultado
+
+
+def diagnosticos_arquivo(sessao, caminho, cache=None):
+    """
+    Compila um arquivo e devolve um registro (dicionário) com diagnósticos e tempos.
+
+    Com um cache.CacheCompilacao, um arquivo cujo conteúdo já foi compilado
+    pela mesma versão do compilador não passa por nenhuma fase; o registro
+    indica em 'cache' se houve acerto ou falta.
+    """
+    registro = {'arquivo': caminho, 'status': 'ok', 'erros': [], 'lexico': [], 'diagnosticos': [], 'tempos': {}}
+    inicio = time.perf_counter()
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            codigo = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        registro.update(status='erro_leitura', erros=[str(e)])
+        return registro
+    registro['tempos']['leitura'] = time.perf_counter() - inicio
+
+    if cache is not None:
+        inicio = time.perf_counter()
+        entrada = cache.obter(codigo)
+        if entrada is not None:
+            registro.update(entrada['diagnosticos'])
+            registro['tempos']['cache'] = time.perf_counter() - inicio
+            registro['cache'] = 'acerto'
+            return registro
+        registro['cache'] = 'falta'
+
+    # Os erros léxicos vêm dos diagnósticos; o lexer não deve imprimi-los
+    sessao.lexer.ecoar_erros = False
+    try:
+        resultado = sessao.compilar(codigo)
+        diagnosticos = resultado.diagnosticos
+    except ErroSintatico as e:
+        resultado = None
+        diagnosticos = e.diagnosticos
+        registro.update(status='erro_sintatico', erros=str(e).split('\n'))
+    finally:
+        sessao.lexer.ecoar_erros = True
+    registro['lexico'] = [d.mensagem for d in diagnosticos if d.fase == LEXICO]
+    registro['diagnosticos'] = [d.to_dict() for d in diagnosticos]
+
+    if resultado is not None:
+        registro['tempos'].update(resultado.tempos)
+        registro['erros'] = resultado.erros
+        if resultado.erros:
+            registro['status'] = 'erro_semantico'
+
+    if cache is not None:
+        diagnosticos = {chave: registro[chave] for chave in ('status', 'erros', 'lexico', 'diagnosticos')}
+        cache.guardar(codigo, diagnosticos)
+    return registro
+
+
+# Sessão (e cache, se houver) de cada processo do compile-batch,
+# criados uma vez em iniciar_processo()
+_sessao_processo = None
+_cache_processo = None
+
+def iniciar_processo(diretorio_cache=None, tamanho_maximo_cache=None):
+    global _sessao_processo, _cache_processo
+    _sessao_processo = SessaoCompilador()
+    if diretorio_cache is not None:
+        from cache import CacheCompilacao
+        _cache_processo = CacheCompilacao(diretorio_cache, tamanho_maximo_cache)
+
+def compilar_arquivo(caminho):
+    """Tarefa executada nos processos do compile-batch."""
+    if _sessao_processo is None:
+        iniciar_processo()
+    return diagnosticos_arquivo(_sessao_processo, caminho, _cache_processo)
+
+
+def analisar_sintaxe(codigo):
+    """Atalho para SessaoCompilador().analisar_sintaxe(codigo)."""
+    return SessaoCompilador().analisar_sintaxe(codigo)
+
+
+def compilar_fonte(codigo, semantica=True, saida_json=None, lexer_dfa=False):
+    """Atalho para SessaoCompilador().compilar(...), com uma sessão nova a cada chamada."""
+    return SessaoCompilador(lexer_dfa).compilar(codigo, semantica, saida_json)
@@ -0,0 +1,88 @@
+# COMPILAÇÃO EM LOTE
+#
+# Como usar: python compile-batch.py [opções] arquivos_ou_padrões...
+#   ex.: python compile-batch.py -j 8 'tests/*.ras' tests2
+#
+# Os arquivos são distribuídos entre processos; cada processo carrega o parser
+# uma única vez e compila vários arquivos. Para cada arquivo é emitida uma linha
+# JSON com o status, os diagnósticos e os tempos de cada fase.
+#
+# Por padrão os resultados ficam num cache em disco (.rascal-cache), indexado
+# pelo conteúdo de cada arquivo: arquivos que não mudaram desde a última
+# execução não são recompilados. Use --no-cache para ignorar o cache.
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compilador import iniciar_processo, compilar_arquivo
+
+
+def expandir_entradas(entradas):
+    """Expande padrões glob e diretórios (recursivamente, arquivos .ras) na lista de arquivos."""
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(sorted(glob.glob(os.path.join(entrada, '**', '*.ras'), recursive=True)))
+        elif glob.has_magic(entrada):
+            arquivos.extend(sorted(glob.glob(entrada, recursive=True)))
+        else:
+            arquivos.append(entrada)
+    return arquivos
+
+
+def compilar_lote(arquivos, processos=None, chunk=8, diretorio_cache=None, tamanho_maximo_cache=None):
+    """Gera os registros de diagnóstico na ordem dos arquivos."""
+    config_cache = (diretorio_cache, tamanho_maximo_cache)
+    if processos == 1:
+        iniciar_processo(*config_cache)
+        yield from map(compilar_arquivo, arquivos)
+        return
+    with ProcessPoolExecutor(max_workers=processos, initializer=iniciar_processo,
+                             initargs=config_cache) as executor:
+        yield from executor.map(compilar_arquivo, arquivos, chunksize=chunk)
+
+
+if __name__ == '__main__':
+    argp = argparse.ArgumentParser(description="Compila vários arquivos Rascal em paralelo (saída em JSON lines)")
+    argp.add_argument('entradas', nargs='+', help="arquivos, diretórios ou padrões glob")
+    argp.add_argument('-j', '--processos', type=int, default=os.cpu_count(), help="número de processos")
+    argp.add_argument('--chunk', type=int, default=8, help="arquivos enviados por vez a cada processo")
+    argp.add_argument('-o', '--saida', help="arquivo de saída (padrão: stdout)")
+    argp.add_argument('--no-cache', action='store_true', help="não lê nem grava o cache de compilação")
+    argp.add_argument('--cache-dir', default='.rascal-cache', help="diretório do cache")
+    argp.add_argument('--cache-max-mb', type=float, default=256, help="tamanho máximo do cache (MB)")
+    args = argp.parse_args()
+
+    diretorio_cache = None if args.no_cache else args.cache_dir
+    tamanho_maximo_cache = int(args.cache_max_mb * 1024 * 1024)
+
+    arquivos = expandir_entradas(args.entradas)
+    saida = open(args.saida, 'w') if args.saida else sys.stdout
+    contagem = {}
+    uso_cache = {'acerto': 0, 'falta': 0}
+    inicio = time.perf_counter()
+    try:
+        for registro in compilar_lote(arquivos, args.processos, args.chunk,
+                                      diretorio_cache, tamanho_maximo_cache):
+            contagem[registro['status']] = contagem.get(registro['status'], 0) + 1
+            if 'cache' in registro:
+                uso_cache[registro['cache']] += 1
+            saida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            saida.flush()
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    decorrido = time.perf_counter() - inicio
+    resumo = ', '.join(f"{status}: {n}" for status, n in sorted(contagem.items()))
+    print(f"{len(arquivos)} arquivo(s) em {decorrido:.2f} s com {args.processos} processo(s) ({resumo})",
+          file=sys.stderr)
+    if diretorio_cache is not None:
+        print(f"cache: {uso_cache['acerto']} acerto(s), {uso_cache['falta']} falta(s)", file=sys.stderr)
+    if any(status != 'ok' for status in contagem):
+        sys.exit(1)
@@ -0,0 +1,71 @@
+# DIAGNÓSTICOS ESTRUTURADOS
+#
+# Erros léxicos, sintáticos e semânticos registrados como Diagnostico, com a
+# fase, a mensagem (o mesmo texto que os programas imprimem) e a posição no
+# código-fonte. A posição é o deslocamento em caracteres desde o início do
+# arquivo, o mesmo guardado nos nós da AST; linha e coluna (a partir de 1)
+# são obtidas da TabelaLinhas do programa e ficam None quando a posição não
+# é conhecida (fim do arquivo, nós criados sem posição, AST lida de JSON).
+
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, count
+from operator import add
+
+LEXICO = 'lexico'
+SINTATICO = 'sintatico'
+SEMANTICO = 'semantico'
+
+
+class TabelaLinhas:
+    """
+    Posição de início de cada linha do código-fonte, num único array.
+
+    Linha e coluna de uma posição são calculadas sob demanda por busca
+    binária, então os nós da AST só precisam guardar a posição.
+    """
+    __slots__ = ('inicios',)
+
+    def __init__(self, texto=''):
+        self.inicios = array('q', [0])
+        if texto:
+            self.adicionar(texto)
+
+    def adicionar(self, texto, deslocamento=0):
+        """Registra as quebras de linha de um trecho que começa na posição 'deslocamento'."""
+        partes = texto.split('\n')
+        partes.pop()  # o que vem depois da última quebra não começa linha neste trecho
+        # Início da linha seguinte à parte i: tamanho acumulado até i + (i + 1) quebras
+        self.inicios.extend(map(add, accumulate(map(len, partes)), count(deslocamento + 1)))
+
+    def linha_coluna(self, posicao):
+        """(linha, coluna), a partir de 1, da posição 'posicao'."""
+        linha = bisect_right(self.inicios, posicao)
+        return linha, posicao - self.inicios[linha - 1] + 1
+
+
+class Diagnostico:
+    __slots__ = ('fase', 'mensagem', 'posicao', 'linha', 'coluna')
+
+    def __init__(self, fase, mensagem, posicao=None, linhas=None):
+        self.fase = fase
+        self.mensagem = mensagem
+        self.posicao = posicao
+        self.linha = self.coluna = None
+        if linhas is not None:
+            self.localizar(linhas)
+
+    def localizar(self, linhas):
+        """Preenche linha e coluna a partir da posição, com a TabelaLinhas do programa."""
+        if self.posicao is not None:
+            self.linha, self.coluna = linhas.linha_coluna(self.posicao)
+        return self
+
+    def __str__(self):
+        return self.mensagem
+
+    def __repr__(self):
+        return f"Diagnostico({self.fase!r}, {self.mensagem!r}, linha={self.linha!r}, coluna={self.coluna!r})"
+
+    def to_dict(self):
+        return {'fase': self.fase, 'mensagem': self.mensagem, 'linha': self.linha, 'coluna': self.coluna}
@@ -0,0 +1,187 @@
+# ESTATÍSTICAS E PERFIL DAS FASES DE COMPILAÇÃO
+#
+# Como usar: python estatisticas.py programa.ras [--profile diretório] [--sem-memoria]
+#            (ou python semantico.py programa.ras --stats [--profile diretório])
+#
+# Compila o programa fase a fase e imprime um JSON com, para cada fase, o
+# tempo de parede e a memória alocada (tracemalloc), além do número de tokens,
+# do número de nós por tipo, da profundidade máxima da AST e da maior
+# profundidade de escopos da tabela de símbolos.
+#
+# As fases são medidas separadamente: 'lexico' produz a lista completa de
+# tokens e 'sintatico' roda o parser LALR sobre essa lista (a construção da
+# AST acontece nas ações das regras, dentro dessa fase). Depois vêm
+# 'semantico' e 'json' (serialização da AST). Com --profile, cada fase roda
+# sob o cProfile e os dados ficam em <diretório>/<fase>.prof (ver pstats).
+#
+# O tracemalloc deixa tudo mais lento; os tempos só são comparáveis entre
+# execuções com a mesma opção de memória.
+
+import cProfile
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from arvore import iterar_nos
+from arvore_binaria import escrever_json, salvar_json
+from diagnosticos import TabelaLinhas
+from fonte import tokens_arquivo
+from semantico import AnalisadorSemantico
+from yacc import novos_analisadores, analisar, ErroSintatico
+
+
+class MedidorFases:
+    """Mede tempo, memória e (opcionalmente) o perfil de cada fase executada por medir()."""
+    def __init__(self, memoria=True, diretorio_perfil=None):
+        self.memoria = memoria
+        self.diretorio_perfil = diretorio_perfil
+        self.fases = {}  # fase -> {'tempo': s, 'memoria_alocada': bytes, ...}
+
+    def medir(self, fase, funcao, *args):
+        """Executa funcao(*args) como a fase indicada e devolve o resultado."""
+        perfil = cProfile.Profile() if self.diretorio_perfil else None
+        # Se o tracemalloc já estava ativo (iniciado por quem chamou), não é desligado no fim
+        ja_ativo = tracemalloc.is_tracing()
+        if self.memoria:
+            if not ja_ativo:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            memoria_antes, _ = tracemalloc.get_traced_memory()
+
+        inicio = time.perf_counter()
+        try:
+            if perfil is not None:
+                return perfil.runcall(funcao, *args)
+            return funcao(*args)
+        finally:
+            registro = {'tempo': time.perf_counter() - inicio}
+            if self.memoria:
+                memoria_depois, pico = tracemalloc.get_traced_memory()
+                if not ja_ativo:
+                    tracemalloc.stop()
+                # Alocada: o pico durante a fase; retida: o que continua vivo depois dela
+                registro['memoria_alocada'] = pico - memoria_antes
+                registro['memoria_retida'] = memoria_depois - memoria_antes
+            if perfil is not None:
+                os.makedirs(self.diretorio_perfil, exist_ok=True)
+                caminho = os.path.join(self.diretorio_perfil, f'{fase}.prof')
+                perfil.dump_stats(caminho)
+                registro['perfil'] = caminho
+            self.fases[fase] = registro
+
+
+def profundidade_ast(raiz):
+    """Profundidade máxima da AST (a raiz tem profundidade 1), sem recursão."""
+    maxima = 0
+    pilha = [(raiz, 1)]
+    while pilha:
+        no, profundidade = pilha.pop()
+        maxima = max(maxima, profundidade)
+        pilha.extend((filho, profundidade + 1) for filho in no.filhos())
+    return maxima
+
+
+def estatisticas_compilacao(codigo=None, caminho=None, memoria=True, diretorio_perfil=None,
+                            saida_json=None, sessao=None):
+    """
+    Compila 'codigo' (ou o arquivo em 'caminho', lido em blocos como no
+    compilar_arquivo) medindo cada fase e devolve um dicionário pronto para
+    json.dump. Erros de sintaxe não são levantados: ficam em 'status'/'erros'.
+
+    Com saida_json, a fase 'json' grava a AST nesse arquivo; senão ela só é
+    serializada em memória. 'sessao' permite reaproveitar o lexer e o parser
+    de uma compilador.SessaoCompilador.
+    """
+    if sessao is not None:
+        lexer, parser = sessao.lexer, sessao.parser
+    else:
+        lexer, parser = novos_analisadores()
+    medidor = MedidorFases(memoria, diretorio_perfil)
+    stats = {'status': 'ok', 'erros': [], 'fases': medidor.fases}
+
+    def analisar_lexico():
+        lexer.lineno = 1
+        lexer.diagnosticos = []
+        if caminho is not None:
+            return list(tokens_arquivo(lexer, caminho))
+        lexer.deslocamento = 0
+        lexer.linhas = TabelaLinhas(codigo)
+        lexer.input(codigo)
+        return list(iter(lexer.token, None))
+
+    def analisar_sintaxe(tokens):
+        proximo = iter(tokens)
+        return analisar(parser, lexer, tokenfunc=lambda: next(proximo, None),
+                        compartilhar=sessao is not None and sessao.compartilhar)
+
+    # Os erros léxicos vão para os diagnósticos, sem serem impressos no meio do JSON
+    ecoar_erros, lexer.ecoar_erros = lexer.ecoar_erros, False
+    try:
+        tokens = medidor.medir('lexico', analisar_lexico)
+    finally:
+        lexer.ecoar_erros = ecoar_erros
+    lexicos = lexer.diagnosticos
+    stats['lexico'] = [d.mensagem for d in lexicos]
+    stats['tokens'] = {'total': len(tokens), 'por_tipo': dict(Counter(tok.type for tok in tokens))}
+
+    try:
+        ast = medidor.medir('sintatico', analisar_sintaxe, tokens)
+    except ErroSintatico as e:
+        stats.update(status='erro_sintatico', erros=str(e).split('\n'))
+        stats['diagnosticos'] = [d.to_dict() for d in lexicos + e.diagnosticos]
+        return stats
+
+    analisador = sessao.novo_analisador_semantico() if sessao is not None else AnalisadorSemantico()
+    medidor.medir('semantico', analisador.visitar, ast)
+    stats['erros'] = analisador.erros
+    semanticos = [d.localizar(lexer.linhas) for d in analisador.diagnosticos]
+    stats['diagnosticos'] = [d.to_dict() for d in lexicos + semanticos]
+    if analisador.erros:
+        stats['status'] = 'erro_semantico'
+
+    def serializar():
+        if saida_json:
+            salvar_json(ast, saida_json)
+        else:
+            escrever_json(ast.to_dict(), io.StringIO())
+
+    medidor.medir('json', serializar)
+
+    tipos = Counter(no.tipo for no in iterar_nos(ast))
+    stats['nos'] = {'total': sum(tipos.values()), 'por_tipo': dict(tipos)}
+    stats['profundidade_ast'] = profundidade_ast(ast)
+    stats['profundidade_escopos'] = analisador.tabela.profundidade_maxima
+    return stats
+
+
+def imprimir_estatisticas(stats, arquivo=None):
+    json.dump(stats, arquivo if arquivo is not None else sys.stdout, indent=2, ensure_ascii=False)
+    print(file=arquivo)
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    diretorio_perfil = None
+    if '--profile' in argumentos:
+        posicao = argumentos.index('--profile')
+        diretorio_perfil = argumentos[posicao + 1]
+        del argumentos[posicao:posicao + 2]
+    memoria = '--sem-memoria' not in argumentos
+    argumentos = [a for a in argumentos if a != '--sem-memoria']
+    if not argumentos:
+        print("Como usar: python estatisticas.py programa.ras [--profile diretório] [--sem-memoria]")
+        sys.exit(1)
+
+    try:
+        stats = estatisticas_compilacao(caminho=argumentos[0], memoria=memoria,
+                                        diretorio_perfil=diretorio_perfil)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{argumentos[0]}' não encontrado.")
+        sys.exit(1)
+    stats['arquivo'] = argumentos[0]
+    imprimir_estatisticas(stats)
+    sys.exit(0 if stats['status'] == 'ok' else 1)
@@ -0,0 +1,501 @@
+# GRAFO DE FLUXO DE CONTROLE E ANÁLISE DE FLUXO DE DADOS
+#
+# Como usar: python fluxo.py programa.ras [--eliminar]
+#
+# Depois da análise semântica (que anota os endereços das variáveis), o corpo
+# do programa principal e o de cada sub-rotina viram um grafo de blocos
+# básicos. Sobre ele, um resolvedor com lista de trabalho calcula problemas
+# de fluxo de dados do tipo gen/kill, com os conjuntos codificados como bits
+# de um int do Python:
+#   - definições que alcançam: avisos de variável usada antes de receber valor;
+#   - variáveis vivas: atribuições mortas (e a sua eliminação com --eliminar).
+# Também aponta variáveis declaradas e nunca lidas.
+#
+# Numeração das variáveis de um grafo: a global de slot s é o bit s e a local
+# de slot s (parâmetros, variáveis e retorno de função) é o bit n_globais + s.
+# Uma chamada lê as globais que a sub-rotina (ou as que ela chama) lê e conta
+# como atribuição das globais que ela atribui.
+
+import sys
+from collections import deque
+
+from arvore import SeqComandos, iterar_nos
+from visitante import Visitante
+
+
+def bits(conjunto):
+    """Índices dos bits ligados, do menor para o maior."""
+    while conjunto:
+        menor = conjunto & -conjunto
+        yield menor.bit_length() - 1
+        conjunto ^= menor
+
+
+class Instrucao:
+    """Comando simples (ou condição de if/while) com as variáveis que usa e define."""
+    __slots__ = ('no', 'usos', 'defs', 'defs_chamada')
+
+    def __init__(self, no, usos=0, defs=0, defs_chamada=0):
+        self.no = no
+        self.usos = usos
+        self.defs = defs                  # atribuídas com certeza
+        self.defs_chamada = defs_chamada  # globais atribuídas por sub-rotinas chamadas
+
+
+class BlocoBasico:
+    __slots__ = ('indice', 'instrucoes', 'sucessores', 'predecessores')
+
+    def __init__(self, indice):
+        self.indice = indice
+        self.instrucoes = []
+        self.sucessores = []
+        self.predecessores = []
+
+
+class GrafoFluxo:
+    """Blocos básicos do corpo de uma rotina; blocos[0] é a entrada."""
+    def __init__(self, nome, n_globais, n_locais=0):
+        self.nome = nome
+        self.n_globais = n_globais
+        self.n_variaveis = n_globais + n_locais
+        self.blocos = []
+        self.saida = None
+        self.nomes = {}       # bit da variável -> nome
+        self.declaradas = 0   # variáveis locais declaradas com 'var' (bits)
+        self.parametros = 0
+        self.retorno = 0      # bit do valor de retorno, nas funções
+
+    def novo_bloco(self):
+        bloco = BlocoBasico(len(self.blocos))
+        self.blocos.append(bloco)
+        return bloco
+
+    def ligar(self, origem, destino):
+        origem.sucessores.append(destino)
+        destino.predecessores.append(origem)
+
+    def bit(self, endereco):
+        nivel, slot = endereco
+        return 1 << (slot if nivel == 0 else self.n_globais + slot)
+
+    def instrucoes(self):
+        for bloco in self.blocos:
+            yield from bloco.instrucoes
+
+
+def resolver(grafo, gen, kill, direcao, fronteira):
+    """
+    Resolve um problema gen/kill de união (may) com lista de trabalho.
+
+    gen e kill são listas de bitsets indexadas pelo bloco. Para a frente,
+    'fronteira' é o valor na entrada do grafo; para trás, na saída. Devolve
+    (entrada, saida): o valor no início e no fim de cada bloco.
+    """
+    n = len(grafo.blocos)
+    entrada = [0] * n
+    saida = [0] * n
+    para_frente = direcao == 'frente'
+    if para_frente:
+        inicio, fim, vizinhos_antes, vizinhos_depois = entrada, saida, 'predecessores', 'sucessores'
+        borda = grafo.blocos[0]
+        ordem = range(n)
+    else:
+        inicio, fim, vizinhos_antes, vizinhos_depois = saida, entrada, 'sucessores', 'predecessores'
+        borda = grafo.saida
+        ordem = range(n - 1, -1, -1)
+
+    pendentes = deque(ordem)
+    na_fila = [True] * n
+    blocos = grafo.blocos
+    while pendentes:
+        i = pendentes.popleft()
+        na_fila[i] = False
+        bloco = blocos[i]
+
+        valor = fronteira if bloco is borda else 0
+        for vizinho in getattr(bloco, vizinhos_antes):
+            valor |= fim[vizinho.indice]
+        inicio[i] = valor
+
+        novo = gen[i] | (valor & ~kill[i])
+        if novo != fim[i]:
+            fim[i] = novo
+            for vizinho in getattr(bloco, vizinhos_depois):
+                if not na_fila[vizinho.indice]:
+                    na_fila[vizinho.indice] = True
+                    pendentes.append(vizinho.indice)
+    return entrada, saida
+
+
+class ConstrutorCFG(Visitante):
+    """Monta o GrafoFluxo do corpo de uma rotina a partir da AST anotada."""
+    def __init__(self, grafo, efeitos_rotinas):
+        super().__init__()
+        self.grafo = grafo
+        self.efeitos_rotinas = efeitos_rotinas  # índice da sub-rotina -> (lidas, atribuídas)
+        self.atual = grafo.novo_bloco()
+
+    def construir(self, comandos):
+        self.visitar(comandos)
+        self.grafo.saida = self.grafo.novo_bloco()
+        self.grafo.ligar(self.atual, self.grafo.saida)
+        return self.grafo
+
+    def usos_expressao(self, exp):
+        """(variáveis lidas, globais atribuídas por chamadas) de uma expressão."""
+        usos = definidas = 0
+        for no in iterar_nos(exp):
+            if no.tipo == 'exp_var' and no.endereco is not None:
+                usos |= self.grafo.bit(no.endereco)
+            elif no.tipo == 'chamada_func':
+                lidas, atribuidas = self.efeitos_rotinas[no.endereco[1]]
+                usos |= lidas
+                definidas |= atribuidas
+        return usos, definidas
+
+    def adicionar(self, instrucao):
+        self.atual.instrucoes.append(instrucao)
+
+    def visitar_seq_comandos(self, no):
+        while no:
+            if no.primeiro:
+                yield no.primeiro
+            no = no.resto
+
+    def visitar_cmd_atrib(self, no):
+        usos, chamadas = self.usos_expressao(no.exp)
+        self.adicionar(Instrucao(no, usos, self.grafo.bit(no.endereco), chamadas))
+
+    def visitar_chamada_proc(self, no):
+        usos = chamadas = 0
+        for arg in no.args:
+            u, c = self.usos_expressao(arg)
+            usos |= u
+            chamadas |= c
+        lidas, atribuidas = self.efeitos_rotinas[no.endereco[1]]
+        self.adicionar(Instrucao(no, usos | lidas, 0, chamadas | atribuidas))
+
+    def visitar_cmd_escrita(self, no):
+        usos = chamadas = 0
+        for exp in no.expressoes:
+            u, c = self.usos_expressao(exp)
+            usos |= u
+            chamadas |= c
+        self.adicionar(Instrucao(no, usos, 0, chamadas))
+
+    def visitar_cmd_leitura(self, no):
+        defs = 0
+        for endereco in no.enderecos:
+            defs |= self.grafo.bit(endereco)
+        self.adicionar(Instrucao(no, 0, defs))
+
+    def visitar_cmd_condicional(self, no):
+        grafo = self.grafo
+        usos, chamadas = self.usos_expressao(no.condicao)
+        self.adicionar(Instrucao(no.condicao, usos, 0, chamadas))
+        teste = self.atual
+
+        self.atual = grafo.novo_bloco()
+        grafo.ligar(teste, self.atual)
+        yield no.corpo
+        fim_entao = self.atual
+
+        fim_senao = teste
+        if no.senao is not None:
+            self.atual = grafo.novo_bloco()
+            grafo.ligar(teste, self.atual)
+            yield no.senao
+            fim_senao = self.atual
+
+        self.atual = grafo.novo_bloco()
+        grafo.ligar(fim_entao, self.atual)
+        grafo.ligar(fim_senao, self.atual)
+
+    def visitar_cmd_repeticao(self, no):
+        grafo = self.grafo
+        teste = grafo.novo_bloco()
+        grafo.ligar(self.atual, teste)
+        usos, chamadas = self.usos_expressao(no.condicao)
+        teste.instrucoes.append(Instrucao(no.condicao, usos, 0, chamadas))
+
+        self.atual = grafo.novo_bloco()
+        grafo.ligar(teste, self.atual)
+        yield no.corpo
+        grafo.ligar(self.atual, teste)
+
+        self.atual = grafo.novo_bloco()
+        grafo.ligar(teste, self.atual)
+
+
+def efeitos_globais(ast):
+    """
+    Para cada sub-rotina (pelo índice do seu endereço), as globais que ela
+    lê e atribui, incluindo as das sub-rotinas que ela chama.
+    """
+    diretos = {}
+    chamadas = {}
+    for sub in ast.corpo.subrotinas:
+        lidas = atribuidas = 0
+        chamadas_sub = set()
+        for no in iterar_nos(sub.corpo):
+            tipo = no.tipo
+            if tipo == 'exp_var' and no.endereco and no.endereco[0] == 0:
+                lidas |= 1 << no.endereco[1]
+            elif tipo == 'cmd_atrib' and no.endereco[0] == 0:
+                atribuidas |= 1 << no.endereco[1]
+            elif tipo == 'cmd_leitura':
+                for nivel, slot in no.enderecos:
+                    if nivel == 0:
+                        atribuidas |= 1 << slot
+            elif tipo in ('chamada_proc', 'chamada_func'):
+                chamadas_sub.add(no.endereco[1])
+        diretos[sub.endereco[1]] = (lidas, atribuidas)
+        chamadas[sub.endereco[1]] = chamadas_sub
+
+    efeitos = dict(diretos)
+    mudou = True
+    while mudou:
+        mudou = False
+        for indice, chamadas_sub in chamadas.items():
+            lidas, atribuidas = efeitos[indice]
+            for chamada in chamadas_sub:
+                l, a = efeitos[chamada]
+                lidas |= l
+                atribuidas |= a
+            if (lidas, atribuidas) != efeitos[indice]:
+                efeitos[indice] = (lidas, atribuidas)
+                mudou = True
+    return efeitos
+
+
+def construir_grafos(ast):
+    """GrafoFluxo do programa principal seguido dos das sub-rotinas, na ordem da declaração."""
+    n_globais = ast.tamanho_quadro
+    efeitos = efeitos_globais(ast)
+    nomes_globais = {1 << d.endereco[1]: d.nome for d in ast.corpo.vars if d.endereco}
+
+    principal = GrafoFluxo(None, n_globais)
+    principal.nomes.update(nomes_globais)
+    principal.declaradas = sum(nomes_globais)
+    grafos = [ConstrutorCFG(principal, efeitos).construir(ast.corpo.comandos)]
+
+    for sub in ast.corpo.subrotinas:
+        grafo = GrafoFluxo(sub.nome, n_globais, sub.tamanho_quadro)
+        grafo.nomes.update(nomes_globais)
+        for p in sub.params:
+            if p.endereco:
+                grafo.nomes[grafo.bit(p.endereco)] = p.nome
+                grafo.parametros |= grafo.bit(p.endereco)
+        for d in sub.corpo.vars:
+            if d.endereco:
+                grafo.nomes[grafo.bit(d.endereco)] = d.nome
+                grafo.declaradas |= grafo.bit(d.endereco)
+        if sub.tipo == 'decl_func':
+            grafo.retorno = grafo.bit((1, sub.slot_retorno))
+            grafo.nomes[grafo.retorno] = sub.nome
+        grafos.append(ConstrutorCFG(grafo, efeitos).construir(sub.corpo.comandos))
+    return grafos
+
+
+# --- PROBLEMAS DE FLUXO DE DADOS ---
+class DefinicoesAlcancam:
+    """
+    Definições que alcançam cada ponto do grafo.
+
+    As definições 0..V-1 são as de entrada de cada variável (valor inicial,
+    parâmetro ou global vinda de quem chamou); as seguintes são os pontos de
+    atribuição, na ordem dos blocos e das instruções, listados em 'sitios'
+    como pares (instrução, variável).
+    """
+    def __init__(self, grafo):
+        self.grafo = grafo
+        n_variaveis = grafo.n_variaveis
+        self.sitios = []
+        self.por_variavel = [1 << v for v in range(n_variaveis)]
+        for instrucao in grafo.instrucoes():
+            for v in bits(instrucao.defs | instrucao.defs_chamada):
+                self.por_variavel[v] |= 1 << (n_variaveis + len(self.sitios))
+                self.sitios.append((instrucao, v))
+
+        # Primeiro sítio de cada bloco
+        self.primeiro_sitio = []
+        sitio = n_variaveis
+        gen = []
+        kill = []
+        for bloco in grafo.blocos:
+            self.primeiro_sitio.append(sitio)
+            g = k = 0
+            for instrucao in bloco.instrucoes:
+                for v in bits(instrucao.defs | instrucao.defs_chamada):
+                    mata = self.mata(instrucao, v)
+                    g = (g & ~mata) | (1 << sitio)
+                    k |= mata
+                    sitio += 1
+            gen.append(g)
+            kill.append(k)
+
+        self.entrada, self.saida = resolver(grafo, gen, kill, 'frente', (1 << n_variaveis) - 1)
+
+    def mata(self, instrucao, v):
+        if instrucao.defs >> v & 1:
+            return self.por_variavel[v]   # atribuição: substitui todas as definições
+        return 1 << v                     # chamada: só deixa de valer o valor de entrada
+
+    def percorrer(self, bloco):
+        """Gera (instrução, definições que a alcançam) ao longo do bloco."""
+        alcancam = self.entrada[bloco.indice]
+        sitio = self.primeiro_sitio[bloco.indice]
+        for instrucao in bloco.instrucoes:
+            yield instrucao, alcancam
+            for v in bits(instrucao.defs | instrucao.defs_chamada):
+                alcancam = (alcancam & ~self.mata(instrucao, v)) | (1 << sitio)
+                sitio += 1
+
+
+def vivas(grafo):
+    """Variáveis vivas no fim de cada bloco."""
+    gen = []
+    kill = []
+    for bloco in grafo.blocos:
+        usadas = definidas = 0
+        for instrucao in bloco.instrucoes:
+            usadas |= instrucao.usos & ~definidas
+            definidas |= instrucao.defs
+        gen.append(usadas)
+        kill.append(definidas)
+
+    # Na saída de uma sub-rotina, as globais (e o retorno) ainda podem ser lidos
+    fronteira = 0 if grafo.nome is None else ((1 << grafo.n_globais) - 1) | grafo.retorno
+    _, saida = resolver(grafo, gen, kill, 'tras', fronteira)
+    return saida
+
+
+def expressao_pura(exp):
+    """Sem chamadas de função nem divisão que possa falhar: pode ser descartada."""
+    for no in iterar_nos(exp):
+        if no.tipo == 'chamada_func':
+            return False
+        if no.tipo == 'exp_binaria' and no.op == 'div':
+            if no.dir.tipo != 'exp_num' or no.dir.valor == 0:
+                return False
+    return True
+
+
+class AnalisadorFluxo:
+    def __init__(self, ast):
+        self.ast = ast
+        self.grafos = construir_grafos(ast)
+        self.avisos = []
+        self.mortos = []  # nós cmd_atrib cujo valor nunca é lido
+
+    def aviso(self, msg):
+        self.avisos.append(f"Aviso: {msg}")
+
+    @staticmethod
+    def onde(grafo):
+        return "no programa principal" if grafo.nome is None else f"em '{grafo.nome}'"
+
+    def analisar(self):
+        lidas_globais = 0
+        for grafo in self.grafos:
+            self.usos_antes_de_atribuir(grafo)
+            self.atribuicoes_mortas(grafo)
+            lidas = 0
+            for instrucao in grafo.instrucoes():
+                lidas |= instrucao.usos
+            lidas_globais |= lidas & ((1 << grafo.n_globais) - 1)
+            if grafo.nome is not None:
+                self.nao_usadas(grafo, lidas, grafo.declaradas)
+        self.nao_usadas(self.grafos[0], lidas_globais, self.grafos[0].declaradas)
+        return self
+
+    def usos_antes_de_atribuir(self, grafo):
+        # Locais declaradas, retorno de função e, no principal, as globais começam sem valor
+        sem_valor = grafo.declaradas | grafo.retorno
+        definicoes = DefinicoesAlcancam(grafo)
+        avisadas = 0
+        for bloco in grafo.blocos:
+            for instrucao, alcancam in definicoes.percorrer(bloco):
+                # O bit v das definições é o valor de entrada da variável v
+                suspeitas = instrucao.usos & sem_valor & alcancam & ~avisadas
+                for v in bits(suspeitas):
+                    self.aviso(f"'{grafo.nomes[1 << v]}' pode ser usada antes de receber um valor {self.onde(grafo)}.")
+                avisadas |= suspeitas
+
+    def atribuicoes_mortas(self, grafo):
+        saida = vivas(grafo)
+        for bloco in grafo.blocos:
+            vivas_agora = saida[bloco.indice]
+            for instrucao in reversed(bloco.instrucoes):
+                no = instrucao.no
+                if (no.tipo == 'cmd_atrib' and not (vivas_agora & instrucao.defs)
+                        and expressao_pura(no.exp)):
+                    self.mortos.append(no)
+                    self.aviso(f"valor atribuído a '{no.nome}' nunca é lido {self.onde(grafo)}.")
+                vivas_agora = (vivas_agora & ~instrucao.defs) | instrucao.usos
+
+    def nao_usadas(self, grafo, lidas, declaradas):
+        for v in bits(declaradas & ~lidas):
+            self.aviso(f"variável '{grafo.nomes[1 << v]}' declarada e nunca lida {self.onde(grafo)}.")
+
+
+def remover_comandos(ast, removidos):
+    """Tira da AST os comandos de 'removidos' (conjunto de id() dos nós)."""
+    vazio = lambda: SeqComandos(None, None)
+    for no in iterar_nos(ast):
+        tipo = no.tipo
+        if tipo == 'seq_comandos':
+            if no.primeiro is not None and id(no.primeiro) in removidos:
+                no.primeiro = None
+        elif tipo == 'cmd_condicional':
+            if id(no.corpo) in removidos:
+                no.corpo = vazio()
+            if no.senao is not None and id(no.senao) in removidos:
+                no.senao = vazio()
+        elif tipo == 'cmd_repeticao':
+            if id(no.corpo) in removidos:
+                no.corpo = vazio()
+
+
+def eliminar_atribuicoes_mortas(ast, max_rodadas=10):
+    """
+    Remove as atribuições mortas, repetindo a análise porque cada remoção pode
+    matar outras. Devolve o número de atribuições removidas.
+    """
+    total = 0
+    for _ in range(max_rodadas):
+        mortos = AnalisadorFluxo(ast).analisar().mortos
+        if not mortos:
+            break
+        remover_comandos(ast, {id(no) for no in mortos})
+        total += len(mortos)
+    return total
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Como usar: python fluxo.py programa.ras [--eliminar]")
+        sys.exit(1)
+
+    from compilador import SessaoCompilador, ErroSintatico
+
+    try:
+        resultado = SessaoCompilador().compilar_arquivo(sys.argv[1])
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{sys.argv[1]}' não encontrado.")
+        sys.exit(1)
+    except ErroSintatico as e:
+        print(e)
+        sys.exit(1)
+    if resultado.erros:
+        for e in resultado.erros:
+            print(e)
+        sys.exit(1)
+
+    analisador = AnalisadorFluxo(resultado.ast).analisar()
+    for aviso in analisador.avisos:
+        print(aviso)
+    if not analisador.avisos:
+        print("Análise de fluxo concluída: nenhum aviso.")
+    if '--eliminar' in sys.argv:
+        print(f"{eliminar_atribuicoes_mortas(resultado.ast)} atribuição(ões) morta(s) removida(s).")
@@ -0,0 +1,122 @@
+# LEITURA DO CÓDIGO-FONTE EM BLOCOS
+#
+# Em vez de carregar o arquivo inteiro numa string, o arquivo é mapeado em
+# memória (mmap) e entregue ao lexer em blocos de tamanho limitado. Os blocos
+# só são cortados em quebras de linha fora de comentários, então nenhum token
+# (nem comentário) fica dividido entre dois blocos e o resultado é o mesmo de
+# analisar o arquivo inteiro de uma vez.
+#
+# Memória: as páginas do mmap lidas também contam no RSS do processo, então
+# as de cada bloco já entregue ao lexer são devolvidas ao sistema (madvise).
+# Sobram o bloco atual (em bytes e decodificado), os temporários do lexer e
+# da TabelaLinhas para ele e a própria TabelaLinhas, que cresce com o número
+# de linhas do arquivo; com blocos pequenos, o pico fica perto deste último.
+
+import mmap
+
+from diagnosticos import TabelaLinhas
+
+TAMANHO_BLOCO = 1 << 18  # 256 KB
+
+
+def _primeiro_abridor(dados, inicio, fim):
+    """Posição e fechamento do primeiro '{' ou '(*' em dados[inicio:fim] (ou -1, None)."""
+    chave = dados.find(b'{', inicio, fim)
+    parenteses = dados.find(b'(*', inicio, fim)
+    if parenteses != -1 and (chave == -1 or parenteses < chave):
+        return parenteses, b'*)'
+    if chave != -1:
+        return chave, b'}'
+    return -1, None
+
+
+def cortes_blocos(dados, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera pares (inicio, fim) que dividem 'dados' (bytes ou mmap) em blocos.
+
+    Cada corte fica logo após a primeira quebra de linha depois de
+    'tamanho_bloco' bytes que não esteja dentro de um comentário. Os
+    comentários são pulados com find(), sem olhar caractere por caractere.
+    """
+    tamanho = len(dados)
+    inicio = 0
+    pos = 0  # até aqui já se sabe que não estamos dentro de um comentário
+    while inicio < tamanho:
+        alvo = inicio + tamanho_bloco
+        if alvo >= tamanho:
+            yield inicio, tamanho
+            return
+
+        while True:
+            quebra = dados.find(b'\n', max(pos, alvo))
+            if quebra == -1:
+                fim = tamanho
+                break
+            abre, fechamento = _primeiro_abridor(dados, pos, quebra)
+            if abre == -1:
+                fim = quebra + 1
+                break
+            fecha = dados.find(fechamento, abre + len(fechamento))
+            if fecha == -1:
+                # Comentário não terminado: o resto vai num bloco só e o
+                # lexer trata o erro como faria com o arquivo inteiro
+                fim = tamanho
+                break
+            pos = fecha + len(fechamento)
+
+        yield inicio, fim
+        inicio = pos = fim
+
+
+class FonteMapeada:
+    """Arquivo-fonte mapeado em memória; use com 'with'."""
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = None
+        self.dados = b''
+
+    def __enter__(self):
+        self._arquivo = open(self.caminho, 'rb')
+        try:
+            self.dados = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.dados = b''  # arquivo vazio não pode ser mapeado
+        return self
+
+    def __exit__(self, *excecao):
+        if isinstance(self.dados, mmap.mmap):
+            self.dados.close()
+        self._arquivo.close()
+
+    def blocos(self, tamanho_bloco=TAMANHO_BLOCO):
+        """Gera o texto de cada bloco, liberando as páginas dos blocos anteriores."""
+        liberado = 0
+        for inicio, fim in cortes_blocos(self.dados, tamanho_bloco):
+            yield self.dados[inicio:fim].decode('utf-8')
+            # madvise só aceita início alinhado à página; a página com o fim do bloco
+            # fica para o próximo
+            limite = fim - fim % mmap.PAGESIZE
+            if limite > liberado and hasattr(mmap, 'MADV_DONTNEED'):
+                self.dados.madvise(mmap.MADV_DONTNEED, liberado, limite - liberado)
+                liberado = limite
+
+
+def tokens_arquivo(lexer, caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Tokens de um arquivo, alimentando o lexer bloco a bloco.
+
+    O lineno do lexer continua de um bloco para o outro e o lexpos de cada
+    token é ajustado para a posição (em caracteres) no arquivo inteiro. As
+    linhas de cada bloco vão para uma TabelaLinhas nova em lexer.linhas.
+    """
+    deslocamento = 0
+    lexer.linhas = TabelaLinhas()
+    with FonteMapeada(caminho) as fonte:
+        for texto in fonte.blocos(tamanho_bloco):
+            lexer.linhas.adicionar(texto, deslocamento)
+            lexer.deslocamento = deslocamento  # lexpos dos erros léxicos é relativo ao bloco
+            lexer.input(texto)
+            for tok in iter(lexer.token, None):
+                tok.lexpos += deslocamento
+                yield tok
+            deslocamento += len(texto)
@@ -0,0 +1,302 @@
+# GERADOR DE PROGRAMAS RASCAL SINTÉTICOS
+#
+# Como usar: python gerador.py [--forma nome] [--escala fator] [--semente n] [-o arquivo.ras]
+#
+# Gera programas válidos (aceitos pelo AnalisadorSemantico) a partir de uma
+# semente: a mesma semente e os mesmos parâmetros produzem sempre o mesmo
+# texto. Os parâmetros controlam o formato do programa:
+#   comandos               -> comandos no corpo principal
+#   profundidade_expressao -> aninhamento das expressões geradas
+#   subrotinas             -> procedimentos e funções declarados
+#   comandos_subrotina     -> comandos no corpo de cada sub-rotina
+#   aninhamento            -> profundidade máxima de if/while aninhados
+#   variaveis              -> variáveis globais (inteiras e lógicas)
+#   repeticao              -> chance de uma expressão repetir o texto de uma
+#                             das últimas geradas no mesmo corpo (0: nunca)
+# FORMAS reúne combinações prontas que estressam uma coisa de cada vez.
+#
+# Os programas servem para medir as fases de compilação, mas também terminam
+# quando executados: cada 'while' conta com uma variável própria até
+# LIMITE_LACO, as sub-rotinas só chamam as declaradas antes delas e 'div' só
+# divide por constantes diferentes de zero. Os valores inteiros, porém,
+# crescem sem limite, e com laços muito aninhados o tempo de execução
+# cresce exponencialmente.
+
+import random
+import sys
+
+PADRAO = {
+    'comandos': 200,
+    'profundidade_expressao': 3,
+    'subrotinas': 4,
+    'comandos_subrotina': 20,
+    'aninhamento': 2,
+    'variaveis': 20,
+    'repeticao': 0,
+}
+
+# Cada forma muda só alguns parâmetros do PADRAO
+FORMAS = {
+    'misto': {},
+    'expressoes': {'comandos': 200, 'profundidade_expressao': 12, 'subrotinas': 0},
+    'comandos': {'comandos': 20000, 'profundidade_expressao': 2, 'subrotinas': 0, 'aninhamento': 0},
+    'subrotinas': {'comandos': 100, 'subrotinas': 400, 'comandos_subrotina': 10},
+    'aninhamento': {'comandos': 10, 'aninhamento': 40, 'subrotinas': 0},
+    'variaveis': {'comandos': 500, 'variaveis': 5000, 'subrotinas': 0},
+    'repetidas': {'comandos': 2000, 'profundidade_expressao': 4, 'repeticao': 0.5},
+}
+
+# Parâmetros que crescem com a escala (a profundidade das expressões, não)
+ESCALAVEIS = ('comandos', 'subrotinas', 'comandos_subrotina', 'aninhamento', 'variaveis')
+
+LIMITE_LACO = 3  # iterações de cada 'while' gerado
+RECENTES = 8     # expressões de cada tipo que podem ser repetidas
+
+
+def parametros_forma(forma='misto', escala=1.0):
+    """Parâmetros completos de uma forma, com os tamanhos multiplicados pela escala."""
+    parametros = dict(PADRAO, **FORMAS[forma])
+    for chave in ESCALAVEIS:
+        if parametros[chave]:
+            parametros[chave] = max(1, round(parametros[chave] * escala))
+    return parametros
+
+
+class Escopo:
+    """Nomes visíveis para o gerador enquanto ele escreve um corpo."""
+    def __init__(self, inteiras, logicas, rotinas, funcao=None):
+        self.inteiras = inteiras    # variáveis que podem ser lidas e atribuídas
+        self.logicas = logicas
+        self.rotinas = rotinas      # [(nome, tipo de retorno ou None, [tipos dos parâmetros])]
+        self.funcao = funcao        # (nome, tipo) da função cujo corpo está sendo gerado
+        self.contadores = []        # contadores de laço livres, por nível de aninhamento
+        self.recentes = {'integer': [], 'boolean': []}  # últimas expressões geradas no corpo
+
+
+class GeradorProgramas:
+    def __init__(self, semente=0, **parametros):
+        self.rng = random.Random(semente)
+        self.parametros = dict(PADRAO, **parametros)
+
+    def gerar(self, nome='sintetico'):
+        """Texto de um programa completo."""
+        p = self.parametros
+        n_logicas = max(1, p['variaveis'] // 4)
+        inteiras = [f"g{i}" for i in range(max(2, p['variaveis'] - n_logicas))]
+        logicas = [f"b{i}" for i in range(n_logicas)]
+        contadores = [f"c{i}" for i in range(p['aninhamento'])]
+
+        partes = [f"program {nome};", "var"]
+        partes.extend(self._declaracoes(inteiras, 'integer'))
+        partes.extend(self._declaracoes(logicas, 'boolean'))
+        if contadores:
+            partes.extend(self._declaracoes(contadores, 'integer'))
+
+        rotinas = []
+        for i in range(p['subrotinas']):
+            partes.append(self._subrotina(i, inteiras, logicas, rotinas))
+
+        escopo = Escopo(inteiras, logicas, rotinas)
+        escopo.contadores = contadores
+        partes.append("begin")
+        partes.append(self._corpo_aninhado(escopo, p['comandos'], 1, True))
+        partes.append("end.")
+        return "\n".join(partes) + "\n"
+
+    def _declaracoes(self, nomes, tipo, por_linha=12):
+        for i in range(0, len(nomes), por_linha):
+            yield "    " + ", ".join(nomes[i:i + por_linha]) + f" : {tipo};"
+
+    def _subrotina(self, indice, globais_inteiras, globais_logicas, rotinas):
+        rng = self.rng
+        p = self.parametros
+        funcao = indice % 2 == 1
+        nome = f"{'f' if funcao else 'p'}{indice}"
+        tipos_params = ['integer'] * rng.randint(0, 3) + ['boolean'] * rng.randint(0, 1)
+        params = [f"a{i}" for i in range(len(tipos_params))]
+        aninhamento = min(p['aninhamento'], 3)
+        contadores = [f"k{i}" for i in range(aninhamento)]
+
+        cabecalho = f"{'function' if funcao else 'procedure'} {nome}"
+        if params:
+            cabecalho += "(" + "; ".join(f"{a} : {t}" for a, t in zip(params, tipos_params)) + ")"
+        tipo_retorno = rng.choice(['integer', 'boolean']) if funcao else None
+        cabecalho += f" : {tipo_retorno};" if funcao else ";"
+
+        locais = ['x0', 'x1', 'x2']
+        linhas = [cabecalho, "var", "    " + ", ".join(locais + contadores) + " : integer;", "    y0 : boolean;"]
+
+        inteiras = locais + [a for a, t in zip(params, tipos_params) if t == 'integer'] + globais_inteiras[:8]
+        logicas = ['y0'] + [a for a, t in zip(params, tipos_params) if t == 'boolean'] + globais_logicas[:4]
+        escopo = Escopo(inteiras, logicas, list(rotinas), (nome, tipo_retorno) if funcao else None)
+        escopo.contadores = contadores
+
+        corpo = self._corpo_aninhado(escopo, p['comandos_subrotina'], 1, True)
+        if funcao:
+            # O valor de retorno é sempre definido no fim
+            corpo += f";\n    {nome} := {self._expressao(escopo, tipo_retorno, 2)}"
+        linhas += ["begin", corpo, "end;"]
+        rotinas.append((nome, tipo_retorno, tipos_params))
+        return "\n".join(linhas)
+
+    # --- COMANDOS ---
+    def _comandos(self, escopo, n, nivel, aninhar=True):
+        """n comandos separados por ';', indentados pelo nível."""
+        return ";\n".join(self._comando(escopo, nivel, aninhar) for _ in range(max(1, n)))
+
+    def _comando(self, escopo, nivel, aninhar=True):
+        rng = self.rng
+        recuo = "    " * nivel
+        sorteio = rng.random()
+        pode_aninhar = aninhar and nivel <= len(escopo.contadores)
+        procedimentos = [r for r in escopo.rotinas if r[1] is None]
+
+        if pode_aninhar and sorteio < 0.15:
+            return self._aninhado(escopo, nivel)
+        if procedimentos and sorteio < 0.25:
+            nome, _, tipos = rng.choice(procedimentos)
+            args = ", ".join(self._expressao(escopo, t, 1) for t in tipos)
+            return f"{recuo}{nome}({args})"
+        if sorteio < 0.32:
+            n = rng.randint(1, 3)
+            return f"{recuo}write({', '.join(self._expressao(escopo, rng.choice(['integer', 'boolean']), 1) for _ in range(n))})"
+        if sorteio < 0.36:
+            return f"{recuo}read({rng.choice(escopo.inteiras)})"
+        if sorteio < 0.5:
+            return f"{recuo}{rng.choice(escopo.logicas)} := {self._expressao(escopo, 'boolean')}"
+        return f"{recuo}{rng.choice(escopo.inteiras)} := {self._expressao(escopo, 'integer')}"
+
+    def _aninhado(self, escopo, nivel):
+        """
+        'if' ou 'while' cujo corpo aninha até o limite de profundidade.
+
+        Só o primeiro comando de cada corpo desce mais um nível; os outros (e o
+        'else') ficam rasos, então o texto cresce linearmente com o aninhamento.
+        """
+        rng = self.rng
+        recuo = "    " * nivel
+        n_corpo = rng.randint(1, 3)
+        if rng.random() < 0.5:
+            condicao = self._expressao(escopo, 'boolean', 2)
+            texto = (f"{recuo}if {condicao} then\n{recuo}begin\n"
+                     f"{self._corpo_aninhado(escopo, n_corpo, nivel + 1)}\n{recuo}end")
+            if rng.random() < 0.5:
+                texto += (f"\n{recuo}else\n{recuo}begin\n"
+                          f"{self._comandos(escopo, n_corpo, nivel + 1, False)}\n{recuo}end")
+            return texto
+
+        # O contador do nível é reservado: o corpo não pode atribuí-lo
+        contador = escopo.contadores[nivel - 1]
+        corpo = self._corpo_aninhado(escopo, n_corpo, nivel + 1)
+        return (f"{recuo}{contador} := 0;\n"
+                f"{recuo}while {contador} < {LIMITE_LACO} do\n{recuo}begin\n{corpo};\n"
+                f"{recuo}    {contador} := {contador} + 1\n{recuo}end")
+
+    def _corpo_aninhado(self, escopo, n, nivel, aninhar_resto=False):
+        """n comandos cujo primeiro desce até o aninhamento máximo."""
+        if nivel <= len(escopo.contadores):
+            primeiro = self._aninhado(escopo, nivel)
+            if n > 1:
+                return primeiro + ";\n" + self._comandos(escopo, n - 1, nivel, aninhar_resto)
+            return primeiro
+        return self._comandos(escopo, n, nivel, aninhar_resto)
+
+    # --- EXPRESSÕES ---
+    def _expressao(self, escopo, tipo, profundidade=None):
+        if profundidade is None:
+            profundidade = self.parametros['profundidade_expressao']
+        repeticao = self.parametros['repeticao']
+        if repeticao and profundidade > 0:
+            # Os nomes de um corpo não mudam, então o texto continua válido
+            recentes = escopo.recentes[tipo]
+            if recentes and self.rng.random() < repeticao:
+                return self.rng.choice(recentes)
+        if tipo == 'integer':
+            texto = self._inteira(escopo, profundidade)
+        else:
+            texto = self._logica(escopo, profundidade)
+        if repeticao and profundidade > 0:
+            recentes.append(texto)
+            del recentes[:-RECENTES]
+        return texto
+
+    def _operandos(self, gerar, escopo, profundidade):
+        """
+        Dois operandos: um com a profundidade toda e o outro raso, em ordem
+        sorteada. Assim a profundidade pedida é atingida com tamanho linear.
+        """
+        fundo = gerar(escopo, profundidade - 1)
+        raso = gerar(escopo, min(1, profundidade - 1))
+        return (fundo, raso) if self.rng.random() < 0.5 else (raso, fundo)
+
+    def _inteira(self, escopo, profundidade):
+        rng = self.rng
+        if profundidade <= 0:
+            return self._folha_inteira(escopo)
+        sorteio = rng.random()
+        if sorteio < 0.1:
+            return f"-({self._inteira(escopo, profundidade - 1)})"
+        if sorteio < 0.2:
+            return f"({self._inteira(escopo, profundidade - 1)}) div {rng.randint(1, 9)}"
+        op = rng.choice(['+', '-', '*', '+', '-'])
+        esq, dir = self._operandos(self._inteira, escopo, profundidade)
+        return f"({esq}) {op} ({dir})"
+
+    def _folha_inteira(self, escopo):
+        rng = self.rng
+        funcoes = [r for r in escopo.rotinas if r[1] == 'integer']
+        sorteio = rng.random()
+        if funcoes and sorteio < 0.1:
+            nome, _, tipos = rng.choice(funcoes)
+            return f"{nome}({', '.join(self._expressao(escopo, t, 0) for t in tipos)})"
+        if sorteio < 0.4:
+            return str(rng.randint(0, 100))
+        return rng.choice(escopo.inteiras + escopo.contadores)
+
+    def _logica(self, escopo, profundidade):
+        rng = self.rng
+        if profundidade <= 0:
+            funcoes = [r for r in escopo.rotinas if r[1] == 'boolean']
+            sorteio = rng.random()
+            if funcoes and sorteio < 0.1:
+                nome, _, tipos = rng.choice(funcoes)
+                return f"{nome}({', '.join(self._expressao(escopo, t, 0) for t in tipos)})"
+            if sorteio < 0.25:
+                return rng.choice(['true', 'false'])
+            return rng.choice(escopo.logicas)
+        sorteio = rng.random()
+        if sorteio < 0.1:
+            return f"not ({self._logica(escopo, profundidade - 1)})"
+        if sorteio < 0.55:
+            op = rng.choice(['=', '<>', '<', '<=', '>', '>='])
+            esq, dir = self._operandos(self._inteira, escopo, profundidade)
+            return f"({esq}) {op} ({dir})"
+        op = rng.choice(['and', 'or'])
+        esq, dir = self._operandos(self._logica, escopo, profundidade)
+        return f"({esq}) {op} ({dir})"
+
+
+def gerar_programa(semente=0, forma='misto', escala=1.0, **parametros):
+    """Atalho: texto de um programa da forma indicada (parâmetros avulsos têm prioridade)."""
+    return GeradorProgramas(semente, **dict(parametros_forma(forma, escala), **parametros)).gerar(forma)
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    opcoes = {'--forma': 'misto', '--escala': '1', '--semente': '0', '-o': None}
+    for opcao in opcoes:
+        if opcao in argumentos:
+            posicao = argumentos.index(opcao)
+            opcoes[opcao] = argumentos[posicao + 1]
+            del argumentos[posicao:posicao + 2]
+    if argumentos or opcoes['--forma'] not in FORMAS:
+        print("Como usar: python gerador.py [--forma nome] [--escala fator] [--semente n] [-o arquivo.ras]")
+        print("Formas: " + ", ".join(FORMAS))
+        sys.exit(1)
+
+    texto = gerar_programa(int(opcoes['--semente']), opcoes['--forma'], float(opcoes['--escala']))
+    if opcoes['-o']:
+        with open(opcoes['-o'], 'w') as f:
+            f.write(texto)
+    else:
+        sys.stdout.write(texto)
@@ -0,0 +1,347 @@
+# INTERPRETADOR POR CLOSURES
+#
+# Como usar: python interpretador.py programa.ras [-O]
+#
+# Alternativa mais leve à máquina virtual (maquina.py): uma única passada
+# sobre a AST já verificada transforma cada nó numa closure Python com tudo
+# pré-resolvido. Cada variável vira um acesso por índice ao quadro da
+# sub-rotina (ou à lista de globais), usando o (nível, slot) que a
+# TabelaSimbolos atribui na declaração; na execução não há busca por nome.
+#
+# A semântica de execução é a mesma da máquina virtual, inclusive o limite
+# de PROFUNDIDADE_MAXIMA chamadas aninhadas. Como as closures se chamam
+# recursivamente, cada chamada Rascal ocupa vários quadros da pilha do Python;
+# durante a execução o limite de recursão do Python sobe para LIMITE_RECURSAO,
+# folga suficiente para chegar à PROFUNDIDADE_MAXIMA (as chamadas entre
+# funções Python não consomem a pilha C).
+
+import sys
+
+from maquina import PROFUNDIDADE_MAXIMA, ErroExecucao, dividir, ler_itens, ler_valor
+from semantico import TabelaSimbolos
+from visitante import Visitante
+
+LIMITE_RECURSAO = 50 * PROFUNDIDADE_MAXIMA  # quadros do Python
+
+
+def _nada(quadro):
+    pass
+
+
+def _formatar_inteiro(valor):
+    return str(valor)
+
+
+def _formatar_logico(valor):
+    return 'true' if valor else 'false'
+
+
+# Fábricas das closures de cada operador binário
+OPERACOES = {
+    '+': lambda e, d: lambda q: e(q) + d(q),
+    '-': lambda e, d: lambda q: e(q) - d(q),
+    '*': lambda e, d: lambda q: e(q) * d(q),
+    'div': lambda e, d: lambda q: dividir(e(q), d(q)),
+    '=': lambda e, d: lambda q: e(q) == d(q),
+    '<>': lambda e, d: lambda q: e(q) != d(q),
+    '<': lambda e, d: lambda q: e(q) < d(q),
+    '<=': lambda e, d: lambda q: e(q) <= d(q),
+    '>': lambda e, d: lambda q: e(q) > d(q),
+    '>=': lambda e, d: lambda q: e(q) >= d(q),
+    'and': lambda e, d: lambda q: e(q) and d(q),
+    'or': lambda e, d: lambda q: e(q) or d(q),
+}
+
+# Variantes com a constante já embutida, para o caso comum 'x + 1', 'i < 10'...
+OPERACOES_CONSTANTE = {
+    '+': lambda e, c: lambda q: e(q) + c,
+    '-': lambda e, c: lambda q: e(q) - c,
+    '*': lambda e, c: lambda q: e(q) * c,
+    '=': lambda e, c: lambda q: e(q) == c,
+    '<>': lambda e, c: lambda q: e(q) != c,
+    '<': lambda e, c: lambda q: e(q) < c,
+    '<=': lambda e, c: lambda q: e(q) <= c,
+    '>': lambda e, c: lambda q: e(q) > c,
+    '>=': lambda e, c: lambda q: e(q) >= c,
+}
+
+TIPOS_OPERADORES = {
+    '+': 'integer', '-': 'integer', '*': 'integer', 'div': 'integer',
+    '=': 'boolean', '<>': 'boolean', '<': 'boolean', '<=': 'boolean',
+    '>': 'boolean', '>=': 'boolean', 'and': 'boolean', 'or': 'boolean',
+}
+
+
+class Rotina:
+    """Procedimento ou função compilado; o corpo é preenchido depois da declaração."""
+    __slots__ = ('nome', 'n_params', 'tipo_retorno', 'slot_retorno', 'tamanho_quadro', 'corpo')
+
+    def __init__(self, nome, n_params, tipo_retorno):
+        self.nome = nome
+        self.n_params = n_params
+        self.tipo_retorno = tipo_retorno
+        self.slot_retorno = None
+        self.tamanho_quadro = n_params
+        self.corpo = _nada
+
+
+class ProgramaClosures:
+    """Programa pronto para executar: o corpo principal e o estado de execução."""
+    def __init__(self):
+        self.corpo = _nada
+        self.n_globais = 0
+        self.globais = []  # a mesma lista é capturada pelas closures
+        self.entrada = iter(())
+        self.saida = sys.stdout
+        self.profundidade = 0  # chamadas de sub-rotina em andamento
+
+    def executar(self, entrada=None, saida=None):
+        """Executa o programa e devolve a lista final das variáveis globais."""
+        self.entrada = ler_itens(entrada if entrada is not None else sys.stdin)
+        self.saida = saida if saida is not None else sys.stdout
+        self.globais[:] = [0] * self.n_globais
+        self.profundidade = 0
+
+        limite = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limite, LIMITE_RECURSAO))
+        try:
+            self.corpo(self.globais)
+        except RecursionError:
+            raise ErroExecucao("Recursão profunda demais.") from None
+        finally:
+            sys.setrecursionlimit(limite)
+        return self.globais
+
+
+class CompiladorClosures(Visitante):
+    """Transforma uma AST aceita pelo AnalisadorSemantico em closures."""
+    def __init__(self):
+        super().__init__()
+        self.tabela = TabelaSimbolos()
+        self.programa = ProgramaClosures()
+        self.rotina_atual = None
+
+    def compilar(self, ast):
+        self.programa.corpo = self.visitar(ast)
+        self.programa.n_globais = self.tabela.tamanhos[0]
+        return self.programa
+
+    def endereco(self, nome):
+        """(nível, slot, tipo) da variável visível com esse nome."""
+        info = self.tabela.buscar(nome)
+        if info['categoria'] in ('var', 'param'):
+            return info['nivel'], info['slot'], info['tipo']
+        # Nome da função dentro dela mesma: o slot do valor de retorno
+        rotina = self.rotina_atual
+        return 1, rotina.slot_retorno, rotina.tipo_retorno
+
+    # --- PROGRAMA E BLOCOS ---
+    def visitar_programa(self, no):
+        self.tabela.definir(no.nome, 'programa', None)
+        return (yield no.corpo)
+
+    def visitar_bloco(self, no):
+        for decl in no.vars:
+            self.tabela.definir(decl.nome, 'var', decl.tipo_var)
+        for sub in no.subrotinas:
+            yield sub
+        comandos = yield no.comandos
+        return comandos or _nada
+
+    def _visitar_subrotina(self, no, categoria, tipo_retorno):
+        rotina = Rotina(no.nome, len(no.params), tipo_retorno)
+        self.tabela.definir(no.nome, categoria, tipo_retorno, params=[p.tipo_var for p in no.params])
+        self.tabela.buscar(no.nome)['rotina'] = rotina
+
+        self.tabela.entrar_escopo()
+        for p in no.params:
+            self.tabela.definir(p.nome, 'param', p.tipo_var)
+        if tipo_retorno is not None:
+            rotina.slot_retorno = self.tabela.novo_slot()
+        self.rotina_atual = rotina
+        rotina.corpo = (yield no.corpo) or _nada
+        self.rotina_atual = None
+        rotina.tamanho_quadro = self.tabela.sair_escopo()
+
+    def visitar_decl_proc(self, no):
+        yield from self._visitar_subrotina(no, 'proc', None)
+
+    def visitar_decl_func(self, no):
+        yield from self._visitar_subrotina(no, 'func', no.retorno)
+
+    # --- COMANDOS (devolvem uma closure que recebe o quadro atual) ---
+    def visitar_seq_comandos(self, no):
+        comandos = []
+        while no:
+            if no.primeiro:
+                comando = yield no.primeiro
+                if comando is not None:
+                    comandos.append(comando)
+            no = no.resto
+        if not comandos:
+            return _nada
+        if len(comandos) == 1:
+            return comandos[0]
+        comandos = tuple(comandos)
+
+        def sequencia(q):
+            for comando in comandos:
+                comando(q)
+        return sequencia
+
+    def visitar_cmd_atrib(self, no):
+        exp, _ = yield no.exp
+        nivel, slot, _ = self.endereco(no.nome)
+        if nivel == 0:
+            globais = self.programa.globais
+
+            def atribuir_global(q):
+                globais[slot] = exp(q)
+            return atribuir_global
+
+        def atribuir_local(q):
+            q[slot] = exp(q)
+        return atribuir_local
+
+    def visitar_cmd_condicional(self, no):
+        condicao, _ = yield no.condicao
+        corpo = (yield no.corpo) or _nada
+        if no.senao is None:
+            def se(q):
+                if condicao(q):
+                    corpo(q)
+            return se
+
+        senao = (yield no.senao) or _nada
+
+        def se_senao(q):
+            if condicao(q):
+                corpo(q)
+            else:
+                senao(q)
+        return se_senao
+
+    def visitar_cmd_repeticao(self, no):
+        condicao, _ = yield no.condicao
+        corpo = (yield no.corpo) or _nada
+
+        def enquanto(q):
+            while condicao(q):
+                corpo(q)
+        return enquanto
+
+    def _chamada(self, nome, args):
+        rotina = self.tabela.buscar(nome)['rotina']
+        argumentos = []
+        for arg in args:
+            exp, _ = yield arg
+            argumentos.append(exp)
+        argumentos = tuple(argumentos)
+        programa = self.programa
+
+        def chamar(q):
+            quadro = [a(q) for a in argumentos]
+            quadro.extend([0] * (rotina.tamanho_quadro - rotina.n_params))
+            if programa.profundidade == PROFUNDIDADE_MAXIMA:
+                raise ErroExecucao("Recursão profunda demais.")
+            # Sem try/finally: um erro interrompe a execução inteira e
+            # executar() zera a profundidade na próxima vez
+            programa.profundidade += 1
+            rotina.corpo(quadro)
+            programa.profundidade -= 1
+            return quadro
+        return rotina, chamar
+
+    def visitar_chamada_proc(self, no):
+        _, chamar = yield from self._chamada(no.nome, no.args)
+        return chamar
+
+    def visitar_cmd_leitura(self, no):
+        programa = self.programa
+        destinos = tuple(self.endereco(nome) for nome in no.vars)
+        globais = programa.globais
+
+        def ler(q):
+            for nivel, slot, tipo in destinos:
+                (globais if nivel == 0 else q)[slot] = ler_valor(programa.entrada, tipo)
+        return ler
+
+    def visitar_cmd_escrita(self, no):
+        programa = self.programa
+        partes = []
+        for exp in no.expressoes:
+            valor, tipo = yield exp
+            partes.append((valor, _formatar_logico if tipo == 'boolean' else _formatar_inteiro))
+        partes = tuple(partes)
+
+        def escrever(q):
+            programa.saida.write(' '.join([formatar(valor(q)) for valor, formatar in partes]) + '\n')
+        return escrever
+
+    # --- EXPRESSÕES (devolvem (closure, tipo)) ---
+    def visitar_exp_binaria(self, no):
+        esq, _ = yield no.esq
+        if no.dir.tipo == 'exp_num' and no.op in OPERACOES_CONSTANTE:
+            return OPERACOES_CONSTANTE[no.op](esq, no.dir.valor), TIPOS_OPERADORES[no.op]
+        dir, _ = yield no.dir
+        return OPERACOES[no.op](esq, dir), TIPOS_OPERADORES[no.op]
+
+    def visitar_exp_unaria(self, no):
+        exp, _ = yield no.exp
+        if no.op == 'not':
+            return (lambda q: not exp(q)), 'boolean'
+        return (lambda q: -exp(q)), 'integer'
+
+    def visitar_exp_num(self, no):
+        valor = no.valor
+        return (lambda q: valor), 'integer'
+
+    def visitar_logico(self, no):
+        valor = no.valor == 'true'
+        return (lambda q: valor), 'boolean'
+
+    def visitar_exp_var(self, no):
+        nivel, slot, tipo = self.endereco(no.nome)
+        if nivel == 0:
+            globais = self.programa.globais
+            return (lambda q: globais[slot]), tipo
+        return (lambda q: q[slot]), tipo
+
+    def visitar_chamada_func(self, no):
+        rotina, chamar = yield from self._chamada(no.nome, no.args)
+
+        def chamar_funcao(q):
+            return chamar(q)[rotina.slot_retorno]
+        return chamar_funcao, rotina.tipo_retorno
+
+
+def compilar_closures(ast):
+    return CompiladorClosures().compilar(ast)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Como usar: python interpretador.py programa.ras [-O]")
+        sys.exit(1)
+
+    from compilador import SessaoCompilador, ErroSintatico
+
+    try:
+        resultado = SessaoCompilador().compilar_arquivo(sys.argv[1], otimizar='-O' in sys.argv)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{sys.argv[1]}' não encontrado.")
+        sys.exit(1)
+    except ErroSintatico as e:
+        print(e)
+        sys.exit(1)
+    if resultado.erros:
+        for e in resultado.erros:
+            print(e)
+        sys.exit(1)
+
+    try:
+        compilar_closures(resultado.ast).executar()
+    except ErroExecucao as e:
+        sys.stdout.flush()
+        print(f"Erro de Execução: {e}", file=sys.stderr)
+        sys.exit(1)
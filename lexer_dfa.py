@@ -0,0 +1,222 @@
+# ANALISADOR LÉXICO POR TABELA
+#
+# Alternativa ao lexer do PLY (yacc.py, PARTE 1) que produz os mesmos tokens
+# (tipo, valor, linha e posição) e os mesmos erros léxicos. É escolhido com
+# novos_analisadores(lexer_dfa=True), SessaoCompilador(lexer_dfa=True) ou a
+# opção --lexer-dfa do yacc.py e do semantico.py.
+#
+# O PLY tenta a expressão regular mestra a cada token e chama uma função
+# Python para cada identificador e número. Aqui o autômato sai do estado
+# inicial pela classe do primeiro caractere, lida numa tabela pré-calculada;
+# os laços dos estados (espaços, nomes, dígitos, corpo de comentário) são
+# consumidos de uma vez por buscas em C (re.match, str.find), sem um passo
+# Python por caractere. Os nomes são internados numa tabela que já guarda o
+# tipo (palavra reservada ou IDENTIFICADOR), então cada nome custa uma só
+# consulta de dicionário, e os tokens são produzidos em lotes.
+#
+# As mensagens de erro saem das próprias regras do yacc.py (t_error,
+# t_IDENTIFICADOR_INVALIDO, t_NUMERO_FLOAT), chamadas com um token de erro.
+
+import re
+import string
+import sys
+from functools import partial
+from itertools import chain
+
+from diagnosticos import TabelaLinhas
+from yacc import reserved, t_error, t_IDENTIFICADOR_INVALIDO, t_NUMERO_FLOAT
+
+# Classes de caractere: cada uma é a transição que sai do estado inicial
+BRANCO, LETRA, DIGITO, SIMBOLO, COMPOSTO, PONTO, CHAVE, PARENTESE, INVALIDO = range(9)
+
+# Tokens de um caractere
+SIMBOLOS = {
+    '+': 'MAIS', '-': 'MENOS', '*': 'VEZES', '=': 'IGUAL', '(': 'PARE', ')': 'PARD',
+    ';': 'PONTOV', '.': 'PONTO', ',': 'VIRG', ':': 'DOISP', '<': 'MENOR', '>': 'MAIOR',
+}
+# Tokens de dois caracteres, tentados antes do de um caractere nos COMPOSTO
+DUPLOS = {':=': 'ATRIB', '<>': 'DIF', '<=': 'MENORIG', '>=': 'MAIORIG'}
+
+def _tabela_classes():
+    tabela = [INVALIDO] * 128
+    for caracteres, classe in ((' \t\r\n', BRANCO), (string.ascii_letters, LETRA),
+                               (string.digits, DIGITO), ('+-*=);,', SIMBOLO), (':<>', COMPOSTO),
+                               ('.', PONTO), ('{', CHAVE), ('(', PARENTESE)):
+        for c in caracteres:
+            tabela[ord(c)] = classe
+    return tabela
+
+# Classe de cada caractere ASCII; fora do ASCII só há dígitos (o \d do PLY
+# aceita qualquer dígito decimal Unicode) e caracteres inválidos
+CLASSES = _tabela_classes()
+LETRAS = frozenset(string.ascii_letters)
+
+_BRANCOS = re.compile(r'[ \t\r\n]*').match
+_CAUDA_NOME = re.compile(r'[a-zA-Z_0-9]*').match
+_DIGITOS = re.compile(r'\d*').match
+
+TAMANHO_LOTE = 512
+
+
+class Token:
+    """Token com os atributos do LexToken do PLY, que é o que o parser usa."""
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer')
+
+    def __init__(self, tipo, valor, linha, posicao):
+        self.type = tipo
+        self.value = valor
+        self.lineno = linha
+        self.lexpos = posicao
+
+    def __repr__(self):
+        return f"LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+
+class LexerDFA:
+    """
+    Mesma interface do lexer do PLY usada pelo parser e pelo fonte.py:
+    input(texto), token(), clone(), lineno e lexpos.
+    """
+    def __init__(self, tamanho_lote=TAMANHO_LOTE):
+        self.tamanho_lote = tamanho_lote
+        self.nomes = {nome: (tipo, nome) for nome, tipo in reserved.items()}  # nome -> (tipo, nome internado)
+        self.lexdata = ''
+        self.lexpos = 0
+        self.lineno = 1
+        # Estado dos erros, como no lexer do yacc.py (ver erro_lexico e analisar)
+        self.ecoar_erros = True
+        self.deslocamento = 0
+        self.linhas = TabelaLinhas()
+        self.diagnosticos = []
+        self.erros_sintaxe = []
+        self.expressoes = None
+
+    def clone(self):
+        novo = LexerDFA(self.tamanho_lote)
+        novo.ecoar_erros = self.ecoar_erros
+        return novo
+
+    def input(self, texto):
+        self.lexdata = texto
+        self.lexpos = 0
+        # O parser chama token() uma vez por token: em vez de um método, ele é
+        # o próprio next() sobre os lotes, sem um quadro Python por chamada
+        self.token = partial(next, chain.from_iterable(self._lotes(texto)), None)
+
+    def token(self):
+        """Próximo token, ou None no fim (substituído a cada input())."""
+        return None
+
+    def skip(self, n):
+        # Usado por yacc.t_error para pular o caractere inválido
+        self.lexpos += n
+
+    def _lotes(self, texto):
+        """
+        Listas de até tamanho_lote tokens de 'texto'. Um erro léxico fecha o
+        lote atual e só é registrado quando o parser pede o token seguinte, na
+        mesma ordem em que o PLY o registraria.
+        """
+        classes = CLASSES
+        simbolos = SIMBOLOS
+        nomes = self.nomes
+        limite = self.tamanho_lote
+        n = len(texto)
+        pos = 0
+        linha = self.lineno
+        lote = []
+        adicionar = lote.append
+
+        while pos < n:
+            c = texto[pos]
+            o = ord(c)
+            classe = classes[o] if o < 128 else (DIGITO if c.isdecimal() else INVALIDO)
+
+            if classe == BRANCO:
+                fim = _BRANCOS(texto, pos).end()
+                linha += texto.count('\n', pos, fim)
+                pos = fim
+                continue
+
+            regra = None  # regra de erro do yacc.py, quando o trecho [pos, fim) é inválido
+            if classe == LETRA:
+                fim = _CAUDA_NOME(texto, pos + 1).end()
+                nome = texto[pos:fim]
+                simbolo = nomes.get(nome)
+                if simbolo is None:
+                    nome = sys.intern(nome)
+                    simbolo = nomes[nome] = ('IDENTIFICADOR', nome)
+                adicionar(Token(simbolo[0], simbolo[1], linha, pos))
+                pos = fim
+            elif classe == SIMBOLO:
+                adicionar(Token(simbolos[c], c, linha, pos))
+                pos += 1
+            elif classe == COMPOSTO:
+                par = texto[pos:pos + 2]
+                tipo = DUPLOS.get(par)
+                if tipo is not None:
+                    adicionar(Token(tipo, par, linha, pos))
+                    pos += 2
+                else:
+                    adicionar(Token(simbolos[c], c, linha, pos))
+                    pos += 1
+            elif classe == DIGITO:
+                fim = _DIGITOS(texto, pos).end()
+                seguinte = texto[fim:fim + 1]
+                if seguinte in LETRAS:
+                    fim = _CAUDA_NOME(texto, fim).end()
+                    regra = t_IDENTIFICADOR_INVALIDO
+                elif seguinte == '.':
+                    fim = _DIGITOS(texto, fim + 1).end()
+                    regra = t_NUMERO_FLOAT
+                else:
+                    adicionar(Token('NUMERO', int(texto[pos:fim]), linha, pos))
+                    pos = fim
+            elif classe == PONTO:
+                fim = _DIGITOS(texto, pos + 1).end()
+                if fim > pos + 1:
+                    regra = t_NUMERO_FLOAT
+                else:
+                    adicionar(Token('PONTO', c, linha, pos))
+                    pos += 1
+            elif classe == CHAVE:
+                fim = texto.find('}', pos + 1) + 1
+                if fim:
+                    linha += texto.count('\n', pos, fim)
+                    pos = fim
+                    continue
+                fim = pos + 1
+                regra = t_error
+            elif classe == PARENTESE:
+                if texto.startswith('*', pos + 1):
+                    fim = texto.find('*)', pos + 2) + 2
+                    if fim > 1:
+                        linha += texto.count('\n', pos, fim)
+                        pos = fim
+                        continue
+                adicionar(Token('PARE', c, linha, pos))
+                pos += 1
+            else:
+                fim = pos + 1
+                regra = t_error
+
+            if regra is not None:
+                if lote:
+                    yield lote
+                    lote = []
+                    adicionar = lote.append
+                self.lineno = linha
+                self.lexpos = pos
+                erro = Token('error', texto[pos:fim], linha, pos)
+                erro.lexer = self
+                regra(erro)
+                pos = fim
+            elif len(lote) >= limite:
+                yield lote
+                lote = []
+                adicionar = lote.append
+
+        self.lineno = linha
+        self.lexpos = pos
+        if lote:
+            yield lote
@@ -0,0 +1,517 @@
+# GERAÇÃO DE BYTECODE E MÁQUINA VIRTUAL
+#
+# Como usar: python maquina.py programa.ras [-O] [--desmontar] [--estatisticas]
+#
+# Depois da análise semântica, a AST é traduzida para um bytecode compacto
+# (array de inteiros de 64 bits: opcode seguido dos operandos) e executada por
+# uma máquina de pilha. As variáveis globais e as locais de cada chamada ficam
+# em listas indexadas por slots resolvidos na geração de código.
+#
+# Semântica de execução adotada:
+#   - variáveis começam com 0 (integer) ou false (boolean);
+#   - 'div' trunca em direção a zero, como em Pascal;
+#   - 'and' e 'or' são avaliados em curto-circuito;
+#   - dentro de uma função, o nome da função funciona como variável de retorno;
+#   - read lê o próximo item (separado por espaços) da entrada padrão;
+#   - write escreve os valores separados por espaço e termina a linha;
+#   - no máximo PROFUNDIDADE_MAXIMA chamadas aninhadas; além disso, a execução
+#     para com "Recursão profunda demais." (o interpretador.py usa o mesmo limite).
+
+import sys
+import time
+from array import array
+
+from visitante import Visitante
+
+PROFUNDIDADE_MAXIMA = 100000  # chamadas de sub-rotina aninhadas
+
+# --- OPCODES ---
+(
+    PUSH_CONST, LOAD_GLOBAL, STORE_GLOBAL, LOAD_LOCAL, STORE_LOCAL,
+    ADD, SUB, MUL, DIV, NEG, NOT,
+    EQ, NE, LT, LE, GT, GE,
+    JUMP, JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP,
+    CALL, RET, RET_VAL,
+    READ_INT, READ_BOOL, WRITE,
+    HALT,
+) = range(28)
+
+NOMES_OPCODES = [
+    'PUSH_CONST', 'LOAD_GLOBAL', 'STORE_GLOBAL', 'LOAD_LOCAL', 'STORE_LOCAL',
+    'ADD', 'SUB', 'MUL', 'DIV', 'NEG', 'NOT',
+    'EQ', 'NE', 'LT', 'LE', 'GT', 'GE',
+    'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_FALSE_OR_POP', 'JUMP_IF_TRUE_OR_POP',
+    'CALL', 'RET', 'RET_VAL',
+    'READ_INT', 'READ_BOOL', 'WRITE',
+    'HALT',
+]
+
+# Número de operandos de cada opcode
+OPERANDOS = {
+    PUSH_CONST: 1, LOAD_GLOBAL: 1, STORE_GLOBAL: 1, LOAD_LOCAL: 1, STORE_LOCAL: 1,
+    JUMP: 1, JUMP_IF_FALSE: 1, JUMP_IF_FALSE_OR_POP: 1, JUMP_IF_TRUE_OR_POP: 1,
+    CALL: 1, RET_VAL: 1,
+    READ_INT: 2, READ_BOOL: 2,  # opcode STORE_* e slot de destino
+    WRITE: 2,                   # quantos valores e a constante com a máscara dos booleanos
+}
+
+OPERADORES_BINARIOS = {
+    '+': ADD, '-': SUB, '*': MUL, 'div': DIV,
+    '=': EQ, '<>': NE, '<': LT, '<=': LE, '>': GT, '>=': GE,
+}
+
+TIPOS_OPERADORES = {
+    '+': 'integer', '-': 'integer', '*': 'integer', 'div': 'integer',
+    '=': 'boolean', '<>': 'boolean', '<': 'boolean', '<=': 'boolean',
+    '>': 'boolean', '>=': 'boolean', 'and': 'boolean', 'or': 'boolean',
+}
+
+
+class ErroExecucao(Exception):
+    pass
+
+
+class Subrotina:
+    def __init__(self, nome, n_params, tipo_retorno):
+        self.nome = nome
+        self.n_params = n_params
+        self.tipo_retorno = tipo_retorno  # None para procedimentos
+        self.endereco = None
+        self.tamanho_quadro = n_params
+
+
+class Programa:
+    """Bytecode pronto para executar."""
+    def __init__(self, codigo, constantes, n_globais, subrotinas):
+        self.codigo = codigo
+        self.constantes = constantes
+        self.n_globais = n_globais
+        self.subrotinas = subrotinas
+
+    def desmontar(self):
+        """Listagem legível do bytecode."""
+        linhas = []
+        pc = 0
+        while pc < len(self.codigo):
+            op = self.codigo[pc]
+            operandos = list(self.codigo[pc + 1:pc + 1 + OPERANDOS.get(op, 0)])
+            comentario = ''
+            if op == PUSH_CONST:
+                comentario = f"  ; {self.constantes[operandos[0]]}"
+            elif op == CALL:
+                comentario = f"  ; {self.subrotinas[operandos[0]].nome}"
+            elif op in (READ_INT, READ_BOOL):
+                comentario = f"  ; {NOMES_OPCODES[operandos[0]]}"
+            elif op == WRITE:
+                comentario = f"  ; booleanos {self.constantes[operandos[1]]:b}"
+            linhas.append(f"{pc:6} {NOMES_OPCODES[op]:<22} {' '.join(map(str, operandos))}{comentario}")
+            pc += 1 + len(operandos)
+        return '\n'.join(linhas)
+
+
+class GeradorBytecode(Visitante):
+    """Traduz uma AST já aceita pelo AnalisadorSemantico para bytecode."""
+    def __init__(self):
+        super().__init__()
+        self.codigo = array('q')
+        self.constantes = []
+        self._indice_constantes = {}
+        self.globais = {}       # nome -> (slot, tipo)
+        self.locais = None      # idem, dentro de uma sub-rotina
+        self.subrotinas = {}    # nome -> índice em self.tabela_subrotinas
+        self.tabela_subrotinas = []
+        self.subrotina_atual = None
+        self.slot_retorno = None
+
+    def gerar(self, ast):
+        self.visitar(ast)
+        return Programa(self.codigo, self.constantes, len(self.globais), self.tabela_subrotinas)
+
+    # --- AUXILIARES ---
+    def emitir(self, *valores):
+        self.codigo.extend(valores)
+
+    def emitir_salto(self, op):
+        """Emite um salto com destino a preencher; devolve a posição do operando."""
+        self.emitir(op, 0)
+        return len(self.codigo) - 1
+
+    def corrigir_salto(self, posicao, destino=None):
+        self.codigo[posicao] = len(self.codigo) if destino is None else destino
+
+    def constante(self, valor):
+        chave = (type(valor), valor)
+        if chave not in self._indice_constantes:
+            self._indice_constantes[chave] = len(self.constantes)
+            self.constantes.append(valor)
+        return self._indice_constantes[chave]
+
+    def resolver(self, nome):
+        """(LOAD, STORE, slot, tipo) da variável visível com esse nome."""
+        if self.locais is not None:
+            if nome in self.locais:
+                slot, tipo = self.locais[nome]
+                return LOAD_LOCAL, STORE_LOCAL, slot, tipo
+            sub = self.subrotina_atual
+            if sub.tipo_retorno is not None and nome == sub.nome:
+                return LOAD_LOCAL, STORE_LOCAL, self.slot_retorno, sub.tipo_retorno
+        slot, tipo = self.globais[nome]
+        return LOAD_GLOBAL, STORE_GLOBAL, slot, tipo
+
+    def declarar(self, tabela, nome, tipo):
+        tabela[nome] = (len(tabela) if tabela is self.globais else self._novo_slot_local(), tipo)
+
+    def _novo_slot_local(self):
+        slot = self.subrotina_atual.tamanho_quadro
+        self.subrotina_atual.tamanho_quadro += 1
+        return slot
+
+    # --- PROGRAMA E BLOCOS ---
+    def visitar_programa(self, no):
+        self._salto_principal = self.emitir_salto(JUMP)
+        yield no.corpo
+
+    def visitar_bloco(self, no):
+        principal = self.locais is None
+        tabela = self.globais if principal else self.locais
+        for decl in no.vars:
+            self.declarar(tabela, decl.nome, decl.tipo_var)
+        for sub in no.subrotinas:
+            yield sub
+        if principal:
+            self.corrigir_salto(self._salto_principal)
+        yield no.comandos
+        if principal:
+            self.emitir(HALT)
+
+    def _visitar_subrotina(self, no, tipo_retorno):
+        sub = Subrotina(no.nome, len(no.params), tipo_retorno)
+        sub.endereco = len(self.codigo)
+        self.subrotinas[no.nome] = len(self.tabela_subrotinas)
+        self.tabela_subrotinas.append(sub)
+
+        self.subrotina_atual = sub
+        self.locais = {p.nome: (i, p.tipo_var) for i, p in enumerate(no.params)}
+        if tipo_retorno is not None:
+            self.slot_retorno = self._novo_slot_local()
+        yield no.corpo
+        if tipo_retorno is not None:
+            self.emitir(RET_VAL, self.slot_retorno)
+        else:
+            self.emitir(RET)
+        self.subrotina_atual = None
+        self.locais = None
+        self.slot_retorno = None
+
+    def visitar_decl_proc(self, no):
+        yield from self._visitar_subrotina(no, None)
+
+    def visitar_decl_func(self, no):
+        yield from self._visitar_subrotina(no, no.retorno)
+
+    # --- COMANDOS ---
+    def visitar_seq_comandos(self, no):
+        while no:
+            if no.primeiro:
+                yield no.primeiro
+            no = no.resto
+
+    def visitar_cmd_atrib(self, no):
+        yield no.exp
+        _, store, slot, _ = self.resolver(no.nome)
+        self.emitir(store, slot)
+
+    def visitar_cmd_condicional(self, no):
+        yield no.condicao
+        salto_senao = self.emitir_salto(JUMP_IF_FALSE)
+        yield no.corpo
+        if no.senao is not None:
+            salto_fim = self.emitir_salto(JUMP)
+            self.corrigir_salto(salto_senao)
+            yield no.senao
+            self.corrigir_salto(salto_fim)
+        else:
+            self.corrigir_salto(salto_senao)
+
+    def visitar_cmd_repeticao(self, no):
+        inicio = len(self.codigo)
+        yield no.condicao
+        salto_fim = self.emitir_salto(JUMP_IF_FALSE)
+        yield no.corpo
+        self.emitir(JUMP, inicio)
+        self.corrigir_salto(salto_fim)
+
+    def visitar_chamada_proc(self, no):
+        for arg in no.args:
+            yield arg
+        self.emitir(CALL, self.subrotinas[no.nome])
+
+    def visitar_cmd_leitura(self, no):
+        for nome in no.vars:
+            _, store, slot, tipo = self.resolver(nome)
+            self.emitir(READ_BOOL if tipo == 'boolean' else READ_INT, store, slot)
+
+    def visitar_cmd_escrita(self, no):
+        # Os valores são todos calculados (e empilhados) antes de escrever a
+        # linha, então um 'write' dentro de uma função chamada aqui sai antes
+        booleanos = 0
+        for i, exp in enumerate(no.expressoes):
+            tipo = yield exp
+            if tipo == 'boolean':
+                booleanos |= 1 << i
+        self.emitir(WRITE, len(no.expressoes), self.constante(booleanos))
+
+    # --- EXPRESSÕES (devolvem o tipo) ---
+    def visitar_exp_binaria(self, no):
+        yield no.esq
+        if no.op in ('and', 'or'):
+            salto = self.emitir_salto(JUMP_IF_FALSE_OR_POP if no.op == 'and' else JUMP_IF_TRUE_OR_POP)
+            yield no.dir
+            self.corrigir_salto(salto)
+        else:
+            yield no.dir
+            self.emitir(OPERADORES_BINARIOS[no.op])
+        return TIPOS_OPERADORES[no.op]
+
+    def visitar_exp_unaria(self, no):
+        yield no.exp
+        if no.op == 'not':
+            self.emitir(NOT)
+            return 'boolean'
+        self.emitir(NEG)
+        return 'integer'
+
+    def visitar_exp_num(self, no):
+        self.emitir(PUSH_CONST, self.constante(no.valor))
+        return 'integer'
+
+    def visitar_logico(self, no):
+        self.emitir(PUSH_CONST, self.constante(no.valor == 'true'))
+        return 'boolean'
+
+    def visitar_exp_var(self, no):
+        load, _, slot, tipo = self.resolver(no.nome)
+        self.emitir(load, slot)
+        return tipo
+
+    def visitar_chamada_func(self, no):
+        for arg in no.args:
+            yield arg
+        indice = self.subrotinas[no.nome]
+        self.emitir(CALL, indice)
+        return self.tabela_subrotinas[indice].tipo_retorno
+
+
+def ler_itens(arquivo):
+    """Itens da entrada separados por espaço, lidos sob demanda."""
+    for linha in arquivo:
+        yield from linha.split()
+
+
+def ler_valor(itens, tipo):
+    """Próximo valor do tipo pedido ('integer' ou 'boolean') nos itens da entrada."""
+    item = next(itens, None)
+    if item is None:
+        raise ErroExecucao("Fim da entrada durante 'read'.")
+    if tipo == 'boolean':
+        if item not in ('true', 'false'):
+            raise ErroExecucao(f"Valor booleano inválido na entrada: '{item}'.")
+        return item == 'true'
+    try:
+        return int(item)
+    except ValueError:
+        raise ErroExecucao(f"Valor inteiro inválido na entrada: '{item}'.") from None
+
+
+def dividir(a, b):
+    if b == 0:
+        raise ErroExecucao("Divisão por zero.")
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+class MaquinaVirtual:
+    def __init__(self, programa, entrada=None, saida=None):
+        self.programa = programa
+        self.entrada = ler_itens(entrada if entrada is not None else sys.stdin)
+        self.saida = saida if saida is not None else sys.stdout
+        self.instrucoes = 0  # executadas na última chamada a executar()
+
+    def executar(self):
+        programa = self.programa
+        codigo = programa.codigo
+        constantes = programa.constantes
+        subrotinas = programa.subrotinas
+        escrever = self.saida.write
+
+        globais = [0] * programa.n_globais
+        locais = globais
+        pilha = []
+        empilhar = pilha.append
+        desempilhar = pilha.pop
+        chamadas = []  # (endereço de retorno, locais de quem chamou)
+        pc = 0
+        n = 0
+
+        # Os opcodes mais frequentes vêm primeiro na cadeia de testes
+        while True:
+            op = codigo[pc]
+            n += 1
+            if op == LOAD_LOCAL:
+                empilhar(locais[codigo[pc + 1]])
+                pc += 2
+            elif op == PUSH_CONST:
+                empilhar(constantes[codigo[pc + 1]])
+                pc += 2
+            elif op == LOAD_GLOBAL:
+                empilhar(globais[codigo[pc + 1]])
+                pc += 2
+            elif op == STORE_LOCAL:
+                locais[codigo[pc + 1]] = desempilhar()
+                pc += 2
+            elif op == STORE_GLOBAL:
+                globais[codigo[pc + 1]] = desempilhar()
+                pc += 2
+            elif op == JUMP_IF_FALSE:
+                pc = pc + 2 if desempilhar() else codigo[pc + 1]
+            elif op == JUMP:
+                pc = codigo[pc + 1]
+            elif op == ADD:
+                b = desempilhar()
+                pilha[-1] += b
+                pc += 1
+            elif op == SUB:
+                b = desempilhar()
+                pilha[-1] -= b
+                pc += 1
+            elif op == LT:
+                b = desempilhar()
+                pilha[-1] = pilha[-1] < b
+                pc += 1
+            elif op == LE:
+                b = desempilhar()
+                pilha[-1] = pilha[-1] <= b
+                pc += 1
+            elif op == GT:
+                b = desempilhar()
+                pilha[-1] = pilha[-1] > b
+                pc += 1
+            elif op == GE:
+                b = desempilhar()
+                pilha[-1] = pilha[-1] >= b
+                pc += 1
+            elif op == EQ:
+                b = desempilhar()
+                pilha[-1] = pilha[-1] == b
+                pc += 1
+            elif op == NE:
+                b = desempilhar()
+                pilha[-1] = pilha[-1] != b
+                pc += 1
+            elif op == MUL:
+                b = desempilhar()
+                pilha[-1] *= b
+                pc += 1
+            elif op == DIV:
+                b = desempilhar()
+                pilha[-1] = dividir(pilha[-1], b)
+                pc += 1
+            elif op == CALL:
+                if len(chamadas) == PROFUNDIDADE_MAXIMA:
+                    raise ErroExecucao("Recursão profunda demais.")
+                sub = subrotinas[codigo[pc + 1]]
+                novos = [0] * sub.tamanho_quadro
+                if sub.n_params:
+                    novos[:sub.n_params] = pilha[-sub.n_params:]
+                    del pilha[-sub.n_params:]
+                chamadas.append((pc + 2, locais))
+                locais = novos
+                pc = sub.endereco
+            elif op == RET_VAL:
+                empilhar(locais[codigo[pc + 1]])
+                pc, locais = chamadas.pop()
+            elif op == RET:
+                pc, locais = chamadas.pop()
+            elif op == JUMP_IF_FALSE_OR_POP:
+                if pilha[-1]:
+                    desempilhar()
+                    pc += 2
+                else:
+                    pc = codigo[pc + 1]
+            elif op == JUMP_IF_TRUE_OR_POP:
+                if pilha[-1]:
+                    pc = codigo[pc + 1]
+                else:
+                    desempilhar()
+                    pc += 2
+            elif op == NOT:
+                pilha[-1] = not pilha[-1]
+                pc += 1
+            elif op == NEG:
+                pilha[-1] = -pilha[-1]
+                pc += 1
+            elif op == WRITE:
+                quantos = codigo[pc + 1]
+                booleanos = constantes[codigo[pc + 2]]
+                valores = pilha[len(pilha) - quantos:]
+                del pilha[len(pilha) - quantos:]
+                escrever(' '.join([('true' if v else 'false') if booleanos >> i & 1 else str(v)
+                                   for i, v in enumerate(valores)]) + '\n')
+                pc += 3
+            elif op == READ_INT or op == READ_BOOL:
+                valor = ler_valor(self.entrada, 'boolean' if op == READ_BOOL else 'integer')
+                if codigo[pc + 1] == STORE_GLOBAL:
+                    globais[codigo[pc + 2]] = valor
+                else:
+                    locais[codigo[pc + 2]] = valor
+                pc += 3
+            elif op == HALT:
+                break
+            else:
+                raise ErroExecucao(f"Opcode inválido {op} na posição {pc}.")
+
+        self.instrucoes = n
+        return globais
+
+
+def compilar_bytecode(ast):
+    return GeradorBytecode().gerar(ast)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Como usar: python maquina.py programa.ras [-O] [--desmontar] [--estatisticas]")
+        sys.exit(1)
+
+    from compilador import SessaoCompilador, ErroSintatico
+
+    try:
+        resultado = SessaoCompilador().compilar_arquivo(sys.argv[1], otimizar='-O' in sys.argv)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{sys.argv[1]}' não encontrado.")
+        sys.exit(1)
+    except ErroSintatico as e:
+        print(e)
+        sys.exit(1)
+    if resultado.erros:
+        for e in resultado.erros:
+            print(e)
+        sys.exit(1)
+
+    programa = compilar_bytecode(resultado.ast)
+    if '--desmontar' in sys.argv:
+        print(programa.desmontar())
+        sys.exit(0)
+
+    maquina = MaquinaVirtual(programa)
+    inicio = time.perf_counter()
+    try:
+        maquina.executar()
+    except ErroExecucao as e:
+        sys.stdout.flush()
+        print(f"Erro de Execução: {e}", file=sys.stderr)
+        sys.exit(1)
+    decorrido = time.perf_counter() - inicio
+    if '--estatisticas' in sys.argv:
+        print(f"{maquina.instrucoes} instruções em {decorrido:.3f} s "
+              f"({maquina.instrucoes / decorrido:,.0f} instruções/s)", file=sys.stderr)
@@ -0,0 +1,226 @@
+# OTIMIZAÇÃO DA AST
+#
+# Como usar: python otimizador.py programa.ras [--json saida.json]
+#
+# Passe executado depois que o AnalisadorSemantico aceita o programa:
+#   - avalia em tempo de compilação exp_binaria/exp_unaria sobre exp_num/logico
+#     (e 'and'/'or' com o operando da esquerda constante, pelo curto-circuito);
+#   - troca 'if' com condição constante pelo ramo escolhido e remove 'while false';
+#   - achata as seq_comandos, descartando comandos vazios e blocos aninhados.
+# A AST é reescrita no lugar; nós novos (constantes dobradas) não têm anotações.
+
+import sys
+
+from arvore import ExpNum, Logico, SeqComandos, iterar_nos
+from maquina import dividir
+from visitante import Visitante
+
+ARITMETICOS = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    'div': dividir,
+}
+
+RELACIONAIS = {
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+def constante(no):
+    """Valor Python de um exp_num/logico, ou None se o nó não for constante."""
+    if no.tipo == 'exp_num':
+        return no.valor
+    if no.tipo == 'logico':
+        return no.valor == 'true'
+    return None
+
+
+def no_constante(valor, posicao=None):
+    if isinstance(valor, bool):
+        return Logico('true' if valor else 'false', posicao)
+    return ExpNum(valor, posicao)
+
+
+def encadear(comandos):
+    """Monta a cadeia seq_comandos de uma lista de comandos (vazia -> seq sem comandos)."""
+    resto = None
+    for comando in reversed(comandos):
+        resto = SeqComandos(comando, resto, comando.posicao)
+    return resto or SeqComandos(None, None)
+
+
+class Otimizador(Visitante):
+    """Cada visita devolve o nó que substitui o visitado (None remove um comando)."""
+    def __init__(self):
+        super().__init__()
+        self.dobradas = 0     # expressões avaliadas em tempo de compilação
+        self.eliminados = 0   # 'if'/'while' com condição constante resolvidos
+
+    def otimizar(self, ast):
+        """Otimiza a AST e devolve (nova raiz, número de nós removidos)."""
+        antes = sum(1 for _ in iterar_nos(ast))
+        ast = self.visitar(ast)
+        return ast, antes - sum(1 for _ in iterar_nos(ast))
+
+    # --- PROGRAMA E BLOCOS ---
+    def visitar_programa(self, no):
+        no.corpo = yield no.corpo
+        return no
+
+    def visitar_bloco(self, no):
+        for sub in no.subrotinas:
+            yield sub
+        no.comandos = yield no.comandos
+        return no
+
+    def visitar_decl_proc(self, no):
+        no.corpo = yield no.corpo
+        return no
+
+    def visitar_decl_func(self, no):
+        no.corpo = yield no.corpo
+        return no
+
+    # --- COMANDOS ---
+    def visitar_seq_comandos(self, no):
+        comandos = []
+        while no:
+            if no.primeiro:
+                comando = yield no.primeiro
+                if comando is None:
+                    pass
+                elif comando.tipo == 'seq_comandos':
+                    # Bloco aninhado (já achatado): os comandos entram na cadeia atual
+                    while comando:
+                        if comando.primeiro:
+                            comandos.append(comando.primeiro)
+                        comando = comando.resto
+                else:
+                    comandos.append(comando)
+            no = no.resto
+        return encadear(comandos)
+
+    def visitar_cmd_atrib(self, no):
+        no.exp = yield no.exp
+        return no
+
+    def visitar_cmd_condicional(self, no):
+        no.condicao = yield no.condicao
+        valor = constante(no.condicao)
+        if valor is not None:
+            self.eliminados += 1
+            ramo = no.corpo if valor else no.senao
+            return (yield ramo) if ramo is not None else None
+
+        no.corpo = (yield no.corpo) or SeqComandos(None, None)
+        if no.senao is not None:
+            no.senao = yield no.senao
+        return no
+
+    def visitar_cmd_repeticao(self, no):
+        no.condicao = yield no.condicao
+        if constante(no.condicao) is False:
+            self.eliminados += 1
+            return None
+        no.corpo = (yield no.corpo) or SeqComandos(None, None)
+        return no
+
+    def visitar_chamada_proc(self, no):
+        for i, arg in enumerate(no.args):
+            no.args[i] = yield arg
+        return no
+
+    def visitar_cmd_escrita(self, no):
+        for i, exp in enumerate(no.expressoes):
+            no.expressoes[i] = yield exp
+        return no
+
+    def visitar_cmd_leitura(self, no):
+        return no
+
+    # --- EXPRESSÕES ---
+    def visitar_exp_binaria(self, no):
+        no.esq = yield no.esq
+        no.dir = yield no.dir
+        op = no.op
+        esq = constante(no.esq)
+        dir = constante(no.dir)
+
+        if op in ('and', 'or'):
+            # Só a constante da esquerda decide sem avaliar a direita
+            if esq is None:
+                return no
+            self.dobradas += 1
+            if (op == 'and') == esq:
+                return no.dir          # 'true and x' / 'false or x' -> x
+            return no.esq              # 'false and x' -> false, 'true or x' -> true
+
+        if esq is None or dir is None:
+            return no
+        if op == 'div' and dir == 0:
+            return no  # a divisão por zero continua sendo um erro de execução
+        self.dobradas += 1
+        if op in ARITMETICOS:
+            return no_constante(ARITMETICOS[op](esq, dir), no.posicao)
+        return no_constante(RELACIONAIS[op](esq, dir), no.posicao)
+
+    def visitar_exp_unaria(self, no):
+        no.exp = yield no.exp
+        valor = constante(no.exp)
+        if valor is None:
+            return no
+        self.dobradas += 1
+        return no_constante(not valor if no.op == 'not' else -valor, no.posicao)
+
+    def visitar_exp_num(self, no):
+        return no
+
+    def visitar_logico(self, no):
+        return no
+
+    def visitar_exp_var(self, no):
+        return no
+
+    def visitar_chamada_func(self, no):
+        for i, arg in enumerate(no.args):
+            no.args[i] = yield arg
+        return no
+
+
+def otimizar(ast):
+    """Atalho: otimiza a AST e devolve (nova raiz, número de nós removidos)."""
+    return Otimizador().otimizar(ast)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from compilador import SessaoCompilador, ErroSintatico
+
+    argp = argparse.ArgumentParser(description="Otimiza um programa Rascal e informa quantos nós foram removidos")
+    argp.add_argument('programa', help="arquivo .ras")
+    argp.add_argument('--json', metavar='saida.json', help="grava a AST otimizada em JSON")
+    args = argp.parse_args()
+
+    try:
+        resultado = SessaoCompilador().compilar_arquivo(args.programa, otimizar=True)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{args.programa}' não encontrado.")
+        sys.exit(1)
+    except ErroSintatico as e:
+        print(e)
+        sys.exit(1)
+    if resultado.erros:
+        for e in resultado.erros:
+            print(e)
+        sys.exit(1)
+
+    print(f"Otimização concluída: {resultado.nos_removidos} nó(s) removido(s).")
+    if args.json:
+        resultado.salvar_json(args.json)
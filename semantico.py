@@ -1,9 +1,14 @@
 import sys
-import json
+
+from diagnosticos import Diagnostico, SEMANTICO
+from visitante import Visitante
 
 class TabelaSimbolos:
     def __init__(self):
         self.escopos = []
+        self.tamanhos = [] # Slots de variáveis ocupados em cada escopo (tamanho do quadro)
+        self.n_rotinas = 0 # Sub-rotinas numeradas na ordem de declaração
+        self.profundidade_maxima = 0 # Maior número de escopos abertos ao mesmo tempo
         self.entrar_escopo() 
         # Instala tipos primitivos
         self.definir('integer', 'tipo', None)
@@ -13,15 +18,35 @@ class TabelaSimbolos:
 
     def entrar_escopo(self):
         self.escopos.append({})
+        self.tamanhos.append(0)
+        self.profundidade_maxima = max(self.profundidade_maxima, len(self.escopos))
 
     def sair_escopo(self):
+        # Devolve o tamanho do quadro do escopo que foi fechado
         self.escopos.pop()
+        return self.tamanhos.pop()
+
+    def novo_slot(self):
+        slot = self.tamanhos[-1]
+        self.tamanhos[-1] += 1
+        return slot
 
-    def definir(self, nome, categoria, tipo, params=None):
+    def definir(self, nome, categoria, tipo, params=None, no=None):
         escopo_atual = self.escopos[-1]
         if nome in escopo_atual:
             return False
-        escopo_atual[nome] = {'categoria': categoria, 'tipo': tipo, 'params': params}
+        info = {'categoria': categoria, 'tipo': tipo, 'params': params}
+        if no is not None:
+            info['no'] = no # Nó da declaração (para 'ir para a definição' no servidor_lsp.py)
+        # Variáveis e parâmetros recebem um endereço fixo: (nível do escopo, slot no quadro)
+        if categoria in ('var', 'param'):
+            info['nivel'] = len(self.escopos) - 1
+            info['slot'] = self.novo_slot()
+        elif categoria in ('proc', 'func'):
+            info['nivel'] = len(self.escopos) - 1
+            info['indice'] = self.n_rotinas
+            self.n_rotinas += 1
+        escopo_atual[nome] = info
         return True
 
     def buscar(self, nome):
@@ -30,118 +55,128 @@ class TabelaSimbolos:
                 return escopo[nome]
         return None
 
-class AnalisadorSemantico:
+class AnalisadorSemantico(Visitante):
     def __init__(self):
+        super().__init__()
         self.tabela = TabelaSimbolos()
         self.erros = []
+        self.diagnosticos = [] # Os mesmos erros, como Diagnostico
         self.funcao_atual = None # Para verificar retorno de função
 
-    def erro(self, msg):
-        self.erros.append(f"Erro Semântico: {msg}")
-
-    def visitar(self, no):
-        if not no: return
-        
-        # Visita cada nó da lista
-        if isinstance(no, list):
-            for n in no:
-                self.visitar(n)
-            return
-
-        if not isinstance(no, dict): 
-            return
-        
-        metodo_nome = f"visitar_{no['tipo']}"
-        visitante = getattr(self, metodo_nome, self.visitar_generico)
-        return visitante(no)
-
-    def visitar_generico(self, no):
-        pass # Ignora nós desconhecidos ou sem tratamento específico
+    def erro(self, msg, no=None):
+        # 'no' é o nó onde o erro foi encontrado; a posição dele vai para o diagnóstico
+        mensagem = f"Erro Semântico: {msg}"
+        self.erros.append(mensagem)
+        self.diagnosticos.append(Diagnostico(SEMANTICO, mensagem, no.posicao if no is not None else None))
+
+    def endereco(self, nome, info):
+        # (nível, slot) de uma variável, parâmetro ou do retorno da função atual; None se não houver
+        if info and info['categoria'] in ['var', 'param']:
+            return (info['nivel'], info['slot'])
+        if self.funcao_atual and self.funcao_atual['nome'] == nome:
+            return self.funcao_atual['endereco']
+        return None
 
     # --- PROGRAMA E BLOCOS ---
     def visitar_programa(self, no):
-        self.tabela.definir(no['nome'], 'programa', None) # O identificador do programa deve ser instalado na tabela de símbolos na categoria "programa".
-        self.visitar(no['corpo']) # Visita o bloco principal
+        self.tabela.definir(no.nome, 'programa', None, no=no) # O identificador do programa deve ser instalado na tabela de símbolos na categoria "programa".
+        yield no.corpo # Visita o bloco principal
+        no.tamanho_quadro = self.tabela.tamanhos[0] # Número de variáveis globais
 
     def visitar_bloco(self, no):
         # Visita declarações de variáveis
-        if 'vars' in no and no['vars']:
-            self.visitar_decl_vars(no['vars'])
+        if no.vars:
+            self.visitar_decl_vars(no.vars)
         
         # Visita sub-rotinas
-        if 'subrotinas' in no and no['subrotinas']:
-            for sub in no['subrotinas']:
-                self.visitar(sub)
+        if no.subrotinas:
+            for sub in no.subrotinas:
+                yield sub
         
         # Visita comandos
-        if 'comandos' in no:
-            self.visitar(no['comandos'])
+        if no.comandos:
+            yield no.comandos
 
     # --- DECLARAÇÕES ---
     def visitar_decl_vars(self, lista_decls):
         for decl in lista_decls:
-            nome = decl['id']['nome']
-            tipo = decl['tipo_var']
+            nome = decl.nome
+            tipo = decl.tipo_var
             # Verifica redeclaração
-            if not self.tabela.definir(nome, 'var', tipo):
-                self.erro(f"Variável '{nome}' já declarada neste escopo.")
+            if not self.tabela.definir(nome, 'var', tipo, no=decl):
+                self.erro(f"Variável '{nome}' já declarada neste escopo.", decl)
+            else:
+                decl.endereco = self.endereco(nome, self.tabela.buscar(nome))
 
     def visitar_decl_proc(self, no):
-        nome = no['nome']
-        params = no['params'] # Lista de parâmetros
+        nome = no.nome
+        params = no.params # Lista de parâmetros
         
         # Extrai tipos dos parâmetros para assinatura
-        tipos_params = [p['tipo_var'] for p in params]
+        tipos_params = [p.tipo_var for p in params]
         
         # Instala procedimento no escopo atual (antes de entrar no novo)
-        if not self.tabela.definir(nome, 'proc', None, params=tipos_params):
-             self.erro(f"Procedimento '{nome}' já declarado.")
+        if not self.tabela.definir(nome, 'proc', None, params=tipos_params, no=no):
+             self.erro(f"Procedimento '{nome}' já declarado.", no)
+        else:
+            info = self.tabela.buscar(nome)
+            no.endereco = (info['nivel'], info['indice'])
 
         # Novo escopo para a sub-rotina
         self.tabela.entrar_escopo()
         
         # Instala parâmetros como variáveis locais
         for p in params:
-            p_nome = p['id']['nome']
-            p_tipo = p['tipo_var']
-            self.tabela.definir(p_nome, 'param', p_tipo)
+            p_nome = p.nome
+            p_tipo = p.tipo_var
+            if self.tabela.definir(p_nome, 'param', p_tipo, no=p):
+                p.endereco = self.endereco(p_nome, self.tabela.buscar(p_nome))
 
-        self.visitar(no['corpo'])
-        self.tabela.sair_escopo()
+        yield no.corpo
+        no.tamanho_quadro = self.tabela.sair_escopo()
 
     def visitar_decl_func(self, no):
-        nome = no['nome']
-        tipo_retorno = no['retorno']
-        params = no['params']
-        tipos_params = [p['tipo_var'] for p in params]
+        nome = no.nome
+        tipo_retorno = no.retorno
+        params = no.params
+        tipos_params = [p.tipo_var for p in params]
 
-        if not self.tabela.definir(nome, 'func', tipo_retorno, params=tipos_params):
-            self.erro(f"Função '{nome}' já declarada.")
+        if not self.tabela.definir(nome, 'func', tipo_retorno, params=tipos_params, no=no):
+            self.erro(f"Função '{nome}' já declarada.", no)
+        else:
+            info = self.tabela.buscar(nome)
+            no.endereco = (info['nivel'], info['indice'])
 
         self.tabela.entrar_escopo()
         
-        self.funcao_atual = {'nome': nome, 'tipo': tipo_retorno}
-        
         for p in params:
-            self.tabela.definir(p['id']['nome'], 'param', p['tipo_var'])
+            if self.tabela.definir(p.nome, 'param', p.tipo_var, no=p):
+                p.endereco = self.endereco(p.nome, self.tabela.buscar(p.nome))
+
+        # O valor de retorno ocupa o slot seguinte aos parâmetros
+        no.slot_retorno = self.tabela.novo_slot()
+        self.funcao_atual = {'nome': nome, 'tipo': tipo_retorno,
+                             'endereco': (len(self.tabela.escopos) - 1, no.slot_retorno)}
             
-        self.visitar(no['corpo'])
+        yield no.corpo
         
         self.funcao_atual = None
-        self.tabela.sair_escopo()
+        no.tamanho_quadro = self.tabela.sair_escopo()
 
     # --- COMANDOS ---
     def visitar_seq_comandos(self, no):
-        if no['primeiro']:
-            self.visitar(no['primeiro'])
-        if no['resto']:
-            self.visitar(no['resto'])
+        # Percorre a cadeia de 'resto' em laço, sem empilhar um nível por comando
+        while no:
+            if no.primeiro:
+                yield no.primeiro
+            no = no.resto
 
     def visitar_cmd_atrib(self, no):
-        nome = no['id']['nome']
-        tipo_exp = self.visitar(no['exp']) # Avalia expressão
+        nome = no.nome
+        tipo_exp = yield no.exp # Avalia expressão
         
         info = self.tabela.buscar(nome)
+        no.endereco = self.endereco(nome, info)
         
         # Verifica se é variável declarada
         if info:
@@ -150,84 +185,88 @@ class AnalisadorSemantico:
                  if self.funcao_atual and self.funcao_atual['nome'] == nome:
                      tipo_variavel = self.funcao_atual['tipo']
                  else:
-                    self.erro(f"Atribuição inválida para '{nome}'. Não é uma variável.")
+                    self.erro(f"Atribuição inválida para '{nome}'. Não é uma variável.", no)
                     return
             else:
                 tipo_variavel = info['tipo']
                 
             # Verifica compatibilidade de tipos
             if tipo_variavel != tipo_exp:
-                self.erro(f"Tipos incompatíveis na atribuição para '{nome}'. Esperado {tipo_variavel}, encontrado {tipo_exp}.")
+                self.erro(f"Tipos incompatíveis na atribuição para '{nome}'. Esperado {tipo_variavel}, encontrado {tipo_exp}.", no)
         else:
             # Verifica se é atribuição de retorno de função (nome da função) dentro dela mesma
             if self.funcao_atual and self.funcao_atual['nome'] == nome:
                  if self.funcao_atual['tipo'] != tipo_exp:
-                     self.erro(f"Tipo de retorno incorreto para função '{nome}'.")
+                     self.erro(f"Tipo de retorno incorreto para função '{nome}'.", no)
             else:
-                self.erro(f"Identificador '{nome}' não declarado.")
+                self.erro(f"Identificador '{nome}' não declarado.", no)
 
     def visitar_cmd_condicional(self, no):
-        tipo_cond = self.visitar(no['condicao'])
+        tipo_cond = yield no.condicao
         # Condição deve ser booleana
         if tipo_cond != 'boolean':
-            self.erro("Condição do 'if' deve ser boolean.")
-        self.visitar(no['corpo'])
-        if 'senao' in no:
-            self.visitar(no['senao'])
+            self.erro("Condição do 'if' deve ser boolean.", no.condicao)
+        yield no.corpo
+        if no.senao is not None:
+            yield no.senao
 
     def visitar_cmd_repeticao(self, no):
-        tipo_cond = self.visitar(no['condicao'])
+        tipo_cond = yield no.condicao
         if tipo_cond != 'boolean':
-            self.erro("Condição do 'while' deve ser boolean.")
-        self.visitar(no['corpo'])
+            self.erro("Condição do 'while' deve ser boolean.", no.condicao)
+        yield no.corpo
 
     def visitar_chamada_proc(self, no):
-        nome = no['nome']
-        args = no['args'] # Lista de expressões
+        nome = no.nome
+        args = no.args # Lista de expressões
         info = self.tabela.buscar(nome)
         
         # Procedimento deve estar declarado
         if not info or info['categoria'] != 'proc':
-            self.erro(f"Procedimento '{nome}' não declarado.")
+            self.erro(f"Procedimento '{nome}' não declarado.", no)
             return
+        no.endereco = (info['nivel'], info['indice'])
 
         params_formais = info['params']
         # Número de argumentos
         if len(args) != len(params_formais):
-            self.erro(f"Chamada '{nome}' esperava {len(params_formais)} argumentos, recebeu {len(args)}.")
+            self.erro(f"Chamada '{nome}' esperava {len(params_formais)} argumentos, recebeu {len(args)}.", no)
             return
 
         # Tipos dos argumentos
         for i, arg_exp in enumerate(args):
-            tipo_arg = self.visitar(arg_exp)
+            tipo_arg = yield arg_exp
             if tipo_arg != params_formais[i]:
-                self.erro(f"Argumento {i+1} de '{nome}' incompatível. Esperado {params_formais[i]}, encontrado {tipo_arg}.")
+                self.erro(f"Argumento {i+1} de '{nome}' incompatível. Esperado {params_formais[i]}, encontrado {tipo_arg}.", arg_exp)
 
     def visitar_cmd_leitura(self, no):
         # Argumentos devem ser variáveis visíveis
-        for var_node in no['vars']:
-            nome = var_node['nome']
+        no.enderecos = []
+        for nome in no.vars:
             info = self.tabela.buscar(nome)
             if not info or info['categoria'] not in ['var', 'param']:
-                self.erro(f"Variável '{nome}' não declarada para leitura.")
+                self.erro(f"Variável '{nome}' não declarada para leitura.", no)
+                no.enderecos.append(None)
+            else:
+                no.enderecos.append(self.endereco(nome, info))
 
     def visitar_cmd_escrita(self, no):
         # Argumentos expressões válidas
-        for exp in no['expressoes']:
-            self.visitar(exp)
+        for exp in no.expressoes:
+            yield exp
 
     # --- EXPRESSÕES (Retornam o tipo) ---
     def visitar_exp_binaria(self, no):
-        esq = self.visitar(no['esq'])
-        dir = self.visitar(no['dir'])
-        op = no['op']
+        esq = yield no.esq
+        dir = yield no.dir
+        op = no.op
         
         # Aritmética
         if op in ['+', '-', '*', 'div']:
             if esq == 'integer' and dir == 'integer':
                 return 'integer'
             else:
-                self.erro(f"Operação '{op}' requer inteiros.")
+                self.erro(f"Operação '{op}' requer inteiros.", no)
                 return 'integer'
         
         # Relacional
@@ -235,7 +274,7 @@ class AnalisadorSemantico:
             if esq == 'integer' and dir == 'integer':
                 return 'boolean'
             else:
-                self.erro(f"Operador relacional '{op}' requer operandos inteiros.")
+                self.erro(f"Operador relacional '{op}' requer operandos inteiros.", no)
                 return 'boolean'
 
         # (des)Igualdade
@@ -243,7 +282,7 @@ class AnalisadorSemantico:
             if esq == dir:
                 return 'boolean'
             else:
-                self.erro(f"Operador '{op}' requer operandos do mesmo tipo.")
+                self.erro(f"Operador '{op}' requer operandos do mesmo tipo.", no)
                 return 'boolean'
 
         # Lógica
@@ -251,7 +290,7 @@ class AnalisadorSemantico:
             if esq == 'boolean' and dir == 'boolean':
                 return 'boolean'
             else:
-                self.erro(f"Operação '{op}' requer booleanos.")
+                self.erro(f"Operação '{op}' requer booleanos.", no)
                 return 'boolean'
 
     def visitar_exp_num(self, no):
@@ -261,66 +300,141 @@ class AnalisadorSemantico:
         return 'boolean'
 
     def visitar_exp_var(self, no):
-        nome = no['id']['nome']
+        nome = no.nome
         info = self.tabela.buscar(nome)
         if not info:
-            self.erro(f"Variável '{nome}' não declarada.")
+            self.erro(f"Variável '{nome}' não declarada.", no)
             return 'integer' # dummy
+        no.endereco = self.endereco(nome, info)
         return info['tipo']
 
     def visitar_chamada_func(self, no):
-        nome = no['nome']
-        args = no['args']
+        nome = no.nome
+        args = no.args
         info = self.tabela.buscar(nome)
         
         if not info:
-            self.erro(f"Função '{nome}' não declarada.")
+            self.erro(f"Função '{nome}' não declarada.", no)
             return 'integer'
 
         if info['categoria'] != 'func':
-            self.erro(f"Uso inválido do procedimento '{nome}' em uma expressão. Procedimentos não retornam valor.")
+            self.erro(f"Uso inválido do procedimento '{nome}' em uma expressão. Procedimentos não retornam valor.", no)
             return 'integer'
 
         if not info or info['categoria'] != 'func':
-            self.erro(f"Função '{nome}' não declarada.")
+            self.erro(f"Função '{nome}' não declarada.", no)
             return 'integer'
+        no.endereco = (info['nivel'], info['indice'])
 
         params_formais = info['params']
         if len(args) != len(params_formais):
-            self.erro(f"Função '{nome}' esperava {len(params_formais)} argumentos.")
+            self.erro(f"Função '{nome}' esperava {len(params_formais)} argumentos.", no)
             return info['tipo']
 
         for i, arg_exp in enumerate(args):
-            tipo_arg = self.visitar(arg_exp)
+            tipo_arg = yield arg_exp
             if tipo_arg != params_formais[i]:
-                self.erro(f"Argumento {i+1} de '{nome}' incompatível.")
+                self.erro(f"Argumento {i+1} de '{nome}' incompatível.", arg_exp)
         
         return info['tipo']
 
     def visitar_exp_unaria(self, no):
-        tipo = self.visitar(no['exp'])
-        op = no['op']
+        tipo = yield no.exp
+        op = no.op
         if op == 'not':
-            if tipo != 'boolean': self.erro("'not' requer boolean.")
+            if tipo != 'boolean': self.erro("'not' requer boolean.", no)
             return 'boolean'
         if op == '-':
-            if tipo != 'integer': self.erro("'-' unário requer integer.")
+            if tipo != 'integer': self.erro("'-' unário requer integer.", no)
             return 'integer'
 
+
+class AnalisadorSemanticoCompartilhado(AnalisadorSemantico):
+    """
+    Para a AST com expressões compartilhadas (yacc.analisar com compartilhar=True):
+    o tipo de cada exp_binaria/exp_unaria é calculado uma vez por nó e
+    reusado nas outras ocorrências, sem verificar a subárvore de novo. Um
+    erro numa expressão repetida é reportado uma vez, na primeira ocorrência.
+    """
+    def __init__(self):
+        super().__init__()
+        self.tipos = {} # nó -> tipo
+
+    def visitar_exp_binaria(self, no):
+        if no not in self.tipos:
+            self.tipos[no] = yield from AnalisadorSemantico.visitar_exp_binaria(self, no)
+        return self.tipos[no]
+
+    def visitar_exp_unaria(self, no):
+        if no not in self.tipos:
+            self.tipos[no] = yield from AnalisadorSemantico.visitar_exp_unaria(self, no)
+        return self.tipos[no]
+
 # Main
+# Sem argumentos lê o ast.json gerado pelo yacc.py; com o caminho de um
+# programa .ras, compila em memória (léxico, sintático e semântico).
+# Com '--json arquivo.json', grava a AST anotada com os endereços resolvidos.
 if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    saida_json = None
+    if '--json' in argumentos:
+        posicao = argumentos.index('--json')
+        saida_json = argumentos[posicao + 1]
+        del argumentos[posicao:posicao + 2]
+    arquivo_ast = "ast.json"
+    if '--ast' in argumentos:
+        # AST gravada pelo yacc.py, em JSON ou no formato binário (--binario)
+        posicao = argumentos.index('--ast')
+        arquivo_ast = argumentos[posicao + 1]
+        del argumentos[posicao:posicao + 2]
+    diretorio_perfil = None
+    if '--profile' in argumentos:
+        posicao = argumentos.index('--profile')
+        diretorio_perfil = argumentos[posicao + 1]
+        del argumentos[posicao:posicao + 2]
+    estatisticas = '--stats' in argumentos or diretorio_perfil is not None
+    lexer_dfa = '--lexer-dfa' in argumentos
+    argumentos = [a for a in argumentos if a not in ('--stats', '--lexer-dfa')]
     try:
-        with open("ast.json", "r") as f:
-            ast = json.load(f)
-        
-        analisador = AnalisadorSemantico()
-        analisador.visitar(ast)
+        if argumentos and estatisticas:
+            # Relatório JSON por fase (ver estatisticas.py) no lugar das mensagens
+            from compilador import SessaoCompilador
+            from estatisticas import estatisticas_compilacao, imprimir_estatisticas
+
+            stats = estatisticas_compilacao(caminho=argumentos[0], diretorio_perfil=diretorio_perfil,
+                                            saida_json=saida_json, sessao=SessaoCompilador(lexer_dfa))
+            stats['arquivo'] = argumentos[0]
+            imprimir_estatisticas(stats)
+            sys.exit(0 if stats['status'] == 'ok' else 1)
+        if argumentos:
+            from compilador import compilar_fonte, ErroSintatico
+
+            with open(argumentos[0], "r") as f:
+                try:
+                    resultado = compilar_fonte(f.read(), saida_json=saida_json, lexer_dfa=lexer_dfa)
+                except ErroSintatico as e:
+                    print(e)
+                    sys.exit(1)
+            erros = resultado.erros
+        else:
+            from arvore_binaria import carregar_ast, salvar_json
+
+            ast = carregar_ast(arquivo_ast)
+
+            analisador = AnalisadorSemantico()
+            analisador.visitar(ast)
+            erros = analisador.erros
+            if saida_json:
+                salvar_json(ast, saida_json)
         
-        if analisador.erros:
-            for e in analisador.erros:
+        if erros:
+            for e in erros:
                 print(e)
         else:
             print("Análise Semântica concluída com sucesso! Nenhum erro encontrado.")
             
-    except FileNotFoundError:
-        print("Arquivo ast.json não encontrado. Execute o yacc.py primeiro.")
\ No newline at end of file
+    except FileNotFoundError as e:
+        if argumentos:
+            print(f"Erro: Arquivo '{e.filename}' não encontrado.")
+        else:
+            print(f"Arquivo {arquivo_ast} não encontrado. Execute o yacc.py primeiro.")
\ No newline at end of file
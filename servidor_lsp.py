@@ -0,0 +1,545 @@
+# SERVIDOR DE LINGUAGEM (LSP)
+#
+# Como usar: python servidor_lsp.py
+#
+# Conversa com o editor pela entrada e saída padrão, no protocolo LSP
+# (JSON-RPC com cabeçalho Content-Length). Publica os diagnósticos léxicos,
+# sintáticos e semânticos de cada documento aberto e responde a 'ir para a
+# definição' e 'hover' com os símbolos da TabelaSimbolos.
+#
+# Cada documento é dividido em trechos: o cabeçalho (nome do programa e
+# variáveis globais), cada sub-rotina (de 'procedure'/'function' até o ';'
+# depois dela) e o corpo principal. Uma alteração dentro de uma sub-rotina
+# ou do corpo principal analisa de novo só esse trecho: os seus tokens são
+# passados ao parser entre tokens sintéticos ('program p;' antes e, numa
+# sub-rotina, 'begin end.' depois), com as posições do texto inteiro. A
+# verificação semântica do trecho parte da TabelaSimbolos com as globais e as
+# sub-rotinas declaradas antes dele. Se a assinatura da sub-rotina mudar,
+# todos os trechos são verificados de novo (sem analisar o texto de novo);
+# uma alteração no cabeçalho, ou que junte ou separe sub-rotinas, analisa o
+# documento inteiro.
+#
+# As posições dos nós e diagnósticos de um trecho são as do texto em que ele
+# foi analisado; 'deslocamento' as leva para o texto atual, então uma
+# alteração só soma o tamanho inserido aos trechos seguintes. Enquanto um
+# trecho tem erro de sintaxe, os símbolos dele continuam os da última
+# análise sem erro. As mensagens léxicas e sintáticas citam a linha do erro;
+# ela é refeita a partir da posição atual ao publicar. As colunas do
+# protocolo são contadas em caracteres (o mesmo que UTF-16 para texto ASCII).
+
+import json
+import re
+import sys
+from bisect import bisect_right
+
+from ply.lex import LexToken
+
+from compilador import SessaoCompilador
+from diagnosticos import Diagnostico, TabelaLinhas, SINTATICO
+from semantico import AnalisadorSemantico, TabelaSimbolos
+from yacc import analisar, reserved, ErroSintatico
+
+IDENTIFICADOR = re.compile(r'[A-Za-z][A-Za-z_0-9]*')
+PALAVRA = re.compile(r'\w+|\S')  # extensão de um diagnóstico: o token na posição
+LINHA_MENSAGEM = re.compile(r'(na [Ll]inha )\d+')  # nas mensagens dos erros léxicos e sintáticos
+
+# Erros do JSON-RPC
+METODO_DESCONHECIDO = -32601
+ERRO_INTERNO = -32603
+
+
+class TabelaDocumento(TabelaSimbolos):
+    """TabelaSimbolos que guarda o escopo de cada sub-rotina ao fechá-lo."""
+    def __init__(self):
+        super().__init__()
+        self.fechados = []
+
+    def sair_escopo(self):
+        self.fechados.append(self.escopos[-1])
+        return super().sair_escopo()
+
+
+def assinatura(sub):
+    return sub.tipo, sub.nome, [p.tipo_var for p in sub.params], getattr(sub, 'retorno', None)
+
+
+class Trecho:
+    __slots__ = ('inicio', 'fim', 'deslocamento', 'no', 'diagnosticos', 'semanticos', 'escopo', 'quebrado')
+
+    def __init__(self, inicio, fim, no=None):
+        self.inicio = inicio
+        self.fim = fim
+        self.deslocamento = 0   # posição atual - posição na análise do trecho
+        self.no = no            # decl_proc/decl_func, o seq_comandos do corpo principal ou None (cabeçalho)
+        self.diagnosticos = []  # léxicos e sintáticos
+        self.semanticos = []
+        self.escopo = None      # escopo local da sub-rotina, da TabelaSimbolos
+        self.quebrado = False   # a última análise do trecho teve erro de sintaxe
+
+
+class Documento:
+    def __init__(self, sessao, texto):
+        self.sessao = sessao
+        self.texto = texto
+        self.linhas = TabelaLinhas(texto)
+        self.ast = None
+        self.trechos = []       # cabeçalho, sub-rotinas e corpo principal, em ordem
+        self.erros = []         # diagnósticos da análise completa, quando ela falha
+        self.globais = {}       # escopo global da TabelaSimbolos
+        self.cabecalho = None   # (escopo global, slots) depois das variáveis globais
+        self.alterados = set()  # índices dos trechos a analisar de novo
+        self.completa = False   # a próxima atualização analisa o documento inteiro
+        self.analisar_tudo()
+
+    # --- ALTERAÇÕES ---
+    def offset(self, linha, caractere):
+        """Posição no texto de (linha, caractere) do protocolo, a partir de 0."""
+        inicios = self.linhas.inicios
+        if linha >= len(inicios):
+            return len(self.texto)
+        return min(inicios[linha] + caractere, len(self.texto))
+
+    def editar(self, inicio, fim, novo):
+        """Troca texto[inicio:fim] por 'novo'; a análise fica para atualizar()."""
+        self.texto = self.texto[:inicio] + novo + self.texto[fim:]
+        self.linhas = TabelaLinhas(self.texto)
+        diferenca = len(novo) - (fim - inicio)
+        k = bisect_right(self.inicios_trechos, inicio) - 1
+        if self.completa or not self.trechos or k <= 0 or fim > self.trechos[k].fim:
+            self.completa = True
+            return
+        self.alterados.add(k)
+        self.trechos[k].fim += diferenca
+        for trecho in self.trechos[k + 1:]:
+            trecho.inicio += diferenca
+            trecho.fim += diferenca
+            trecho.deslocamento += diferenca
+        self.inicios_trechos = [t.inicio for t in self.trechos]
+
+    def substituir(self, texto):
+        self.texto = texto
+        self.linhas = TabelaLinhas(texto)
+        self.completa = True
+
+    def atualizar(self):
+        if self.completa:
+            self.analisar_tudo()
+            return
+        assinaturas = [assinatura(t.no) for t in self.trechos[1:-1]]
+        for k in sorted(self.alterados):
+            if not self.analisar_trecho(k):
+                self.analisar_tudo()
+                return
+        alterados, self.alterados = self.alterados, set()
+        if [assinatura(t.no) for t in self.trechos[1:-1]] != assinaturas:
+            self.verificar_tudo()
+        else:
+            for k in alterados:
+                self.verificar_trecho(k)
+
+    # --- ANÁLISE SINTÁTICA ---
+    def analisar_tudo(self):
+        self.completa = False
+        self.alterados = set()
+        lexer = self.sessao.lexer
+        try:
+            ast = analisar(self.sessao.parser, lexer, self.texto)
+        except ErroSintatico as e:
+            self.ast = None
+            self.trechos = []
+            self.inicios_trechos = []
+            self.erros = e.diagnosticos
+            return
+        self.ast = ast
+        self.erros = []
+        lexicos = list(lexer.diagnosticos)
+
+        subs = ast.corpo.subrotinas
+        if subs:
+            inicio_corpo = self._fim_subrotina(subs[-1].posicao)
+            limites = [0] + [s.posicao for s in subs] + [inicio_corpo, len(self.texto)]
+        else:
+            inicio_corpo = self._inicio_corpo()
+            limites = [0, inicio_corpo, len(self.texto)]
+        nos = [None] + subs + [ast.corpo.comandos]
+        self.trechos = [Trecho(limites[i], limites[i + 1], no) for i, no in enumerate(nos)]
+        self.inicios_trechos = [t.inicio for t in self.trechos]
+        for d in lexicos:
+            k = max(0, bisect_right(self.inicios_trechos, d.posicao or 0) - 1)
+            self.trechos[k].diagnosticos.append(d)
+        self.verificar_tudo()
+
+    def _fim_subrotina(self, inicio):
+        """Posição logo depois do ';' que termina a sub-rotina que começa em 'inicio'."""
+        profundidade = 0
+        for tok in self._tokens(inicio):
+            if tok.type == 'BEGIN':
+                profundidade += 1
+            elif tok.type == 'END':
+                profundidade -= 1
+                if profundidade == 0:
+                    break
+        for tok in self._tokens_restantes:
+            if tok.type == 'PONTOV':
+                return inicio + tok.lexpos + 1
+        return len(self.texto)
+
+    def _inicio_corpo(self):
+        """Posição do 'begin' do corpo principal num programa sem sub-rotinas."""
+        for tok in self._tokens(0):
+            if tok.type == 'BEGIN':
+                return tok.lexpos
+        return len(self.texto)
+
+    def _tokens(self, inicio):
+        lexer = self.sessao.lexer
+        lexer.input(self.texto[inicio:])
+        self._tokens_restantes = iter(lexer.token, None)
+        return self._tokens_restantes
+
+    def _tokens_trecho(self, trecho, principal):
+        """Tokens do trecho, com posições do texto inteiro, entre os tokens sintéticos."""
+        linha = self.linhas.linha_coluna(trecho.inicio)[0]
+
+        def sintetico(tipo, valor, posicao=trecho.inicio):
+            tok = LexToken()
+            tok.type, tok.value, tok.lineno, tok.lexpos = tipo, valor, linha, posicao
+            return tok
+
+        yield sintetico('PROGRAM', 'program')
+        yield sintetico('IDENTIFICADOR', self.ast.nome)
+        yield sintetico('PONTOV', ';')
+        lexer = self.sessao.lexer
+        lexer.lineno = linha
+        lexer.deslocamento = trecho.inicio  # lexpos dos erros léxicos é relativo ao trecho
+        lexer.input(self.texto[trecho.inicio:trecho.fim])
+        for tok in iter(lexer.token, None):
+            tok.lexpos += trecho.inicio
+            yield tok
+        if not principal:
+            # No fim do trecho: um erro nesses tokens fica depois de todo o texto dele
+            yield sintetico('BEGIN', 'begin', trecho.fim)
+            yield sintetico('END', 'end', trecho.fim)
+            yield sintetico('PONTO', '.', trecho.fim)
+
+    def analisar_trecho(self, k):
+        """
+        Analisa de novo o trecho k (uma sub-rotina ou o corpo principal).
+        Devolve False se o texto do trecho não é mais uma sub-rotina só (ou um
+        corpo só), e o documento precisa ser analisado inteiro. Um erro de
+        sintaxe nos tokens sintéticos do fim ou no fim do arquivo também
+        indica isso: a sub-rotina não termina mais onde o trecho termina
+        (um 'end' apagado junta duas sub-rotinas, por exemplo).
+        """
+        trecho = self.trechos[k]
+        principal = k == len(self.trechos) - 1
+        lexer = self.sessao.lexer
+        lexer.linhas = self.linhas
+        tokens = self._tokens_trecho(trecho, principal)
+        try:
+            programa = analisar(self.sessao.parser, lexer, tokenfunc=lambda: next(tokens, None))
+        except ErroSintatico as e:
+            if any(d.fase == SINTATICO and (d.posicao is None or d.posicao >= trecho.fim) for d in e.diagnosticos):
+                return False
+            # Os símbolos continuam os da última análise sem erro
+            trecho.quebrado = True
+            trecho.diagnosticos = [self._no_trecho(d, trecho) for d in e.diagnosticos]
+            trecho.semanticos = []
+            return True
+
+        corpo = programa.corpo
+        if corpo.vars or len(corpo.subrotinas) != (0 if principal else 1):
+            return False
+        if principal:
+            trecho.no = self.ast.corpo.comandos = corpo.comandos
+        else:
+            trecho.no = self.ast.corpo.subrotinas[k - 1] = corpo.subrotinas[0]
+        trecho.deslocamento = 0
+        trecho.quebrado = False
+        trecho.diagnosticos = list(lexer.diagnosticos)
+        return True
+
+    @staticmethod
+    def _no_trecho(diagnostico, trecho):
+        if diagnostico.posicao is None:
+            return diagnostico
+        return Diagnostico(diagnostico.fase, diagnostico.mensagem, diagnostico.posicao - trecho.deslocamento)
+
+    # --- ANÁLISE SEMÂNTICA ---
+    def _analisador(self, ate):
+        """AnalisadorSemantico com as globais e as sub-rotinas anteriores ao trecho 'ate' declaradas."""
+        analisador = AnalisadorSemantico()
+        tabela = analisador.tabela = TabelaDocumento()
+        escopo, slots = self.cabecalho
+        tabela.escopos[0] = dict(escopo)
+        tabela.tamanhos[0] = slots
+        for trecho in self.trechos[1:ate]:
+            sub = trecho.no
+            if sub.tipo == 'decl_proc':
+                tabela.definir(sub.nome, 'proc', None, params=[p.tipo_var for p in sub.params], no=sub)
+            else:
+                tabela.definir(sub.nome, 'func', sub.retorno, params=[p.tipo_var for p in sub.params], no=sub)
+        return analisador
+
+    def verificar_tudo(self):
+        """Verifica todos os trechos na ordem do programa, como visitar_programa."""
+        analisador = AnalisadorSemantico()
+        tabela = analisador.tabela = TabelaDocumento()
+        tabela.definir(self.ast.nome, 'programa', None, no=self.ast)
+        analisador.visitar_decl_vars(self.ast.corpo.vars)
+        self.cabecalho = (dict(tabela.escopos[0]), tabela.tamanhos[0])
+        self.trechos[0].semanticos = analisador.diagnosticos
+        for trecho in self.trechos[1:]:
+            analisador.diagnosticos = []
+            analisador.visitar(trecho.no)
+            trecho.semanticos = [] if trecho.quebrado else analisador.diagnosticos
+            if trecho.no.tipo != 'seq_comandos':
+                trecho.escopo = tabela.fechados[-1]
+        self.globais = tabela.escopos[0]
+
+    def verificar_trecho(self, k):
+        trecho = self.trechos[k]
+        if trecho.quebrado:
+            return
+        analisador = self._analisador(k)
+        analisador.visitar(trecho.no)
+        trecho.semanticos = analisador.diagnosticos
+        if trecho.no.tipo != 'seq_comandos':
+            trecho.escopo = analisador.tabela.fechados[-1]
+            # A assinatura não mudou, mas o nó da declaração é outro
+            info = self.globais.get(trecho.no.nome)
+            if info is not None and analisador.tabela.escopos[0].get(trecho.no.nome, {}).get('no') is trecho.no:
+                info['no'] = trecho.no
+
+    # --- CONSULTAS ---
+    def diagnosticos(self):
+        """(posição no texto atual, mensagem) de cada diagnóstico."""
+        if self.ast is None:
+            return [(d.posicao, d.mensagem) for d in self.erros]
+        saida = []
+        for trecho in self.trechos:
+            for d in trecho.diagnosticos:
+                if d.posicao is None:
+                    saida.append((None, d.mensagem))
+                    continue
+                # A linha na mensagem é a da análise do trecho, que pode ter mudado de lugar
+                posicao = d.posicao + trecho.deslocamento
+                linha = self.linhas.linha_coluna(posicao)[0]
+                saida.append((posicao, LINHA_MENSAGEM.sub(rf'\g<1>{linha}', d.mensagem, count=1)))
+            for d in trecho.semanticos:
+                saida.append((None if d.posicao is None else d.posicao + trecho.deslocamento, d.mensagem))
+        return saida
+
+    def trecho_em(self, posicao):
+        return self.trechos[max(0, bisect_right(self.inicios_trechos, posicao) - 1)]
+
+    def simbolo(self, posicao):
+        """(nome, info da TabelaSimbolos, trecho) do identificador na posição, ou None."""
+        if self.ast is None:
+            return None
+        inicio = posicao
+        while inicio > 0 and (self.texto[inicio - 1].isalnum() or self.texto[inicio - 1] == '_'):
+            inicio -= 1
+        m = IDENTIFICADOR.match(self.texto, inicio)
+        if m is None or m.end() < posicao or m.group() in reserved:
+            return None
+        nome = m.group()
+        trecho = self.trecho_em(posicao)
+        info = trecho.escopo.get(nome) if trecho.escopo is not None else None
+        if info is None:
+            info = self.globais.get(nome)
+            if info is None or 'no' not in info:
+                return None
+            # Globais e o programa estão no cabeçalho; cada sub-rotina, no seu trecho
+            trecho = next((t for t in self.trechos if t.no is info['no']), self.trechos[0])
+        return nome, info, trecho
+
+    def definicao(self, posicao):
+        """Posição do nome na declaração do identificador em 'posicao', ou None."""
+        simbolo = self.simbolo(posicao)
+        if simbolo is None:
+            return None
+        nome, info, trecho = simbolo
+        inicio = info['no'].posicao + trecho.deslocamento
+        m = re.compile(r'\b' + nome + r'\b').search(self.texto, inicio)
+        return m.start() if m else inicio
+
+    def descricao(self, posicao):
+        simbolo = self.simbolo(posicao)
+        if simbolo is None:
+            return None
+        nome, info, _ = simbolo
+        categoria = info['categoria']
+        params = ', '.join(info['params'] or ())
+        if categoria == 'var':
+            return f"{nome}: {info['tipo']} (variável {'global' if info['nivel'] == 0 else 'local'})"
+        if categoria == 'param':
+            return f"{nome}: {info['tipo']} (parâmetro)"
+        if categoria == 'proc':
+            return f"procedure {nome}({params})"
+        if categoria == 'func':
+            return f"function {nome}({params}): {info['tipo']}"
+        return f"program {nome}"
+
+
+class ServidorLSP:
+    METODOS = {
+        'initialize': 'inicializar',
+        'shutdown': 'desligar',
+        'exit': 'sair',
+        'textDocument/didOpen': 'abrir',
+        'textDocument/didChange': 'alterar',
+        'textDocument/didClose': 'fechar',
+        'textDocument/definition': 'ir_para_definicao',
+        'textDocument/hover': 'hover',
+    }
+
+    def __init__(self, entrada=None, saida=None):
+        self.entrada = entrada or sys.stdin.buffer
+        self.saida = saida or sys.stdout.buffer
+        self.sessao = SessaoCompilador()
+        self.sessao.lexer.ecoar_erros = False  # a saída padrão é do protocolo
+        self.documentos = {}  # uri -> Documento
+        self.desligado = False
+
+    # --- PROTOCOLO ---
+    def ler(self):
+        """Próxima mensagem da entrada, ou None no fim."""
+        tamanho = None
+        while True:
+            linha = self.entrada.readline()
+            if not linha:
+                return None
+            linha = linha.strip()
+            if not linha:
+                break
+            nome, _, valor = linha.decode('ascii').partition(':')
+            if nome.lower() == 'content-length':
+                tamanho = int(valor)
+        return json.loads(self.entrada.read(tamanho).decode('utf-8'))
+
+    def enviar(self, mensagem):
+        corpo = json.dumps(mensagem, ensure_ascii=False).encode('utf-8')
+        self.saida.write(b'Content-Length: %d\r\n\r\n' % len(corpo) + corpo)
+        self.saida.flush()
+
+    def executar(self):
+        while True:
+            mensagem = self.ler()
+            if mensagem is None:
+                return 1
+            resultado = self.tratar(mensagem)
+            if resultado is not None:
+                return resultado
+
+    def tratar(self, mensagem):
+        """Trata uma mensagem; devolve o código de saída depois de 'exit'."""
+        metodo = mensagem.get('method')
+        identificador = mensagem.get('id')
+        if metodo == 'exit':
+            return 0 if self.desligado else 1
+        funcao = getattr(self, self.METODOS.get(metodo, ''), None)
+        if funcao is None:
+            if identificador is not None:
+                self.enviar({'jsonrpc': '2.0', 'id': identificador,
+                             'error': {'code': METODO_DESCONHECIDO, 'message': f"método '{metodo}' desconhecido"}})
+            return None
+        try:
+            resultado = funcao(mensagem.get('params') or {})
+        except Exception as e:
+            if identificador is None:
+                print(f"servidor_lsp: erro em '{metodo}': {e!r}", file=sys.stderr)
+            else:
+                self.enviar({'jsonrpc': '2.0', 'id': identificador,
+                             'error': {'code': ERRO_INTERNO, 'message': repr(e)}})
+            return None
+        if identificador is not None:
+            self.enviar({'jsonrpc': '2.0', 'id': identificador, 'result': resultado})
+        return None
+
+    # --- CONVERSÕES ---
+    @staticmethod
+    def intervalo(documento, posicao, tamanho=None):
+        """Range do protocolo a partir de uma posição no texto (o token inteiro se tamanho for None)."""
+        if posicao is None:
+            posicao = len(documento.texto)
+        if tamanho is None:
+            m = PALAVRA.match(documento.texto, posicao)
+            tamanho = len(m.group()) if m else 0
+        linha, coluna = documento.linhas.linha_coluna(posicao)
+        inicio = {'line': linha - 1, 'character': coluna - 1}
+        return {'start': inicio, 'end': {'line': linha - 1, 'character': coluna - 1 + tamanho}}
+
+    def publicar(self, uri):
+        documento = self.documentos[uri]
+        diagnosticos = [{'range': self.intervalo(documento, posicao), 'severity': 1,
+                         'source': 'rascal', 'message': mensagem}
+                        for posicao, mensagem in documento.diagnosticos()]
+        self.enviar({'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+                     'params': {'uri': uri, 'diagnostics': diagnosticos}})
+
+    def _documento_posicao(self, params):
+        documento = self.documentos.get(params['textDocument']['uri'])
+        if documento is None:
+            return None, None
+        posicao = params['position']
+        return documento, documento.offset(posicao['line'], posicao['character'])
+
+    # --- MÉTODOS ---
+    def inicializar(self, params):
+        return {'capabilities': {'textDocumentSync': {'openClose': True, 'change': 2},
+                                 'definitionProvider': True, 'hoverProvider': True},
+                'serverInfo': {'name': 'rascal'}}
+
+    def desligar(self, params):
+        self.desligado = True
+        return None
+
+    def abrir(self, params):
+        item = params['textDocument']
+        self.documentos[item['uri']] = Documento(self.sessao, item['text'])
+        self.publicar(item['uri'])
+
+    def alterar(self, params):
+        uri = params['textDocument']['uri']
+        documento = self.documentos[uri]
+        for mudanca in params['contentChanges']:
+            if 'range' not in mudanca:
+                documento.substituir(mudanca['text'])
+                continue
+            inicio, fim = mudanca['range']['start'], mudanca['range']['end']
+            documento.editar(documento.offset(inicio['line'], inicio['character']),
+                             documento.offset(fim['line'], fim['character']), mudanca['text'])
+        documento.atualizar()
+        self.publicar(uri)
+
+    def fechar(self, params):
+        uri = params['textDocument']['uri']
+        self.documentos.pop(uri, None)
+        self.enviar({'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+                     'params': {'uri': uri, 'diagnostics': []}})
+
+    def ir_para_definicao(self, params):
+        documento, posicao = self._documento_posicao(params)
+        if documento is None:
+            return None
+        destino = documento.definicao(posicao)
+        if destino is None:
+            return None
+        return {'uri': params['textDocument']['uri'], 'range': self.intervalo(documento, destino)}
+
+    def hover(self, params):
+        documento, posicao = self._documento_posicao(params)
+        if documento is None:
+            return None
+        texto = documento.descricao(posicao)
+        if texto is None:
+            return None
+        return {'contents': {'kind': 'plaintext', 'value': texto}}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        print("Como usar: python servidor_lsp.py  (o editor conversa com o servidor pela entrada e saída padrão)")
+        sys.exit(1)
+    sys.exit(ServidorLSP().executar())
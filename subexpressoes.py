@@ -0,0 +1,422 @@
+# SUBEXPRESSÕES COMUNS
+#
+# Como usar: python subexpressoes.py programa.ras [--eliminar]
+#
+# O programa é compilado com SessaoCompilador(compartilhar=True), que verifica
+# cada expressão repetida uma vez: um erro semântico nela aparece só na
+# primeira ocorrência (o semantico.py aponta todas).
+#
+# Depois da análise semântica (que anota os endereços das variáveis), cada
+# sequência de comandos é percorrida em ordem com numeração de valores: duas
+# expressões têm o mesmo número quando fazem a mesma operação sobre operandos
+# de mesmo número (variáveis pelo endereço, constantes pelo valor). O número
+# é memorizado por nó, então na AST compartilhada do parser
+# (SessaoCompilador(compartilhar=True)) uma expressão repetida é numerada uma
+# vez só.
+#
+# Uma expressão deixa de estar disponível quando um operando é atribuído (por
+# atribuição ou read) ou, se ela lê globais, numa chamada de sub-rotina. Os
+# if/while/begin aninhados são sequências próprias e encerram a sequência
+# atual; a condição do if faz parte dela, a do while não (é reavaliada a cada
+# volta).
+#
+# Só contam expressões com operador, sem chamadas de função e sem 'div' que
+# possa falhar (ver fluxo.expressao_pura). Com --eliminar, cada uma calculada
+# mais de uma vez vai para uma variável nova ('_cseN', nome que o lexer não
+# aceita e portanto não colide com as do programa), atribuída antes do
+# primeiro comando que a usa; as ocorrências passam a ler essa variável. Os
+# comandos são reescritos copiando só o caminho até as ocorrências, então
+# nós compartilhados com outras sequências não mudam.
+
+import copy
+import sys
+
+from arvore import DeclVar, CmdAtrib, ExpVar, SeqComandos, iterar_nos
+from semantico import AnalisadorSemantico
+
+AVISO_COMPARTILHAMENTO = ("Obs.: com as expressões repetidas compartilhadas, um erro numa delas é "
+                          "reportado só na primeira ocorrência; use o semantico.py para ver todas.")
+
+TIPO_OPERACAO = {'+': 'integer', '-': 'integer', '*': 'integer', 'div': 'integer'}  # os demais: boolean
+
+
+class NumeracaoValores:
+    """Número de valor de cada expressão, memorizado por nó (None: não entra na análise)."""
+    def __init__(self):
+        self.chaves = {}    # (operação, operandos...) -> número
+        self.de_no = {}     # id do nó -> número
+        self.nos = []       # id do nó -> nó, para os ids de de_no continuarem válidos
+        self.lidas = []     # número -> variáveis lidas
+        self.globais = []   # número -> lê alguma global
+        self.tamanhos = []  # número -> operadores na expressão
+        self.tipos = []     # número -> tipo do valor
+        self.exemplos = []  # número -> primeiro nó numerado com ele
+
+    def _novo(self, no, chave, lidas, globais, tamanho, tipo):
+        numero = self.chaves.get(chave)
+        if numero is None:
+            numero = self.chaves[chave] = len(self.lidas)
+            self.exemplos.append(no)
+            self.lidas.append(lidas)
+            self.globais.append(globais)
+            self.tamanhos.append(tamanho)
+            self.tipos.append(tipo)
+        return numero
+
+    def numero(self, exp):
+        de_no = self.de_no
+        if id(exp) in de_no:
+            return de_no[id(exp)]
+        # Pós-ordem com pilha: as cadeias de operadores podem ser muito longas
+        pilha = [(exp, False)]
+        while pilha:
+            no, filhos_prontos = pilha.pop()
+            if id(no) in de_no:
+                continue
+            tipo = no.tipo
+            if tipo == 'exp_binaria' or tipo == 'exp_unaria':
+                operandos = (no.esq, no.dir) if tipo == 'exp_binaria' else (no.exp,)
+                if not filhos_prontos:
+                    pilha.append((no, True))
+                    pilha.extend((o, False) for o in operandos if id(o) not in de_no)
+                    continue
+                numeros = [de_no[id(o)] for o in operandos]
+                falha = no.op == 'div' and (no.dir.tipo != 'exp_num' or no.dir.valor == 0)
+                if falha or None in numeros:
+                    numero = None
+                else:
+                    numero = self._novo(no, (no.op, *numeros),
+                                        frozenset().union(*(self.lidas[n] for n in numeros)),
+                                        any(self.globais[n] for n in numeros),
+                                        1 + sum(self.tamanhos[n] for n in numeros),
+                                        TIPO_OPERACAO.get(no.op, 'boolean'))
+            elif tipo == 'exp_var':
+                # As variáveis criadas por este passe ainda não têm endereço
+                variavel = no.endereco if no.endereco is not None else no.nome
+                numero = self._novo(no, ('var', variavel), frozenset((variavel,)),
+                                    no.endereco is not None and no.endereco[0] == 0, 0, None)
+            elif tipo == 'exp_num' or tipo == 'logico':
+                numero = self._novo(no, (tipo, no.valor), frozenset(), False, 0, None)
+            else:
+                numero = None  # chamada de função
+            de_no[id(no)] = numero
+            self.nos.append(no)
+        return de_no[id(exp)]
+
+
+def raizes(comando):
+    """Expressões avaliadas diretamente pelo comando simples (ou pela condição do if)."""
+    tipo = comando.tipo
+    if tipo == 'cmd_atrib':
+        return [comando.exp]
+    if tipo == 'cmd_escrita':
+        return comando.expressoes
+    if tipo == 'chamada_proc':
+        return comando.args
+    if tipo == 'cmd_condicional':
+        return [comando.condicao]
+    return []
+
+
+class Repeticao:
+    """Expressão calculada mais de uma vez numa sequência sem mudar os operandos."""
+    __slots__ = ('numero', 'exemplo', 'comandos')
+
+    def __init__(self, numero, exemplo, comandos):
+        self.numero = numero
+        self.exemplo = exemplo    # a primeira ocorrência (compartilhada, a posição pode ser de outra)
+        self.comandos = comandos  # o comando de cada ocorrência, em ordem
+
+    @property
+    def ocorrencias(self):
+        return len(self.comandos)
+
+
+class AnalisadorSubexpressoes:
+    def __init__(self, ast):
+        self.ast = ast
+        self.valores = NumeracaoValores()
+        self.repeticoes = []  # Repeticao de todas as sequências, depois de analisar()
+        self.ocorrencias = 0  # expressões com operador encontradas nos comandos
+        self.temporarias = 0
+
+    def sequencias(self):
+        """(bloco, dono, atributo) do corpo do programa principal e de cada sub-rotina."""
+        corpo = self.ast.corpo
+        yield corpo, corpo, 'comandos'
+        for sub in corpo.subrotinas:
+            yield sub.corpo, sub.corpo, 'comandos'
+
+    @staticmethod
+    def elos(cabeca):
+        """Elos (seq_comandos) não vazios de uma sequência; um comando solto vira um elo só."""
+        if cabeca.tipo != 'seq_comandos':
+            return [SeqComandos(cabeca, None, cabeca.posicao)]
+        elos = []
+        elo = cabeca
+        while elo is not None:
+            if elo.primeiro is not None:
+                elos.append(elo)
+            elo = elo.resto
+        return elos
+
+    def analisar(self):
+        pendentes = list(self.sequencias())
+        while pendentes:
+            bloco, dono, atributo = pendentes.pop()
+            repeticoes, aninhadas = self.analisar_sequencia(getattr(dono, atributo))
+            self.repeticoes.extend(repeticoes)
+            pendentes.extend((bloco, d, a) for d, a in aninhadas)
+        self.repeticoes.sort(key=lambda r: r.comandos[0].posicao or 0)
+        return self
+
+    def analisar_sequencia(self, cabeca):
+        """
+        Repetições de uma sequência de comandos e os (dono, atributo) das
+        sequências aninhadas nela.
+        """
+        valores = self.valores
+        disponiveis = {}  # número -> Repeticao em formação
+        repeticoes = []
+        aninhadas = []
+
+        def encerrar(numeros):
+            for numero in numeros:
+                repeticao = disponiveis.pop(numero)
+                if repeticao.ocorrencias > 1:
+                    repeticoes.append(repeticao)
+
+        for elo in self.elos(cabeca):
+            comando = elo.primeiro
+            tipo = comando.tipo
+            chama = tipo == 'chamada_proc'
+            encontradas = []
+            for raiz in raizes(comando):
+                for no in iterar_nos(raiz):
+                    if no.tipo == 'chamada_func':
+                        chama = True
+                    elif no.tipo == 'exp_binaria' or no.tipo == 'exp_unaria':
+                        self.ocorrencias += 1
+                        numero = valores.numero(no)
+                        if numero is not None:
+                            encontradas.append((numero, no))
+            for numero, no in encontradas:
+                # Uma função chamada no meio do comando pode mudar as globais
+                if chama and valores.globais[numero]:
+                    continue
+                if numero not in disponiveis:
+                    disponiveis[numero] = Repeticao(numero, no, [])
+                disponiveis[numero].comandos.append(comando)
+
+            if tipo == 'cmd_atrib' or tipo == 'cmd_leitura':
+                if tipo == 'cmd_atrib':
+                    atribuidas = {comando.endereco if comando.endereco is not None else comando.nome}
+                else:
+                    atribuidas = set(comando.enderecos or ())
+                encerrar([n for n in disponiveis if valores.lidas[n] & atribuidas])
+            if chama:
+                encerrar([n for n in disponiveis if valores.globais[n]])
+            if tipo == 'cmd_condicional':
+                aninhadas.append((comando, 'corpo'))
+                if comando.senao is not None:
+                    aninhadas.append((comando, 'senao'))
+            elif tipo == 'cmd_repeticao':
+                aninhadas.append((comando, 'corpo'))
+            elif tipo == 'seq_comandos':
+                aninhadas.append((elo, 'primeiro'))
+            if tipo in ('cmd_condicional', 'cmd_repeticao', 'seq_comandos'):
+                encerrar(list(disponiveis))
+        encerrar(list(disponiveis))
+        return repeticoes, aninhadas
+
+    # --- ELIMINAÇÃO ---
+
+    def eliminar(self):
+        """
+        Calcula cada expressão repetida uma vez numa variável nova e refaz a
+        análise semântica. Cada sequência é refeita em rodadas até não haver
+        repetições, porque tirar uma expressão pode deixar repetidas as suas
+        partes. Devolve o número de cálculos evitados.
+        """
+        evitados = 0
+        pendentes = list(self.sequencias())
+        while pendentes:
+            bloco, dono, atributo = pendentes.pop()
+            while True:
+                repeticoes, aninhadas = self.analisar_sequencia(getattr(dono, atributo))
+                escolhidas = self.maximais(repeticoes)
+                if not escolhidas:
+                    break
+                antes = {}  # id do comando -> atribuições a inserir antes dele
+                for repeticao in escolhidas:
+                    calculo = self.substituir(bloco, repeticao)
+                    antes.setdefault(id(repeticao.comandos[0]), []).append(calculo)
+                    evitados += repeticao.ocorrencias - 1
+                self.inserir(dono, atributo, antes)
+            pendentes.extend((bloco, d, a) for d, a in aninhadas)
+        if self.temporarias:
+            AnalisadorSemantico().visitar(self.ast)
+        return evitados
+
+    def maximais(self, repeticoes):
+        """As repetições que não fazem parte de outra maior, da maior para a menor."""
+        valores = self.valores
+        repeticoes = sorted(repeticoes, key=lambda r: -valores.tamanhos[r.numero])
+        cobertos = set()
+        escolhidas = []
+        for repeticao in repeticoes:
+            if repeticao.numero in cobertos:
+                continue
+            escolhidas.append(repeticao)
+            for no in iterar_nos(repeticao.exemplo, distintos=True):
+                cobertos.add(valores.de_no.get(id(no)))
+        return escolhidas
+
+    def substituir(self, bloco, repeticao):
+        """Troca as ocorrências pela variável nova e devolve a atribuição que a calcula."""
+        self.temporarias += 1
+        nome = f"_cse{self.temporarias}"
+        numero = repeticao.numero
+        exemplo = repeticao.exemplo
+        bloco.vars.append(DeclVar(nome, self.valores.tipos[numero], exemplo.posicao))
+
+        trocados = set()
+        for comando in repeticao.comandos:
+            if id(comando) in trocados:
+                continue
+            trocados.add(id(comando))
+            tipo = comando.tipo
+            if tipo == 'cmd_atrib':
+                comando.exp = self.trocar(comando.exp, numero, nome)
+            elif tipo == 'cmd_escrita':
+                comando.expressoes = [self.trocar(e, numero, nome) for e in comando.expressoes]
+            elif tipo == 'chamada_proc':
+                comando.args = [self.trocar(a, numero, nome) for a in comando.args]
+            elif tipo == 'cmd_condicional':
+                comando.condicao = self.trocar(comando.condicao, numero, nome)
+        return CmdAtrib(nome, exemplo, exemplo.posicao)
+
+    def inserir(self, dono, atributo, antes):
+        """Refaz a sequência com as atribuições de 'antes' na frente dos seus comandos."""
+        elos = []
+        for elo in self.elos(getattr(dono, atributo)):
+            for calculo in antes.get(id(elo.primeiro), ()):
+                elos.append(SeqComandos(calculo, None, calculo.posicao))
+            elos.append(elo)
+        for elo, seguinte in zip(elos, elos[1:]):
+            elo.resto = seguinte
+        elos[-1].resto = None
+        setattr(dono, atributo, elos[0])
+
+    def trocar(self, raiz, numero, nome):
+        """
+        Cópia de 'raiz' com cada subexpressão de número 'numero' trocada por
+        uma leitura de 'nome'. Só os nós no caminho até elas são copiados.
+        """
+        de_no = self.valores.de_no
+        novos = {}  # id do nó -> substituto
+        pilha = [(raiz, False)]
+        while pilha:
+            no, filhos_prontos = pilha.pop()
+            if id(no) in novos:
+                continue
+            if de_no.get(id(no)) == numero:
+                novos[id(no)] = ExpVar(nome, no.posicao)
+                continue
+            tipo = no.tipo
+            if tipo == 'exp_binaria':
+                filhos = [no.esq, no.dir]
+            elif tipo == 'exp_unaria':
+                filhos = [no.exp]
+            elif tipo == 'chamada_func':
+                filhos = no.args
+            else:
+                novos[id(no)] = no
+                continue
+            if not filhos_prontos:
+                pilha.append((no, True))
+                pilha.extend((f, False) for f in filhos)
+                continue
+            if all(novos[id(f)] is f for f in filhos):
+                novos[id(no)] = no
+                continue
+            copia = copy.copy(no)
+            if tipo == 'exp_binaria':
+                copia.esq, copia.dir = (novos[id(f)] for f in filhos)
+            elif tipo == 'exp_unaria':
+                copia.exp = novos[id(no.exp)]
+            else:
+                copia.args = [novos[id(f)] for f in filhos]
+            novos[id(no)] = copia
+        return novos[id(raiz)]
+
+
+def texto_expressao(exp):
+    """Texto da expressão, com parênteses em volta de cada operação interna."""
+    pilha = [(exp, False)]
+    partes = []
+    while pilha:
+        no, filhos_prontos = pilha.pop()
+        tipo = no.tipo
+        if tipo == 'exp_binaria':
+            if not filhos_prontos:
+                pilha.extend(((no, True), (no.dir, False), (no.esq, False)))
+                continue
+            direita = partes.pop()
+            partes.append(f"({partes.pop()} {no.op} {direita})")
+        elif tipo == 'exp_unaria':
+            if not filhos_prontos:
+                pilha.extend(((no, True), (no.exp, False)))
+                continue
+            partes.append(f"({no.op} {partes.pop()})" if no.op == 'not' else f"(-{partes.pop()})")
+        elif tipo == 'exp_var':
+            partes.append(no.nome)
+        elif tipo == 'chamada_func':
+            partes.append(f"{no.nome}(...)")
+        else:
+            partes.append(str(no.valor).lower())
+    texto = partes[0]
+    return texto[1:-1] if texto.startswith('(') and texto.endswith(')') else texto
+
+
+def eliminar_subexpressoes(ast):
+    """Elimina as subexpressões comuns da AST anotada; devolve os cálculos evitados."""
+    return AnalisadorSubexpressoes(ast).eliminar()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Como usar: python subexpressoes.py programa.ras [--eliminar]")
+        print(AVISO_COMPARTILHAMENTO)
+        sys.exit(1)
+
+    from compilador import SessaoCompilador, ErroSintatico
+
+    try:
+        resultado = SessaoCompilador(compartilhar=True).compilar_arquivo(sys.argv[1])
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{sys.argv[1]}' não encontrado.")
+        sys.exit(1)
+    except ErroSintatico as e:
+        print(e)
+        sys.exit(1)
+    if resultado.erros:
+        for e in resultado.erros:
+            print(e)
+        print(AVISO_COMPARTILHAMENTO)
+        sys.exit(1)
+
+    arvore = sum(1 for _ in iterar_nos(resultado.ast))
+    distintos = sum(1 for _ in iterar_nos(resultado.ast, distintos=True))
+    print(f"AST: {arvore} nós como árvore, {distintos} distintos com o compartilhamento.")
+
+    analisador = AnalisadorSubexpressoes(resultado.ast).analisar()
+    for repeticao in analisador.repeticoes:
+        # Um nó compartilhado tem a posição da primeira ocorrência no corpo; a do comando é exata
+        linha, coluna = resultado.linhas.linha_coluna(repeticao.comandos[0].posicao)
+        print(f"Aviso: '{texto_expressao(repeticao.exemplo)}' calculada {repeticao.ocorrencias} vezes "
+              f"sem mudar os operandos, a partir do comando na linha {linha}, coluna {coluna}.")
+    if not analisador.repeticoes:
+        print("Nenhuma subexpressão repetida.")
+    if '--eliminar' in sys.argv:
+        print(f"{eliminar_subexpressoes(resultado.ast)} cálculo(s) repetido(s) eliminado(s).")
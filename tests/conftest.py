@@ -0,0 +1,6 @@
+# Os testes importam os módulos do compilador, que ficam na raiz do repositório
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
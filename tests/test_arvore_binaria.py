@@ -0,0 +1,47 @@
+# AST anotada gravada no formato binário e lida de volta: igual campo a campo,
+# com as anotações da análise semântica (também quando há erros semânticos)
+import glob
+import os
+
+import pytest
+
+from conftest import RAIZ
+from arvore import No
+from arvore_binaria import LeitorBinario, para_binario
+from benchmark import DECLARACAO_REPETIDA, diferencas_ast
+from compilador import SessaoCompilador, ErroSintatico
+from gerador import gerar_programa
+
+ARQUIVOS = sorted(glob.glob(os.path.join(RAIZ, 'tests*', '*.ras')))
+
+
+def ast_anotada(codigo):
+    sessao = SessaoCompilador()
+    sessao.lexer.ecoar_erros = False
+    return sessao.compilar(codigo).ast
+
+
+@pytest.mark.parametrize('caminho', ARQUIVOS, ids=lambda c: os.path.relpath(c, RAIZ))
+def test_corpus(caminho):
+    with open(caminho) as f:
+        try:
+            ast = ast_anotada(f.read())
+        except ErroSintatico:
+            pytest.skip("erro de sintaxe")
+    assert diferencas_ast(ast, LeitorBinario(para_binario(ast)).no(0)) == []
+    assert diferencas_ast(ast, No.from_dict(ast.to_dict())) == []
+
+
+def test_anotacao_none_seguida_de_lista():
+    ast = ast_anotada(DECLARACAO_REPETIDA)
+    assert ast.corpo.vars[1].endereco is None
+    assert diferencas_ast(ast, LeitorBinario(para_binario(ast)).no(0)) == []
+
+
+def test_subrotinas_decodificadas_isoladamente():
+    ast = ast_anotada(gerar_programa(3, 'subrotinas', subrotinas=20, comandos_subrotina=5))
+    leitor = LeitorBinario(para_binario(ast))
+    indices = [i for i in range(len(leitor)) if leitor.tipo(i) in ('decl_proc', 'decl_func')]
+    assert len(indices) == len(ast.corpo.subrotinas)
+    for sub, i in zip(ast.corpo.subrotinas, indices):
+        assert diferencas_ast(sub, leitor.no(i)) == []
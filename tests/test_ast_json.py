@@ -0,0 +1,43 @@
+# ast.json de programas grandes: o yacc.py grava e o semantico.py lê de volta
+import json
+import os
+import subprocess
+import sys
+
+from conftest import RAIZ
+from arvore_binaria import carregar_json, em_pilha_grande, salvar_json
+from compilador import SessaoCompilador
+from gerador import gerar_programa
+
+
+def executar(script, *argumentos, cwd):
+    return subprocess.run([sys.executable, os.path.join(RAIZ, script), *argumentos],
+                          cwd=cwd, capture_output=True, text=True)
+
+
+def test_ast_json_com_20k_comandos(tmp_path):
+    codigo = gerar_programa(0, 'comandos', comandos=20000)
+    (tmp_path / 'programa.ras').write_text(codigo)
+
+    sintatico = executar('yacc.py', 'programa.ras', cwd=tmp_path)
+    assert sintatico.returncode == 0, sintatico.stdout + sintatico.stderr
+    assert "AST salva em 'ast.json'" in sintatico.stdout
+    assert not list(tmp_path.glob('*.tmp'))
+
+    semantico = executar('semantico.py', cwd=tmp_path)
+    assert semantico.returncode == 0, semantico.stdout + semantico.stderr
+    assert "Nenhum erro encontrado" in semantico.stdout
+
+    # A comparação de dicionários também é recursiva
+    ast = SessaoCompilador().analisar_sintaxe(codigo)
+    lida = carregar_json(str(tmp_path / 'ast.json'))
+    assert em_pilha_grande(lambda: lida == ast.to_dict())
+
+
+def test_ast_json_igual_ao_json_dump(tmp_path):
+    # Numa AST rasa, o texto é o mesmo do json.dump(..., indent=2)
+    with open(os.path.join(RAIZ, 'tests', 'correto01.ras')) as f:
+        ast = SessaoCompilador().analisar_sintaxe(f.read())
+    salvar_json(ast, tmp_path / 'ast.json')
+    assert (tmp_path / 'ast.json').read_text(encoding='utf-8') == \
+        json.dumps(ast.to_dict(), indent=2, ensure_ascii=False)
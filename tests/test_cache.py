@@ -0,0 +1,66 @@
+# Limite de tamanho do cache de compilação com vários processos no mesmo diretório
+import os
+import subprocess
+import sys
+import time
+
+from conftest import RAIZ
+from cache import CacheCompilacao, IDADE_TEMPORARIO_ABANDONADO
+
+
+def tamanho_em_disco(diretorio):
+    return sum(os.path.getsize(os.path.join(diretorio, nome))
+               for nome in os.listdir(diretorio) if nome.endswith('.json'))
+
+
+def test_entrada_substituida_nao_conta_duas_vezes(tmp_path):
+    cache = CacheCompilacao(str(tmp_path), tamanho_maximo=1024 * 1024)
+    for _ in range(5):
+        cache.guardar("program p; begin end.", {'status': 'ok'})
+    assert cache._tamanho_total == tamanho_em_disco(tmp_path)
+
+
+def test_varios_processos_respeitam_o_limite(tmp_path):
+    # Cada CacheCompilacao faz o papel de um processo do compile-batch
+    limite = 64 * 1024
+    caches = [CacheCompilacao(str(tmp_path), tamanho_maximo=limite) for _ in range(8)]
+    diagnosticos = {'status': 'ok', 'erros': ['x' * 1000]}
+    maior = 0
+    for i in range(400):
+        caches[i % len(caches)].guardar(f"program p{i}; begin end.", diagnosticos)
+        maior = max(maior, tamanho_em_disco(tmp_path))
+    # Entre duas contagens, cada processo grava no máximo 1/8 da folga vista;
+    # antes, cada um só descartava quando o que ele mesmo gravou passava do limite
+    assert maior <= limite * 1.25
+
+
+def test_temporarios_abandonados_sao_removidos(tmp_path):
+    abandonado = tmp_path / 'abandonado.tmp'
+    recente = tmp_path / 'recente.tmp'
+    abandonado.write_text('{"diagnos')
+    recente.write_text('{"diagnos')
+    antigo = time.time() - IDADE_TEMPORARIO_ABANDONADO - 60
+    os.utime(abandonado, (antigo, antigo))
+    CacheCompilacao(str(tmp_path))
+    assert not abandonado.exists()
+    assert recente.exists()  # pode ser a gravação em andamento de outro processo
+
+
+def test_entradas_em_utf8_com_qualquer_locale(tmp_path):
+    # Com o locale POSIX e sem o modo UTF-8, o open() sem encoding usaria ASCII
+    # (o script só tem ASCII: a linha de comando também seria decodificada assim)
+    script = (
+        "import sys\n"
+        "from cache import CacheCompilacao\n"
+        "cache = CacheCompilacao(sys.argv[1])\n"
+        "if sys.argv[2] == 'guardar':\n"
+        "    cache.guardar('program p; begin end.', {'erros': ['Vari\\u00e1vel j\\u00e1 declarada']})\n"
+        "else:\n"
+        "    print(cache.obter('program p; begin end.')['diagnosticos']['erros'][0] == 'Vari\\u00e1vel j\\u00e1 declarada')\n"
+    )
+    ambiente = dict(os.environ, LC_ALL='POSIX', PYTHONCOERCECLOCALE='0', PYTHONUTF8='0', PYTHONPATH=RAIZ)
+    for operacao in ('guardar', 'obter'):
+        processo = subprocess.run([sys.executable, '-c', script, str(tmp_path), operacao],
+                                  env=ambiente, capture_output=True)
+        assert processo.returncode == 0, processo.stderr.decode('utf-8', 'replace')
+    assert processo.stdout.strip() == b'True'
@@ -0,0 +1,33 @@
+# Backend C de ponta a ponta: o executável compilado escreve o mesmo que o
+# interpretador. Sem compilador C (cc ou $CC) os testes são pulados.
+import glob
+import os
+import shutil
+
+import pytest
+
+from conftest import RAIZ
+from benchmark import PROGRAMAS_VM, saidas_c
+from compilador import SessaoCompilador
+
+ENTRADA = "7 2 true 4 5 6 7 8"
+
+pytestmark = pytest.mark.skipif(shutil.which(os.environ.get('CC', 'cc')) is None,
+                                reason="sem compilador C")
+
+
+@pytest.mark.parametrize('caminho', sorted(glob.glob(os.path.join(RAIZ, 'tests', 'correto*.ras'))),
+                         ids=os.path.basename)
+def test_corretos(caminho, tmp_path):
+    resultado = SessaoCompilador().compilar_arquivo(caminho)
+    assert resultado.sucesso, resultado.erros
+    obtido, esperado = saidas_c(resultado.ast, ENTRADA, str(tmp_path / 'programa'))
+    assert obtido == esperado
+
+
+@pytest.mark.parametrize('nome', sorted(PROGRAMAS_VM))
+def test_programas_da_vm(nome, tmp_path):
+    modelo, n = PROGRAMAS_VM[nome]
+    resultado = SessaoCompilador().compilar(modelo.replace('{n}', str(max(1, n // 1000))))
+    obtido, esperado = saidas_c(resultado.ast, '', str(tmp_path / 'programa'))
+    assert obtido == esperado
@@ -0,0 +1,133 @@
+# AST com expressões compartilhadas (SessaoCompilador(compartilhar=True)):
+# os mesmos erros e a mesma saída do modo normal, o compartilhamento mantido
+# por iterar_nos(distintos=True) e pela lista plana, e a eliminação de
+# subexpressões comuns sem mudar a saída (o experimento 'compartilhamento'
+# do benchmark.py faz o mesmo com programas maiores)
+import glob
+import io
+import os
+
+import pytest
+
+from conftest import RAIZ
+from arvore import de_lista_plana, iterar_nos, para_lista_plana
+from benchmark import PROGRAMAS_VM, executar_interpretador
+from compilador import ErroSintatico, SessaoCompilador
+from gerador import gerar_programa
+from maquina import ErroExecucao, MaquinaVirtual, compilar_bytecode
+from subexpressoes import eliminar_subexpressoes
+
+ENTRADA = "7 2 true 4 5 6 7 8"
+
+CORPUS = sorted(os.path.relpath(c, RAIZ) for c in glob.glob(os.path.join(RAIZ, 'tests*', '*.ras')))
+
+EXPRESSAO_REPETIDA = """program repetida;
+var a, x, y: integer;
+begin
+    x := a + true;
+    y := a + true
+end.
+"""
+
+
+def nova_sessao(compartilhar):
+    sessao = SessaoCompilador(compartilhar=compartilhar)
+    sessao.lexer.ecoar_erros = False
+    return sessao
+
+
+def compilar(codigo, compartilhar):
+    resultado = nova_sessao(compartilhar).compilar(codigo)
+    assert resultado.sucesso, resultado.erros
+    return resultado.ast
+
+
+def executar_vm(ast, entrada):
+    saida = io.StringIO()
+    try:
+        MaquinaVirtual(compilar_bytecode(ast), entrada=[entrada], saida=saida).executar()
+    except ErroExecucao as e:
+        return saida.getvalue() + f"Erro de Execução: {e}\n"
+    return saida.getvalue()
+
+
+def programas():
+    for nome in CORPUS:
+        if nome.startswith(os.path.join('tests', 'correto')):
+            with open(os.path.join(RAIZ, nome), encoding='utf-8') as f:
+                yield nome, f.read()
+    for nome, (modelo, n) in sorted(PROGRAMAS_VM.items()):
+        yield nome, modelo.replace('{n}', str(max(1, n // 1000)))
+    # Programas pequenos com muitas repetições (os maiores demoram a executar)
+    for semente in range(5):
+        yield f"repetidas-{semente}", gerar_programa(semente, 'repetidas', 0.03, aninhamento=1)
+
+
+PROGRAMAS = dict(programas())
+
+
+@pytest.mark.parametrize('nome', CORPUS)
+def test_mesmos_erros_e_saida_no_corpus(nome):
+    resultados = []
+    for compartilhar in (False, True):
+        try:
+            resultado = nova_sessao(compartilhar).compilar_arquivo(os.path.join(RAIZ, nome))
+        except ErroSintatico as e:
+            resultados.append(('sintatico', str(e)))
+            continue
+        saida = executar_vm(resultado.ast, ENTRADA) if resultado.sucesso else None
+        resultados.append((resultado.erros, saida))
+    assert resultados[0] == resultados[1]
+
+
+def test_erro_em_expressao_repetida():
+    # Documentado em SessaoCompilador: no modo compartilhado, só a primeira ocorrência
+    linhas = {}
+    for compartilhar in (False, True):
+        resultado = nova_sessao(compartilhar).verificar(EXPRESSAO_REPETIDA)
+        linhas[compartilhar] = [d.linha for d in resultado.diagnosticos]
+    assert linhas == {False: [4, 5], True: [4]}
+
+
+@pytest.mark.parametrize('nome', sorted(PROGRAMAS))
+def test_mesma_saida_compartilhada(nome):
+    arvore = compilar(PROGRAMAS[nome], False)
+    compartilhada = compilar(PROGRAMAS[nome], True)
+    assert executar_vm(compartilhada, ENTRADA) == executar_vm(arvore, ENTRADA)
+
+
+@pytest.mark.parametrize('nome', sorted(PROGRAMAS))
+@pytest.mark.parametrize('compartilhar', [False, True], ids=['arvore', 'compartilhada'])
+def test_eliminar_nao_muda_saida(nome, compartilhar):
+    ast = compilar(PROGRAMAS[nome], compartilhar)
+    antes = executar_interpretador(ast, ENTRADA)
+    evitados = eliminar_subexpressoes(ast)
+    assert executar_interpretador(ast, ENTRADA) == antes
+    if nome.startswith('repetidas'):
+        assert evitados > 0
+
+
+def formato_compartilhamento(raiz):
+    """Para cada nó da pré-ordem, o índice da sua primeira ocorrência."""
+    primeiro = {}
+    return [primeiro.setdefault(id(no), i) for i, no in enumerate(iterar_nos(raiz))]
+
+
+@pytest.mark.parametrize('semente', range(3))
+def test_iterar_nos_distintos(semente):
+    ast = compilar(gerar_programa(semente, 'repetidas', 0.03), True)
+    todos = list(iterar_nos(ast))
+    distintos = list(iterar_nos(ast, distintos=True))
+    assert len(distintos) < len(todos)
+    assert len({id(no) for no in distintos}) == len(distintos)
+    assert {id(no) for no in distintos} == {id(no) for no in todos}
+
+
+@pytest.mark.parametrize('semente', range(3))
+def test_lista_plana_mantem_compartilhamento(semente):
+    ast = compilar(gerar_programa(semente, 'repetidas', 0.03), True)
+    registros = para_lista_plana(ast)
+    assert len(registros) == sum(1 for _ in iterar_nos(ast, distintos=True))
+    lida = de_lista_plana(registros)
+    assert formato_compartilhamento(lida) == formato_compartilhamento(ast)
+    assert lida.to_dict() == ast.to_dict()
@@ -0,0 +1,139 @@
+# Diagnósticos estruturados: um único ErroSintatico com todos os erros de
+# sintaxe e, em verificar(), os diagnósticos léxicos, sintáticos e semânticos
+# nessa ordem, com linha e coluna calculadas pela TabelaLinhas
+import os
+
+import pytest
+
+from conftest import RAIZ
+from compilador import ErroSintatico, SessaoCompilador
+from diagnosticos import LEXICO, SEMANTICO, SINTATICO, TabelaLinhas
+
+VARIOS_ERROS = """program varios;
+var a, b: integer;
+begin
+    a := 1 + * 2;
+    b := a $ 3;
+    if a > then write(a);
+    write(b)
+end.
+"""
+
+LEXICO_E_SEMANTICO = """program misto;
+var a: integer; ok: boolean;
+begin
+    a := 1 @;
+    ok := a + true;
+    b := 3
+end.
+"""
+
+# arquivo -> [(fase, linha, coluna)] de verificar()
+CORPUS = {
+    'lexico01.ras': [(LEXICO, 5, 11), (LEXICO, 12, 5)],
+    'lexico02.ras': [(LEXICO, 12, 18), (SINTATICO, 12, 19)],
+    'lexico03.ras': [(LEXICO, 6, 37)],
+    'lexico04.ras': [(LEXICO, 10, 4), (SINTATICO, None, None)],
+    'lexico05.ras': [(LEXICO, 3, 9), (LEXICO, 5, 9), (LEXICO, 6, 15),
+                     (SINTATICO, 3, 10), (SINTATICO, 5, 10), (SINTATICO, 6, 16)],
+    'sintatico01.ras': [(SINTATICO, 6, 14)],
+    'sintatico02.ras': [(SINTATICO, 4, 1)],
+    'sintatico03.ras': [(SINTATICO, 9, 5)],
+    'sintatico04.ras': [(SINTATICO, None, None)],
+    'sintatico05.ras': [(SINTATICO, 9, 5)],
+    'sintatico06.ras': [(SINTATICO, 2, 13)],
+}
+
+
+# arquivo -> [(linha, coluna)] dos erros semânticos
+SEMANTICOS = {
+    'semantico01.ras': [(6, 5), (7, 14)],  # 'y' na atribuição e no write
+    'semantico02.ras': [(8, 5)],
+    'semantico03.ras': [(8, 8)],  # a condição do if
+    'semantico04.ras': [(5, 5)],
+    'semantico05.ras': [(10, 14)],  # a chamada de 'calcular'
+}
+
+
+def nova_sessao(**opcoes):
+    sessao = SessaoCompilador(**opcoes)
+    sessao.lexer.ecoar_erros = False
+    return sessao
+
+
+def resumo(diagnosticos):
+    return [(d.fase, d.linha, d.coluna) for d in diagnosticos]
+
+
+def test_um_erro_sintatico_com_todos_os_erros():
+    with pytest.raises(ErroSintatico) as excecao:
+        nova_sessao().compilar(VARIOS_ERROS)
+    erro = excecao.value
+    assert str(erro).split('\n') == [
+        "Erro de sintaxe no token '*' (tipo: VEZES) na linha 4",
+        "Erro de sintaxe no token '3' (tipo: NUMERO) na linha 5",
+        "Erro de sintaxe no token 'then' (tipo: THEN) na linha 6",
+    ]
+    # Os atributos descrevem o primeiro erro
+    assert (erro.linha, erro.tipo_token, erro.valor) == (4, 'VEZES', '*')
+    assert resumo(erro.diagnosticos) == [(LEXICO, 5, 12), (SINTATICO, 4, 14), (SINTATICO, 5, 14), (SINTATICO, 6, 12)]
+
+
+def test_verificar_com_erros_lexicos_e_sintaticos():
+    resultado = nova_sessao().verificar(VARIOS_ERROS)
+    assert resultado.ast is None
+    assert resumo(resultado.diagnosticos) == [(LEXICO, 5, 12), (SINTATICO, 4, 14), (SINTATICO, 5, 14), (SINTATICO, 6, 12)]
+    assert resultado.diagnosticos[0].mensagem == "Caractere inválido '$' encontrado na linha 5"
+
+
+def test_verificar_com_erros_lexicos_e_semanticos():
+    resultado = nova_sessao().verificar(LEXICO_E_SEMANTICO)
+    assert resultado.ast is not None
+    assert resumo(resultado.diagnosticos) == [(LEXICO, 4, 12), (SEMANTICO, 5, 11), (SEMANTICO, 5, 5), (SEMANTICO, 6, 5)]
+    assert [d.mensagem for d in resultado.diagnosticos if d.fase == SEMANTICO] == resultado.erros
+
+
+@pytest.mark.parametrize('nome', sorted(CORPUS))
+def test_corpus(nome):
+    resultado = nova_sessao().verificar(caminho=os.path.join(RAIZ, 'tests', nome))
+    assert resumo(resultado.diagnosticos) == CORPUS[nome]
+    # verificar() devolve o mesmo que o ErroSintatico de compilar()
+    if any(d.fase == SINTATICO for d in resultado.diagnosticos):
+        with pytest.raises(ErroSintatico) as excecao:
+            nova_sessao().compilar_arquivo(os.path.join(RAIZ, 'tests', nome))
+        assert resumo(excecao.value.diagnosticos) == CORPUS[nome]
+
+
+@pytest.mark.parametrize('texto, posicoes', [
+    # primeiro e último caractere de cada linha (o último é a quebra)
+    ("ab\ncd\n", {0: (1, 1), 2: (1, 3), 3: (2, 1), 5: (2, 3), 6: (3, 1)}),
+    # CRLF: o '\r' é o penúltimo caractere da linha
+    ("ab\r\ncd\r\n", {0: (1, 1), 2: (1, 3), 3: (1, 4), 4: (2, 1), 7: (2, 4), 8: (3, 1)}),
+    # linha final vazia, depois de uma linha vazia
+    ("ab\n\n", {2: (1, 3), 3: (2, 1), 4: (3, 1)}),
+    ("", {0: (1, 1)}),
+    ("sem quebra", {0: (1, 1), 9: (1, 10), 10: (1, 11)}),
+])
+def test_linha_coluna(texto, posicoes):
+    linhas = TabelaLinhas(texto)
+    assert {posicao: linhas.linha_coluna(posicao) for posicao in posicoes} == posicoes
+
+
+def test_linhas_por_trechos():
+    # Trechos registrados em sequência dão a mesma tabela do texto inteiro
+    texto = "program p;\r\nbegin\n\n  write(1)\nend."
+    linhas = TabelaLinhas()
+    for inicio, fim in ((0, 7), (7, 13), (13, 20), (20, len(texto))):
+        linhas.adicionar(texto[inicio:fim], inicio)
+    assert linhas.inicios == TabelaLinhas(texto).inicios
+
+
+@pytest.mark.parametrize('lexer_dfa', [False, True], ids=['ply', 'dfa'])
+@pytest.mark.parametrize('quebra', ['\n', '\r\n'], ids=['lf', 'crlf'])
+@pytest.mark.parametrize('nome', sorted(SEMANTICOS))
+def test_posicao_dos_erros_semanticos(nome, quebra, lexer_dfa):
+    with open(os.path.join(RAIZ, 'tests', nome), encoding='utf-8') as f:
+        codigo = f.read().replace('\n', quebra)
+    resultado = nova_sessao(lexer_dfa=lexer_dfa).verificar(codigo)
+    assert [d.fase for d in resultado.diagnosticos] == [SEMANTICO] * len(SEMANTICOS[nome])
+    assert [(d.linha, d.coluna) for d in resultado.diagnosticos] == SEMANTICOS[nome]
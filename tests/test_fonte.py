@@ -0,0 +1,38 @@
+# Leitura do código-fonte em blocos (fonte.py): mesmos tokens do arquivo inteiro
+import glob
+import os
+
+import pytest
+
+from conftest import RAIZ
+from benchmark import fluxo_tokens, gerar_arquivo_grande
+from fonte import tokens_arquivo
+from yacc import novos_analisadores
+
+ARQUIVOS = sorted(glob.glob(os.path.join(RAIZ, 'tests*', '*.ras')))
+
+
+@pytest.mark.parametrize('tamanho_bloco', [1, 7, 64, 4096, 1 << 18])
+def test_blocos_dao_os_mesmos_tokens(tamanho_bloco):
+    lexer, _ = novos_analisadores()
+    lexer.ecoar_erros = False
+    for caminho in ARQUIVOS:
+        with open(caminho) as f:
+            esperados = fluxo_tokens(lexer, f.read())
+        lexer.lineno = 1
+        lexer.diagnosticos = []
+        tokens = [(t.type, t.value, t.lineno, t.lexpos)
+                  for t in tokens_arquivo(lexer, caminho, tamanho_bloco)]
+        obtidos = tokens, [d.to_dict() for d in lexer.diagnosticos], lexer.lineno
+        assert obtidos == esperados, caminho
+
+
+def test_arquivo_grande_com_comentarios_longos(tmp_path):
+    # Vários blocos, com as páginas dos anteriores já devolvidas pelo madvise
+    caminho = str(tmp_path / 'grande.ras')
+    gerar_arquivo_grande(caminho, 2, 0.25)
+    lexer, _ = novos_analisadores()
+    with open(caminho) as f:
+        esperados = fluxo_tokens(lexer, f.read())[0]
+    lexer.lineno = 1
+    assert [(t.type, t.value, t.lineno, t.lexpos) for t in tokens_arquivo(lexer, caminho, 1 << 16)] == esperados
@@ -0,0 +1,97 @@
+# Interpretador por closures x máquina virtual: a mesma saída (ou o mesmo erro
+# de execução) no corpus, nos programas do experimento 'vm' e em programas
+# sintéticos, e o mesmo limite de chamadas aninhadas
+import glob
+import io
+import os
+
+import pytest
+
+from conftest import RAIZ
+from benchmark import PROGRAMAS_VM
+from compilador import ErroSintatico, SessaoCompilador
+from gerador import FORMAS, gerar_programa
+from interpretador import compilar_closures
+from maquina import PROFUNDIDADE_MAXIMA, ErroExecucao, MaquinaVirtual, compilar_bytecode
+
+ENTRADAS = ["7 2 true 4 5 6 7 8", "-9 4 -3 1 false", ""]
+
+CORPUS = sorted(os.path.relpath(c, RAIZ) for c in glob.glob(os.path.join(RAIZ, 'tests*', '*.ras')))
+
+RECURSAO = """
+program profunda;
+var x: integer;
+    function f(n: integer): integer;
+    begin
+        if n = 0 then f := 0 else f := f(n - 1) + 1
+    end;
+begin
+    read(x);
+    write(f(x))
+end."""
+
+
+def executar(motor, entrada):
+    saida = io.StringIO()
+    try:
+        motor(io.StringIO(entrada), saida)
+    except ErroExecucao as e:
+        return saida.getvalue(), str(e)
+    return saida.getvalue(), None
+
+
+def comparar(codigo, entrada):
+    sessao = SessaoCompilador()
+    sessao.lexer.ecoar_erros = False
+    resultado = sessao.compilar(codigo)
+    assert resultado.sucesso, resultado.erros
+    closures = compilar_closures(resultado.ast)
+    bytecode = compilar_bytecode(resultado.ast)
+    esperado = executar(lambda e, s: MaquinaVirtual(bytecode, entrada=e, saida=s).executar(), entrada)
+    obtido = executar(lambda e, s: closures.executar(entrada=e, saida=s), entrada)
+    assert obtido == esperado
+    return obtido
+
+
+def compila(caminho):
+    sessao = SessaoCompilador()
+    sessao.lexer.ecoar_erros = False
+    try:
+        return sessao.compilar_arquivo(caminho).sucesso
+    except ErroSintatico:
+        return False
+
+
+@pytest.mark.parametrize('nome', [c for c in CORPUS if compila(os.path.join(RAIZ, c))])
+@pytest.mark.parametrize('entrada', ENTRADAS)
+def test_corpus(nome, entrada):
+    with open(os.path.join(RAIZ, nome), encoding='utf-8') as f:
+        comparar(f.read(), entrada)
+
+
+@pytest.mark.parametrize('nome', sorted(PROGRAMAS_VM))
+def test_programas_vm(nome):
+    modelo, n = PROGRAMAS_VM[nome]
+    comparar(modelo.replace('{n}', str(max(1, n // 1000))), "")
+
+
+@pytest.mark.parametrize('forma', sorted(FORMAS))
+@pytest.mark.parametrize('semente', range(3))
+def test_programas_sinteticos(forma, semente):
+    comparar(gerar_programa(semente, forma, 0.05), ENTRADAS[0])
+
+
+def test_mesmo_limite_de_chamadas_aninhadas():
+    # f(n) faz n + 1 chamadas aninhadas
+    assert comparar(RECURSAO, str(PROFUNDIDADE_MAXIMA - 1)) == (f"{PROFUNDIDADE_MAXIMA - 1}\n", None)
+    assert comparar(RECURSAO, str(PROFUNDIDADE_MAXIMA)) == ("", "Recursão profunda demais.")
+
+
+def test_execucao_depois_do_limite():
+    closures = compilar_closures(SessaoCompilador().compilar(RECURSAO).ast)
+    with pytest.raises(ErroExecucao):
+        closures.executar(entrada=[str(PROFUNDIDADE_MAXIMA)], saida=io.StringIO())
+    # A contagem de chamadas recomeça do zero na execução seguinte
+    saida = io.StringIO()
+    closures.executar(entrada=[str(PROFUNDIDADE_MAXIMA - 1)], saida=saida)
+    assert saida.getvalue() == f"{PROFUNDIDADE_MAXIMA - 1}\n"
@@ -0,0 +1,52 @@
+# O lexer por tabela (lexer_dfa.py) produz os mesmos tokens, diagnósticos e
+# linhas que o lexer do PLY (o experimento 'lexer-dfa' do benchmark.py
+# também compara a velocidade dos dois)
+import glob
+import os
+import random
+
+import pytest
+
+from conftest import RAIZ
+from benchmark import fluxo_tokens, mutar
+from fonte import tokens_arquivo
+from gerador import gerar_programa
+from yacc import novos_analisadores
+
+ARQUIVOS = sorted(glob.glob(os.path.join(RAIZ, 'tests*', '*.ras')))
+
+
+@pytest.fixture
+def lexers():
+    ply, _ = novos_analisadores()
+    dfa, _ = novos_analisadores(lexer_dfa=True)
+    ply.ecoar_erros = dfa.ecoar_erros = False
+    return ply, dfa
+
+
+@pytest.mark.parametrize('caminho', ARQUIVOS, ids=lambda c: os.path.relpath(c, RAIZ))
+def test_corpus_e_mutacoes(caminho, lexers):
+    ply, dfa = lexers
+    with open(caminho) as f:
+        texto = f.read()
+    aleatorio = random.Random(os.path.basename(caminho))
+    for variante in [texto] + [mutar(texto, aleatorio, aleatorio.randint(1, 8)) for _ in range(20)]:
+        assert fluxo_tokens(dfa, variante) == fluxo_tokens(ply, variante)
+
+
+@pytest.mark.parametrize('caminho', ARQUIVOS, ids=lambda c: os.path.relpath(c, RAIZ))
+def test_leitura_em_blocos(caminho, lexers):
+    fluxos = []
+    for lexer in lexers:
+        lexer.lineno = 1
+        lexer.diagnosticos = []
+        tokens = [(t.type, t.value, t.lineno, t.lexpos) for t in tokens_arquivo(lexer, caminho, 64)]
+        fluxos.append((tokens, [d.to_dict() for d in lexer.diagnosticos]))
+    assert fluxos[1] == fluxos[0]
+
+
+@pytest.mark.parametrize('semente', range(3))
+def test_programa_sintetico(semente, lexers):
+    ply, dfa = lexers
+    codigo = gerar_programa(semente, 'misto', 0.2)
+    assert fluxo_tokens(dfa, codigo) == fluxo_tokens(ply, codigo)
@@ -0,0 +1,72 @@
+# Máquina virtual de bytecode: saída dos programas de tests/correto*.ras com
+# entrada fixa, 'div' truncando em direção a zero e os erros de execução
+import io
+import os
+
+import pytest
+
+from conftest import RAIZ
+from compilador import SessaoCompilador
+from maquina import ErroExecucao, MaquinaVirtual, compilar_bytecode, dividir
+
+# programa -> (entrada, saída esperada)
+CASOS = {
+    'correto01.ras': ("6 -7", "-42\n"),
+    'correto02.ras': ("1 3 2", "-1 -2\n"),  # raízes negativas: (-3 + 1) div 2 e (-3 - 1) div 2
+    'correto03.ras': ("-3 3", "-27\n"),
+    'correto04.ras': ("70 175", "22\n"),
+    'correto05.ras': ("7", "0\n2\n4\n6\n"),
+    'correto06.ras': ("", "30 true\n"),
+    'correto07.ras': ("", "6\n6\n"),
+    'correto08.ras': ("", "50\n"),
+}
+
+DIVISOES = """
+program divisoes;
+var a, b: integer;
+begin
+    read(a, b);
+    write(a div b, a - (a div b) * b)
+end."""
+
+
+def executar(codigo, entrada):
+    resultado = SessaoCompilador().compilar(codigo)
+    assert resultado.sucesso, resultado.erros
+    saida = io.StringIO()
+    MaquinaVirtual(compilar_bytecode(resultado.ast), entrada=io.StringIO(entrada), saida=saida).executar()
+    return saida.getvalue()
+
+
+@pytest.mark.parametrize('nome', sorted(CASOS))
+def test_programas_corretos(nome):
+    entrada, esperada = CASOS[nome]
+    with open(os.path.join(RAIZ, 'tests', nome), encoding='utf-8') as f:
+        assert executar(f.read(), entrada) == esperada
+
+
+@pytest.mark.parametrize('a, b, quociente, resto', [
+    (7, 2, 3, 1),
+    (-7, 2, -3, -1),
+    (7, -2, -3, 1),
+    (-7, -2, 3, -1),
+    (-6, 3, -2, 0),
+    (0, -5, 0, 0),
+])
+def test_div_trunca_em_direcao_a_zero(a, b, quociente, resto):
+    assert dividir(a, b) == quociente
+    assert executar(DIVISOES, f"{a} {b}") == f"{quociente} {resto}\n"
+
+
+def test_divisao_por_zero():
+    with pytest.raises(ErroExecucao, match="Divisão por zero"):
+        executar(DIVISOES, "1 0")
+
+
+@pytest.mark.parametrize('entrada, mensagem', [
+    ("1", "Fim da entrada"),
+    ("1 x", "Valor inteiro inválido"),
+])
+def test_erros_de_leitura(entrada, mensagem):
+    with pytest.raises(ErroExecucao, match=mensagem):
+        executar(DIVISOES, entrada)
@@ -0,0 +1,64 @@
+# O otimizador não muda a saída dos programas: o mesmo texto sem e com
+# otimização, no interpretador e na máquina virtual (o experimento
+# 'otimizador' do benchmark.py faz o mesmo com programas maiores)
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RAIZ
+from benchmark import PROGRAMAS_VM, gerar_programa_guardado, saidas_otimizacao
+from compilador import SessaoCompilador
+from gerador import FORMAS, gerar_programa
+
+ENTRADA = "7 2 true 4 5 6 7 8"
+
+PROGRAMAS = [os.path.basename(c) for c in sorted(glob.glob(os.path.join(RAIZ, 'tests', 'correto*.ras')))]
+PROGRAMAS += [nome for nome in PROGRAMAS_VM]
+PROGRAMAS += [f"{forma}-{semente}" for forma in FORMAS for semente in range(5)]
+PROGRAMAS.append('guardado')
+
+
+def codigo_programa(nome):
+    if nome.endswith('.ras'):
+        with open(os.path.join(RAIZ, 'tests', nome)) as f:
+            return f.read()
+    if nome in PROGRAMAS_VM:
+        modelo, n = PROGRAMAS_VM[nome]
+        return modelo.replace('{n}', str(max(1, n // 1000)))
+    if nome == 'guardado':
+        return gerar_programa_guardado(50)
+    forma, semente = nome.rsplit('-', 1)
+    return gerar_programa(int(semente), forma, 0.05)
+
+
+@pytest.mark.parametrize('nome', PROGRAMAS)
+def test_mesma_saida_com_e_sem_otimizacao(nome):
+    saidas, _, _ = saidas_otimizacao(SessaoCompilador(), codigo_programa(nome), ENTRADA)
+    assert saidas == [saidas[0]] * 4
+
+
+def test_otimizador_remove_nos():
+    _, resultado, _ = saidas_otimizacao(SessaoCompilador(), gerar_programa_guardado(50), ENTRADA)
+    assert resultado.nos_removidos > 0
+
+
+def test_linha_de_comando(tmp_path):
+    def otimizador(*argumentos):
+        return subprocess.run([sys.executable, os.path.join(RAIZ, 'otimizador.py'), *argumentos],
+                              cwd=tmp_path, capture_output=True, text=True)
+
+    programa = os.path.join(RAIZ, 'tests', 'correto01.ras')
+    # '--json' sem o nome do arquivo é um erro de uso, não um IndexError
+    sem_arquivo = otimizador(programa, '--json')
+    assert sem_arquivo.returncode == 2
+    assert 'Traceback' not in sem_arquivo.stderr
+
+    processo = otimizador('--json', 'saida.json', programa)
+    assert processo.returncode == 0, processo.stdout + processo.stderr
+    assert "Otimização concluída" in processo.stdout
+    with open(tmp_path / 'saida.json', encoding='utf-8') as f:
+        assert json.load(f)['nome'] == 'multiplicacao'
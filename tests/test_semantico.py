@@ -0,0 +1,19 @@
+# Análise semântica de blocos longos: a cadeia de seq_comandos é percorrida
+# com pilha explícita (o experimento 'semantico' do benchmark.py usa 200k comandos)
+from benchmark import gerar_programa_linear
+from compilador import analisar_sintaxe
+from semantico import AnalisadorSemantico
+
+
+def test_bloco_com_20k_comandos():
+    ast = analisar_sintaxe(gerar_programa_linear(20000))
+    analisador = AnalisadorSemantico()
+    analisador.visitar(ast)
+    assert analisador.erros == []
+
+
+def test_erro_no_fim_de_um_bloco_longo():
+    codigo = gerar_programa_linear(20000).replace("end.", ";\n    x := true\nend.")
+    analisador = AnalisadorSemantico()
+    analisador.visitar(analisar_sintaxe(codigo))
+    assert len(analisador.erros) == 1
@@ -0,0 +1,175 @@
+# Servidor de linguagem: depois de cada alteração, a análise incremental de um
+# Documento dá os mesmos diagnósticos, definições e hovers que um Documento
+# novo com o mesmo texto, analisado inteiro (o experimento 'lsp' do
+# benchmark.py mede a latência num arquivo grande)
+import io
+import json
+
+import pytest
+
+from compilador import SessaoCompilador
+from gerador import gerar_programa
+from servidor_lsp import IDENTIFICADOR, Documento, ServidorLSP
+
+PROGRAMA = """program p;
+var g: integer;
+    procedure a(x: integer);
+    var y: integer;
+    begin
+        y := x + 1;
+        g := y
+    end;
+    function b(n: integer): integer;
+    begin
+        b := n * 2
+    end;
+    procedure c;
+    begin
+        a(g)
+    end;
+begin
+    a(1);
+    g := b(g);
+    c()
+end.
+"""
+
+# (texto antigo, texto novo), trocados na primeira ocorrência
+EDICOES = [
+    # comando válido numa sub-rotina e no corpo principal
+    ("        g := y\n", "        g := y;\n        g := g + y\n"),
+    ("    c()\nend.", "    c();\n    g := g + 1\nend."),
+    # erro de tipo numa sub-rotina, e depois corrigido
+    ("        b := n * 2\n", "        b := true\n"),
+    ("        b := true\n", "        b := n * 2\n"),
+    # erro de sintaxe em b; linhas inseridas acima dele, em a, mudam a sua linha
+    ("        b := n * 2\n", "        b := n +* 2\n"),
+    ("        y := x + 1;\n", "        y := x + 1;\n\n\n"),
+    # erro léxico em a, com o erro de sintaxe de b ainda lá
+    ("        y := x + 1;\n", "        y := x + 1 $;\n"),
+    ("    var y: integer;\n", "    var y: integer;\n\n"),
+    ("        y := x + 1 $;\n", "        y := x + 1;\n"),
+    ("        b := n +* 2\n", "        b := n * 2\n"),
+    # assinatura de a: todos os trechos são verificados de novo
+    ("procedure a(x: integer)", "procedure a(x: boolean)"),
+    ("procedure a(x: boolean)", "procedure a(x: integer)"),
+    # nome usado antes de existir e depois declarado no cabeçalho
+    ("        a(g)\n", "        a(h)\n"),
+    ("var g: integer;\n", "var g, h: integer;\n"),
+    # juntar e separar sub-rotinas
+    ("        g := g + y\n    end;\n", "        g := g + y\n"),
+    ("        g := g + y\n", "        g := g + y\n    end;\n"),
+    # sub-rotina nova e o seu uso
+    ("begin\n    a(1);", "    procedure d;\n    begin\n        g := 0\n    end;\nbegin\n    a(1);\n    d();"),
+]
+
+
+def nova_sessao():
+    sessao = SessaoCompilador()
+    sessao.lexer.ecoar_erros = False
+    return sessao
+
+
+def trocar(documento, antigo, novo):
+    inicio = documento.texto.index(antigo)
+    documento.editar(inicio, inicio + len(antigo), novo)
+    documento.atualizar()
+
+
+def ordenados(diagnosticos):
+    return sorted(diagnosticos, key=lambda d: (-1 if d[0] is None else d[0], d[1]))
+
+
+def conferir(documento, sessao):
+    inteiro = Documento(sessao, documento.texto)
+    if inteiro.ast is None:
+        # Com erro de sintaxe a análise inteira para antes da semântica; a
+        # incremental ainda verifica os outros trechos
+        incrementais = [d for d in documento.diagnosticos() if not d[1].startswith("Erro Semântico")]
+        assert ordenados(incrementais) == ordenados(inteiro.diagnosticos())
+        return
+    assert ordenados(documento.diagnosticos()) == ordenados(inteiro.diagnosticos())
+    for m in IDENTIFICADOR.finditer(documento.texto):
+        for posicao in (m.start(), m.end() - 1):
+            assert documento.definicao(posicao) == inteiro.definicao(posicao), (m.group(), posicao)
+            assert documento.descricao(posicao) == inteiro.descricao(posicao), (m.group(), posicao)
+
+
+def test_edicoes_iguais_a_analise_inteira():
+    sessao = nova_sessao()
+    documento = Documento(sessao, PROGRAMA)
+    conferir(documento, sessao)
+    for antigo, novo in EDICOES:
+        trocar(documento, antigo, novo)
+        conferir(documento, sessao)
+
+
+def test_linha_da_mensagem_acompanha_o_trecho():
+    sessao = nova_sessao()
+    documento = Documento(sessao, PROGRAMA)
+    trocar(documento, "        b := n * 2\n", "        b := n +* 2\n")
+    assert [m for _, m in documento.diagnosticos()] == ["Erro de sintaxe no token '*' (tipo: VEZES) na linha 11"]
+    # Só o trecho de a é analisado de novo; o erro de b desce duas linhas
+    trocar(documento, "        g := y\n", "        g := y\n\n\n")
+    assert [m for _, m in documento.diagnosticos()] == ["Erro de sintaxe no token '*' (tipo: VEZES) na linha 13"]
+
+
+@pytest.mark.parametrize('semente', range(3))
+def test_edicoes_em_programa_gerado(semente):
+    sessao = nova_sessao()
+    documento = Documento(sessao, gerar_programa(semente, 'subrotinas', subrotinas=6, comandos_subrotina=4))
+    conferir(documento, sessao)
+    linhas = documento.texto.split('\n')
+    corpos = [i for i, l in enumerate(linhas) if l == 'begin']  # o de cada sub-rotina e o principal
+    for i, linha in enumerate(corpos[::-1]):
+        # De baixo para cima, para as linhas anotadas continuarem valendo
+        inicio = documento.offset(linha + 1, 0)
+        novo = "    x0 := true;\n" if i % 2 else "    x0 := x0 + 1;\n"
+        if linha == corpos[-1]:
+            novo = "    g0 := g0 + 1;\n"
+        documento.editar(inicio, inicio, novo)
+        documento.atualizar()
+        conferir(documento, sessao)
+
+
+def mensagem(conteudo):
+    corpo = json.dumps(dict(conteudo, jsonrpc='2.0')).encode('utf-8')
+    return b'Content-Length: %d\r\n\r\n' % len(corpo) + corpo
+
+
+def respostas(saida):
+    dados = io.BytesIO(saida)
+    while True:
+        cabecalho = dados.readline()
+        if not cabecalho:
+            return
+        tamanho = int(cabecalho.split(b':')[1])
+        dados.readline()
+        yield json.loads(dados.read(tamanho))
+
+
+def test_protocolo():
+    uri = 'file:///p.ras'
+    posicao = {'textDocument': {'uri': uri}, 'position': {'line': 18, 'character': 4}}  # 'a(1)', depois da alteração
+    mudanca = {'range': {'start': {'line': 10, 'character': 0}, 'end': {'line': 10, 'character': 0}},
+               'text': "        b := true;\n"}
+    entrada = b''.join(mensagem(m) for m in [
+        {'id': 1, 'method': 'initialize', 'params': {'capabilities': {}}},
+        {'method': 'textDocument/didOpen', 'params': {'textDocument': {'uri': uri, 'text': PROGRAMA}}},
+        {'method': 'textDocument/didChange', 'params': {'textDocument': {'uri': uri}, 'contentChanges': [mudanca]}},
+        {'id': 2, 'method': 'textDocument/definition', 'params': posicao},
+        {'id': 3, 'method': 'textDocument/hover', 'params': posicao},
+        {'id': 4, 'method': 'shutdown'},
+        {'method': 'exit'},
+    ])
+    saida = io.BytesIO()
+    assert ServidorLSP(io.BytesIO(entrada), saida).executar() == 0
+    inicializacao, abertura, alteracao, definicao, hover, desligamento = respostas(saida.getvalue())
+    assert inicializacao['result']['capabilities']['hoverProvider']
+    assert abertura['params']['diagnostics'] == []
+    erros = alteracao['params']['diagnostics']
+    assert [(e['range']['start']['line'], e['message']) for e in erros] == [
+        (10, "Erro Semântico: Tipos incompatíveis na atribuição para 'b'. Esperado integer, encontrado boolean.")]
+    assert definicao['result']['range']['start'] == {'line': 2, 'character': 14}
+    assert hover['result']['contents']['value'] == "procedure a(integer)"
+    assert desligamento['result'] is None
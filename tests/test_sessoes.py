@@ -0,0 +1,41 @@
+# Sessões do compilador em threads: cada thread com a sua SessaoCompilador
+# produz o mesmo resultado da compilação sequencial (o experimento 'estresse'
+# do benchmark.py faz 10k compilações)
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import RAIZ
+from benchmark import resumo_compilacao
+from compilador import SessaoCompilador
+
+
+def nova_sessao():
+    sessao = SessaoCompilador()
+    sessao.lexer.ecoar_erros = False
+    return sessao
+
+
+def test_sessoes_em_threads():
+    codigos = []
+    for caminho in sorted(glob.glob(os.path.join(RAIZ, 'tests*', '*.ras'))):
+        with open(caminho) as f:
+            codigos.append(f.read())
+    sessao = nova_sessao()
+    esperados = [resumo_compilacao(sessao, codigo) for codigo in codigos]
+
+    local = threading.local()
+
+    def compilar(i):
+        if not hasattr(local, 'sessao'):
+            local.sessao = nova_sessao()
+        return i, resumo_compilacao(local.sessao, codigos[i % len(codigos)])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resultados = list(executor.map(compilar, range(20 * len(codigos))))
+    divergentes = [i % len(codigos) for i, r in resultados if r != esperados[i % len(codigos)]]
+    assert divergentes == []
+    # O corpus tem programas corretos e com erros das três fases
+    assert {r[0] for r in esperados} == {'ok', 'sintatico'}
+    assert any(r[0] == 'ok' and r[2] for r in esperados)
@@ -0,0 +1,35 @@
+# Desenho da AST pelo ver-ast.py (só o DOT: não depende do executável do Graphviz)
+import importlib.util
+import os
+import re
+
+import pytest
+
+from conftest import RAIZ
+from compilador import analisar_sintaxe
+
+pytest.importorskip('graphviz')
+especificacao = importlib.util.spec_from_file_location('ver_ast', os.path.join(RAIZ, 'ver-ast.py'))
+ver_ast = importlib.util.module_from_spec(especificacao)
+especificacao.loader.exec_module(ver_ast)
+
+
+def rotulos(codigo, **opcoes):
+    visualizador = ver_ast.VisualizadorAST(analisar_sintaxe(codigo).to_dict(), **opcoes)
+    visualizador.adicionar_no_e_filhos(visualizador.ast)
+    return [re.search(r'label=("[^"]*"|[^ \]]+)', linha).group(1).strip('"')
+            for linha in visualizador.dot.body if 'label=' in linha and '->' not in linha]
+
+
+def test_colapsar_sequencia_com_bloco_vazio():
+    codigo = "program p;\nvar x: integer;\nbegin\n  if x > 0 then begin end else x := 1;\n  begin end\nend."
+    obtidos = rotulos(codigo, colapsar_sequencias=True)
+    assert [r for r in obtidos if r.startswith('seq_comandos')] == \
+        ['seq_comandos (2)', 'seq_comandos (0)', 'seq_comandos (0)']
+    assert 'None' not in obtidos
+
+
+def test_profundidade_maxima_corta_a_arvore():
+    codigo = "program p;\nvar x: integer;\nbegin\n  x := 1 + 2 * 3\nend."
+    assert all(r.count('…') == 0 for r in rotulos(codigo))
+    assert any('…' in r for r in rotulos(codigo, profundidade_maxima=2))
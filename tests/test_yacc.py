@@ -0,0 +1,23 @@
+# Linha de comando do yacc.py
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RAIZ
+
+
+@pytest.mark.parametrize('opcoes', [[], ['--lexer-dfa'], ['--binario']])
+def test_tabelas_carregadas_uma_vez(tmp_path, opcoes):
+    # Com -X importtime, cada módulo importado aparece numa linha de stderr; o
+    # yacc.py executado como script não pode ser importado de novo como 'yacc'
+    (tmp_path / 'programa.ras').write_text("program p;\nvar x: integer;\nbegin\n  x := 1\nend.\n")
+    processo = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(RAIZ, 'yacc.py'),
+                               'programa.ras', *opcoes], cwd=tmp_path, capture_output=True, text=True)
+    assert processo.returncode == 0, processo.stdout + processo.stderr
+    assert "Análise sintática concluída com sucesso!" in processo.stdout
+    importados = [linha.rsplit('|', 1)[1].strip() for linha in processo.stderr.splitlines()
+                  if linha.startswith('import time:')]
+    assert 'compilador' in importados
+    assert 'yacc' not in importados
@@ -1,9 +1,72 @@
 from graphviz import Digraph
+from graphviz.quoting import attr_list, quote
+import graphviz
 import json
+import sys
+
+from arvore_binaria import LeitorBinario, carregar_json, eh_binario
+
+# Linhas DOT acumuladas antes de cada escrita no modo --dot/--svg
+LOTE_DOT = 4096
+
+# Atributos de cada espécie de nó, já no formato DOT: as linhas são montadas
+# direto no corpo do Digraph, sem formatar os mesmos atributos a cada nó
+ESTILO_NO = attr_list(kwargs={'shape': 'box', 'style': 'rounded,filled', 'fillcolor': 'skyblue'})[2:-1]
+ESTILO_CORTADO = attr_list(kwargs={'shape': 'box', 'style': 'rounded,filled,dashed', 'fillcolor': 'skyblue'})[2:-1]
+ESTILO_FOLHA = attr_list(kwargs={'shape': 'box', 'style': 'filled', 'fillcolor': 'sandybrown'})[2:-1]
+
+# Script embutido no SVG (--svg): um clique num nó recolhe ou expande a sua
+# subárvore. O Graphviz grava o nome de cada nó e cada aresta ("pai->filho")
+# no <title> do seu <g>, então o script monta a árvore a partir do próprio SVG.
+SCRIPT_SVG = """<script type="text/ecmascript"><![CDATA[
+(function () {
+  var nos = {}, filhos = {}, arestas = {}, recolhidos = {};
+  document.querySelectorAll('g.node').forEach(function (g) {
+    nos[g.querySelector('title').textContent] = g;
+  });
+  document.querySelectorAll('g.edge').forEach(function (g) {
+    var par = g.querySelector('title').textContent.split('->');
+    (filhos[par[0]] = filhos[par[0]] || []).push(par[1]);
+    arestas[par[1]] = g;
+  });
+  function mostrar(raiz) {
+    var pilha = [[raiz, !recolhidos[raiz]]];
+    while (pilha.length) {
+      var atual = pilha.pop(), visivel = atual[1];
+      (filhos[atual[0]] || []).forEach(function (filho) {
+        var exibicao = visivel ? '' : 'none';
+        nos[filho].style.display = exibicao;
+        arestas[filho].style.display = exibicao;
+        pilha.push([filho, visivel && !recolhidos[filho]]);
+      });
+    }
+  }
+  Object.keys(filhos).forEach(function (nome) {
+    var g = nos[nome];
+    g.style.cursor = 'pointer';
+    g.addEventListener('click', function () {
+      recolhidos[nome] = !recolhidos[nome];
+      g.querySelector('polygon, path').style.strokeDasharray = recolhidos[nome] ? '4' : '';
+      mostrar(nome);
+    });
+  });
+})();
+]]></script>
+"""
+
 
 class VisualizadorAST:
-    def __init__(self, ast_data):
+    """
+    Desenha a AST (no formato de dicionário do ast.json) com o Graphviz.
+
+    profundidade_maxima corta a árvore nesse nível (os nós cortados aparecem
+    tracejados, com '…'); com colapsar_sequencias, cada cadeia de
+    seq_comandos vira um só nó com os comandos numerados.
+    """
+    def __init__(self, ast_data, profundidade_maxima=None, colapsar_sequencias=False):
         self.ast = ast_data
+        self.profundidade_maxima = profundidade_maxima
+        self.colapsar_sequencias = colapsar_sequencias
         self.dot = Digraph('AST', comment='Árvore Sintática Abstrata')
         self.dot.attr('node', fontname='helvetica')
         self.dot.attr('edge', fontname='helvetica', fontsize='10')
@@ -13,49 +76,88 @@ class VisualizadorAST:
         self.contador_nos += 1
         return f'node{self.contador_nos}'
 
-    def adicionar_no_e_filhos(self, no_atual):
-        if not isinstance(no_atual, dict):
-            id_no = self.gerar_id_no()
-            self.dot.node(id_no, str(no_atual), shape='box', style='filled', fillcolor='sandybrown')
-            return id_no
-
-        # Nó interno
-        id_no_atual = self.gerar_id_no()
-        tipo_no = no_atual.get('tipo', 'desconhecido')
-        self.dot.node(id_no_atual, tipo_no, shape='box', style='rounded,filled', fillcolor='skyblue')
+    def _filhos(self, no_atual):
+        """(rótulo da aresta, valor) de cada filho a desenhar, na ordem do gráfico."""
+        if self.colapsar_sequencias and no_atual.get('tipo') == 'seq_comandos':
+            comandos = []
+            while no_atual is not None:
+                if no_atual['primeiro'] is not None:  # bloco vazio: 'primeiro' é None
+                    comandos.append(no_atual['primeiro'])
+                no_atual = no_atual['resto']
+            return [(str(i), comando) for i, comando in enumerate(comandos, 1)]
 
         # Define a ordem desejada para os filhos aparecerem no gráfico
         ordem_chaves = ['esq', 'op', 'dir']
-        
-        chaves_restantes = [k for k in no_atual.keys() if k not in ordem_chaves and k != 'tipo']
-        
+
+        # 'posicao' (deslocamento no código-fonte) não é desenhada
+        chaves_restantes = [k for k in no_atual.keys() if k not in ordem_chaves and k not in ('tipo', 'posicao')]
+
+        filhos = []
         for chave in ordem_chaves + chaves_restantes:
             if chave not in no_atual:
                 continue
-
             valor = no_atual[chave]
-            
             if chave == 'op':
                 # Desenha o operador como um nó folha terminal
-                id_filho_op = self.gerar_id_no()
-                self.dot.node(id_filho_op, str(valor), shape='box', style='filled', fillcolor='sandybrown')
-                self.dot.edge(id_no_atual, id_filho_op, label=chave)
-                continue
-
-            if isinstance(valor, list):
+                filhos.append((chave, str(valor)))
+            elif isinstance(valor, list):
                 # Tratamento para listas (ex: lista de expressões)
-                id_filho_lista = self.gerar_id_no()
-                self.dot.node(id_filho_lista, f"lista_{chave}")
-                self.dot.edge(id_no_atual, id_filho_lista, label=chave)
-                for item in valor:
-                     id_item = self.adicionar_no_e_filhos(item)
-                     self.dot.edge(id_filho_lista, id_item)
+                filhos.append((chave, _Lista(chave, valor)))
             elif valor is not None:
-                # Tratamento para filhos normais
-                id_filho = self.adicionar_no_e_filhos(valor)
-                self.dot.edge(id_no_atual, id_filho, label=chave)
+                filhos.append((chave, valor))
+        return filhos
+
+    def adicionar_no_e_filhos(self, no_raiz, saida=None):
+        """
+        Adiciona a subárvore ao gráfico, sem recursão. Com 'saida' (um arquivo
+        aberto), as linhas DOT são gravadas e descartadas a cada LOTE_DOT, e o
+        gráfico nunca fica inteiro na memória.
+        """
+        corpo = self.dot.body
+        pilha = [(no_raiz, None, None, 0)]  # (valor, id do pai, rótulo da aresta, profundidade)
+        while pilha:
+            valor, id_pai, rotulo, profundidade = pilha.pop()
+            id_no = self.gerar_id_no()
+            filhos = []
+            if isinstance(valor, _Lista):
+                corpo.append(f"\t{id_no} [label={quote(f'lista_{valor.chave}')}]\n")
+                filhos = [(None, item) for item in valor.itens]
+            elif isinstance(valor, dict):
+                tipo_no = valor.get('tipo', 'desconhecido')
+                filhos = self._filhos(valor)
+                if filhos and profundidade == self.profundidade_maxima:
+                    corpo.append(f"\t{id_no} [label={quote(f'{tipo_no} …')} {ESTILO_CORTADO}]\n")
+                    filhos = []
+                else:
+                    if tipo_no == 'seq_comandos' and self.colapsar_sequencias:
+                        tipo_no = f"seq_comandos ({len(filhos)})"
+                    corpo.append(f"\t{id_no} [label={quote(tipo_no)} {ESTILO_NO}]\n")
+            else:
+                corpo.append(f"\t{id_no} [label={quote(str(valor))} {ESTILO_FOLHA}]\n")
 
-        return id_no_atual
+            if id_pai is not None:
+                if rotulo is None:
+                    corpo.append(f"\t{id_pai} -> {id_no}\n")
+                else:
+                    corpo.append(f"\t{id_pai} -> {id_no} [label={quote(rotulo)}]\n")
+            # Uma lista conta como um nível: os itens ficam na profundidade do nó dono dela
+            proxima = profundidade if isinstance(valor, _Lista) else profundidade + 1
+            pilha.extend((filho, id_no, rotulo_filho, proxima) for rotulo_filho, filho in reversed(filhos))
+
+            if saida is not None and len(corpo) >= LOTE_DOT:
+                saida.writelines(corpo)
+                corpo.clear()
+
+    def gravar_dot(self, nome_arquivo):
+        """Grava o DOT da AST em 'nome_arquivo', em lotes (ver adicionar_no_e_filhos)."""
+        *cabecalho, fim = self.dot  # o gráfico ainda sem nós: cabeçalho, atributos e '}'
+        self.dot.body.clear()
+        with open(nome_arquivo, 'w', encoding='utf-8') as saida:
+            saida.writelines(cabecalho)
+            self.adicionar_no_e_filhos(self.ast, saida)
+            saida.writelines(self.dot.body)
+            self.dot.body.clear()
+            saida.write(fim)
 
     def visualizar(self, nome_arquivo_saida='ast_visualizada'):
         if not self.ast:
@@ -63,7 +165,7 @@ class VisualizadorAST:
             return
 
         self.adicionar_no_e_filhos(self.ast)
-        
+
         try:
             self.dot.render(nome_arquivo_saida, view=True, cleanup=True, format='png')
             print(f"Visualização da AST salva em '{nome_arquivo_saida}.png'")
@@ -72,16 +174,116 @@ class VisualizadorAST:
             print("Verifique se o Graphviz está instalado e configurado no PATH do seu sistema.")
             print(f"Detalhes do erro: {e}")
 
+    def exportar_svg(self, nome_arquivo_saida='ast_visualizada'):
+        """
+        Grava o DOT em lotes e o renderiza como SVG, com o script que recolhe
+        e expande subárvores ao clicar num nó.
+        """
+        if not self.ast:
+            print("AST está vazia. Nada para visualizar.")
+            return
+
+        arquivo_dot = f"{nome_arquivo_saida}.dot"
+        self.gravar_dot(arquivo_dot)
+        try:
+            arquivo_svg = graphviz.render('dot', 'svg', arquivo_dot)
+        except Exception as e:
+            print("\n--- ERRO AO GERAR A IMAGEM ---")
+            print("Verifique se o Graphviz está instalado e configurado no PATH do seu sistema.")
+            print(f"Detalhes do erro: {e}")
+            return
+        with open(arquivo_svg, 'r', encoding='utf-8') as f:
+            svg = f.read()
+        fim = svg.rindex('</svg>')
+        with open(arquivo_svg, 'w', encoding='utf-8') as f:
+            f.write(svg[:fim] + SCRIPT_SVG + svg[fim:])
+        print(f"Visualização da AST salva em '{arquivo_svg}' (clique num nó para recolher a subárvore)")
+
+
+class _Lista:
+    """Lista de filhos de um campo, desenhada como um nó 'lista_<campo>'."""
+    __slots__ = ('chave', 'itens')
+
+    def __init__(self, chave, itens):
+        self.chave = chave
+        self.itens = itens
+
+
+def procurar_subrotina(dados_ast, nome):
+    """Dicionário da sub-rotina 'nome' (procedimento ou função) na AST, ou None."""
+    pilha = [dados_ast]
+    while pilha:
+        valor = pilha.pop()
+        if isinstance(valor, list):
+            pilha.extend(valor)
+        elif isinstance(valor, dict):
+            if valor.get('tipo') in ('decl_proc', 'decl_func') and valor.get('nome') == nome:
+                return valor
+            pilha.extend(valor.values())
+    return None
+
+
+def carregar_subrotina_binaria(caminho, nome):
+    """Decodifica só a sub-rotina 'nome' de uma AST binária, procurando pelos índices."""
+    with LeitorBinario.abrir(caminho) as leitor:
+        for i in range(len(leitor)):
+            if leitor.tipo(i) in ('decl_proc', 'decl_func') and leitor.valor(i, 'nome') == nome:
+                return leitor.no(i).to_dict()
+    return None
+
+
+def opcao(argumentos, nome):
+    """Valor da opção 'nome' (e o remove de 'argumentos'), ou None."""
+    if nome not in argumentos:
+        return None
+    posicao = argumentos.index(nome)
+    valor = argumentos[posicao + 1]
+    del argumentos[posicao:posicao + 2]
+    return valor
+
+
+# Main
+# python ver-ast.py [ast.json | ast.bin] [--subrotina nome] [--profundidade n]
+#                   [--colapsar] [--dot arquivo.dot | --svg]
+# Sem opções desenha a AST inteira em ast_visualizada.png. --dot só grava o
+# DOT (em lotes, sem montar o gráfico na memória); --svg grava e renderiza
+# ast_visualizada.svg, com subárvores que recolhem ao clicar.
 if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    subrotina = opcao(argumentos, '--subrotina')
+    profundidade = opcao(argumentos, '--profundidade')
+    arquivo_dot = opcao(argumentos, '--dot')
+    colapsar = '--colapsar' in argumentos
+    svg = '--svg' in argumentos
+    argumentos = [a for a in argumentos if a not in ('--colapsar', '--svg')]
 
-    arquivo_ast_json = "ast.json"
+    # ast.json ou a AST no formato binário (python yacc.py programa.ras --binario)
+    arquivo_ast_json = argumentos[0] if argumentos else "ast.json"
 
     try:
-        with open(arquivo_ast_json, "r", encoding='utf-8') as f:
-            dados_ast = json.load(f)
-            visualizador = VisualizadorAST(dados_ast)
+        if subrotina is not None and eh_binario(arquivo_ast_json):
+            dados_ast = carregar_subrotina_binaria(arquivo_ast_json, subrotina)
+        elif eh_binario(arquivo_ast_json):
+            with LeitorBinario.abrir(arquivo_ast_json) as leitor:
+                dados_ast = leitor.no(0).to_dict()
+        else:
+            dados_ast = carregar_json(arquivo_ast_json)
+            if subrotina is not None:
+                dados_ast = procurar_subrotina(dados_ast, subrotina)
+        if subrotina is not None and dados_ast is None:
+            print(f"Erro: Sub-rotina '{subrotina}' não encontrada na AST.")
+            sys.exit(1)
+
+        visualizador = VisualizadorAST(dados_ast, profundidade_maxima=None if profundidade is None else int(profundidade),
+                                       colapsar_sequencias=colapsar)
+        if arquivo_dot:
+            visualizador.gravar_dot(arquivo_dot)
+            print(f"DOT da AST salvo em '{arquivo_dot}'")
+        elif svg:
+            visualizador.exportar_svg()
+        else:
             visualizador.visualizar()
     except FileNotFoundError:
         print(f"Erro: Arquivo '{arquivo_ast_json}' não encontrado.")
     except json.JSONDecodeError:
-        print(f"Erro: O arquivo '{arquivo_ast_json}' não contém um JSON válido.")
\ No newline at end of file
+        print(f"Erro: O arquivo '{arquivo_ast_json}' não contém um JSON válido.")
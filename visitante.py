@@ -0,0 +1,76 @@
+from inspect import isgeneratorfunction
+
+
+class NoDesconhecido(Exception):
+    """Nó da AST cujo 'tipo' não tem método visitar_<tipo> no visitante."""
+    def __init__(self, tipo, visitante):
+        super().__init__(f"{visitante} não sabe visitar nós do tipo '{tipo}'.")
+        self.tipo = tipo
+
+
+class Visitante:
+    """
+    Base para os passes que percorrem a AST.
+
+    Ao criar uma subclasse, os métodos visitar_<tipo> são coletados uma única
+    vez numa tabela tipo -> função; cada instância liga essa tabela a si mesma
+    no __init__, então o despacho de um nó é só uma consulta de dicionário.
+
+    Um método que precisa visitar filhos deve ser um gerador: 'yield filho'
+    devolve o resultado da visita do filho. Os geradores pendentes ficam numa
+    pilha explícita, então a profundidade da AST não depende do limite de
+    recursão do Python.
+    """
+    _tabela_metodos = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        tabela = {}
+        for nome in dir(cls):
+            if nome.startswith('visitar_'):
+                funcao = getattr(cls, nome)
+                tabela[nome[len('visitar_'):]] = (funcao, isgeneratorfunction(funcao))
+        cls._tabela_metodos = tabela
+
+    def __init__(self):
+        self._despacho = {
+            tipo: (funcao.__get__(self), gerador)
+            for tipo, (funcao, gerador) in self._tabela_metodos.items()
+        }
+
+    def visitar(self, no):
+        """Visita 'no' (um nó, uma lista de nós ou None) e devolve o resultado."""
+        despacho = self._despacho
+        pilha = [self._visitar_raiz(no)]
+        valor = None
+        while pilha:
+            try:
+                filho = pilha[-1].send(valor)
+            except StopIteration as fim:
+                pilha.pop()
+                valor = fim.value
+                continue
+
+            valor = None
+            if not filho:
+                continue
+            if isinstance(filho, list):
+                pilha.append(self._visitar_lista(filho))
+                continue
+
+            try:
+                metodo, gerador = despacho[filho.tipo]
+            except KeyError:
+                raise NoDesconhecido(filho.tipo, type(self).__name__) from None
+            if gerador:
+                pilha.append(metodo(filho))
+            else:
+                valor = metodo(filho)
+        return valor
+
+    def _visitar_raiz(self, no):
+        return (yield no)
+
+    def _visitar_lista(self, lista):
+        for n in lista:
+            yield n
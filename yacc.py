@@ -9,7 +9,17 @@
 import ply.yacc as yacc
 import ply.lex as lex
 import sys
-import json
+import os
+import copy
+import hashlib
+import importlib.util
+
+from diagnosticos import Diagnostico, TabelaLinhas, LEXICO, SINTATICO
+from arvore import (
+    Programa, Bloco, DeclVar, DeclParam, DeclProc, DeclFunc,
+    SeqComandos, CmdAtrib, ChamadaProc, CmdCondicional, CmdRepeticao, CmdEscrita, CmdLeitura,
+    ExpBinaria, ExpUnaria, ExpNum, Logico, ExpVar, ChamadaFunc,
+)
 
 reserved = {
     'program': 'PROGRAM',
@@ -61,14 +71,25 @@ t_VIRG      = r','
 t_DOISP     = r':'
 
 def t_COMMENT(t):
-    r'(\{(.|\n)*?\})|(\(\*(.|\n)*?\*\))'
+    r'\{[^}]*\}|\(\*[^*]*\*+(?:[^)*][^*]*\*+)*\)'
+    # Mesmo significado de { ... } e (* ... *) não gulosos, mas sem alternância
+    # por caractere: cada trecho sem '}' ou '*' é consumido de uma vez.
     t.lexer.lineno += t.value.count('\n')
     pass 
 
+def erro_lexico(t, mensagem):
+    '''Registra o erro em lexer.diagnosticos e, se lexer.ecoar_erros, também o imprime.'''
+    lexer = t.lexer
+    # t.lexpos é relativo ao texto passado ao lexer (um bloco, na leitura de arquivos)
+    lexer.diagnosticos.append(Diagnostico(LEXICO, mensagem.strip(), t.lexpos + lexer.deslocamento,
+                                          lexer.linhas))
+    if lexer.ecoar_erros:
+        print(mensagem)
+
 def t_IDENTIFICADOR_INVALIDO(t):
     r'\d+[a-zA-Z][a-zA-Z_0-9]*'
-    print(f"!!!Erro Léxico na Linha {t.lexer.lineno}: Identificador inválido '{t.value}' não pode começar com um número.!!!")
-    t.lexer.skip(len(t.value))
+    erro_lexico(t, f"!!!Erro Léxico na Linha {t.lexer.lineno}: Identificador inválido '{t.value}' não pode começar com um número.!!!")
+    # O token já foi consumido; não devolvê-lo basta para descartá-lo
 
 def t_IDENTIFICADOR(t):
     r'[a-zA-Z][a-zA-Z_0-9]*'
@@ -77,8 +98,7 @@ def t_IDENTIFICADOR(t):
 
 def t_NUMERO_FLOAT(t):
     r'(\d+\.\d+|\.\d+|\d+\.)'
-    print(f"!!!Erro Léxico na Linha {t.lexer.lineno}: Número real '{t.value}' não é permitido.!!!")
-    t.lexer.skip(len(t.value))
+    erro_lexico(t, f"!!!Erro Léxico na Linha {t.lexer.lineno}: Número real '{t.value}' não é permitido.!!!")
 
 def t_NUMERO(t):
     r'\d+'
@@ -89,13 +109,12 @@ def t_newline(t):
     r'\n+'
     t.lexer.lineno += len(t.value)
 
-t_ignore = ' \t'
+t_ignore = ' \t\r'  # o '\r' das quebras de linha CRLF também é espaço
 
 def t_error(t):
-    print(f"\nCaractere inválido '{t.value[0]}' encontrado na linha {t.lexer.lineno}\n")
+    erro_lexico(t, f"\nCaractere inválido '{t.value[0]}' encontrado na linha {t.lexer.lineno}\n")
     t.lexer.skip(1)
 
-lexer = lex.lex()
 
 
 # PARTE 2: ANALISADOR SINTÁTICO
@@ -113,13 +132,51 @@ precedence = (
 )
 
 # --- Regras da Gramática ---
+#
+# Cada nó recebe a posição do primeiro token da sua construção: p.lexpos(i)
+# quando esse token é um terminal da regra, ou a posição do primeiro filho.
+
+def _posicao(*nos):
+    '''Posição do primeiro nó (não None) que tenha posição.'''
+    for no in nos:
+        if no is not None and no.posicao is not None:
+            return no.posicao
+    return None
+
+# Compartilhamento de expressões (analisar com compartilhar=True): as
+# expressões puras de um corpo ficam em lexer.expressoes, indexadas pela
+# classe e pelos campos (com os filhos já compartilhados, comparados por
+# identidade), e uma expressão igual a outra já construída reusa o mesmo nó.
+# Chamadas de função nunca são compartilhadas, e uma expressão com uma
+# chamada tem sempre uma chave nova. A tabela é esvaziada nas reduções que
+# antecedem cada corpo (ver _novo_escopo), porque o mesmo nome pode ser outra
+# variável em outra sub-rotina.
+
+def _expressao(p, classe, *argumentos):
+    '''classe(*argumentos), ou o nó igual já construído; o último argumento é a posição.'''
+    expressoes = p.lexer.expressoes
+    if expressoes is None:
+        return classe(*argumentos)
+    chave = (classe, *argumentos[:-1])
+    no = expressoes.get(chave)
+    if no is None:
+        no = expressoes[chave] = classe(*argumentos)
+    return no
+
+def _novo_escopo(p):
+    # Todo corpo (comando_composto de um bloco) começa logo depois de reduzir
+    # secao_declara_vars_opt ou secao_declara_subrotinas, e os corpos das
+    # sub-rotinas terminam antes do corpo do bloco que as declara
+    if p.lexer.expressoes is not None:
+        p.lexer.expressoes.clear()
+
 def p_programa(p):
     'programa : PROGRAM IDENTIFICADOR PONTOV bloco PONTO'
-    p[0] = {'tipo': 'programa', 'nome': p[2], 'corpo': p[4]}
+    p[0] = Programa(p[2], p[4], p.lexpos(1))
 
 def p_bloco(p):
     'bloco : secao_declara_vars_opt secao_declara_subrotinas comando_composto'
-    p[0] = {'tipo': 'bloco', 'vars': p[1], 'subrotinas': p[2], 'comandos': p[3]}
+    p[0] = Bloco(p[1], p[2], p[3], _posicao(*p[1][:1], *p[2][:1], p[3]))
 
 # --- DECLARAÇÕES ---
 def p_secao_declara_vars_opt(p):
@@ -128,6 +185,7 @@ def p_secao_declara_vars_opt(p):
                            | empty
     '''
     p[0] = p[2] if len(p) > 2 else []
+    _novo_escopo(p)
 
 def p_declaracao_vars_lista(p):
     '''
@@ -139,19 +197,28 @@ def p_declaracao_vars_lista(p):
     else:
         p[0] = p[1]
 
+def p_declaracao_vars_lista_erro(p):
+    '''
+    declaracao_vars_lista : declaracao_vars_lista error PONTOV
+                          | error PONTOV
+    '''
+    # Recuperação: descarta a declaração inválida até o próximo ';'
+    p[0] = p[1] if len(p) == 4 else []
+
 def p_declaracao_vars(p):
     'declaracao_vars : lista_ids DOISP tipo'
-    p[0] = [{'tipo': 'decl_var', 'id': {'tipo': 'id', 'nome': id_nome}, 'tipo_var': p[3]} for id_nome in p[1]]
+    p[0] = [DeclVar(id_nome, p[3], posicao) for id_nome, posicao in p[1]]
 
 def p_lista_ids(p):
     '''
     lista_ids : lista_ids VIRG IDENTIFICADOR
               | IDENTIFICADOR
     '''
+    # Pares (nome, posição), para cada declaração apontar para o seu identificador
     if len(p) == 4:
-        p[0] = p[1] + [p[3]]
+        p[0] = p[1] + [(p[3], p.lexpos(3))]
     else:
-        p[0] = [p[1]]
+        p[0] = [(p[1], p.lexpos(1))]
 
 def p_tipo(p):
     '''
@@ -170,6 +237,7 @@ def p_secao_declara_subrotinas(p):
         p[0] = p[1] + [p[2]]
     else:
         p[0] = []
+    _novo_escopo(p)
 
 def p_declaracao_subrotina(p):
     '''
@@ -180,15 +248,15 @@ def p_declaracao_subrotina(p):
 
 def p_declaracao_procedimento(p):
     'declaracao_procedimento : PROCEDURE IDENTIFICADOR parametros_formais_opt PONTOV bloco_subrot'
-    p[0] = {'tipo': 'decl_proc', 'nome': p[2], 'params': p[3], 'corpo': p[5]}
+    p[0] = DeclProc(p[2], p[3], p[5], p.lexpos(1))
 
 def p_declaracao_funcao(p):
     'declaracao_funcao : FUNCTION IDENTIFICADOR parametros_formais_opt DOISP tipo PONTOV bloco_subrot'
-    p[0] = {'tipo': 'decl_func', 'nome': p[2], 'params': p[3], 'retorno': p[5], 'corpo': p[7]}
+    p[0] = DeclFunc(p[2], p[3], p[5], p[7], p.lexpos(1))
 
 def p_bloco_subrot(p):
     'bloco_subrot : secao_declara_vars_opt comando_composto'
-    p[0] = {'tipo': 'bloco', 'vars': p[1], 'subrotinas': [], 'comandos': p[2]}
+    p[0] = Bloco(p[1], [], p[2], _posicao(*p[1][:1], p[2]))
 
 def p_parametros_formais_opt(p):
     '''
@@ -201,6 +269,11 @@ def p_parametros_formais(p):
     'parametros_formais : PARE lista_parametros PARD'
     p[0] = p[2]
 
+def p_parametros_formais_erro(p):
+    'parametros_formais : PARE error PARD'
+    # Recuperação: descarta a lista de parâmetros até o ')'
+    p[0] = []
+
 def p_lista_parametros(p):
     '''
     lista_parametros : lista_parametros PONTOV declaracao_parametros
@@ -213,7 +286,7 @@ def p_lista_parametros(p):
 
 def p_declaracao_parametros(p):
     'declaracao_parametros : lista_ids DOISP tipo'
-    p[0] = [{'tipo': 'decl_param', 'id': {'tipo': 'id', 'nome': id_nome}, 'tipo_var': p[3]} for id_nome in p[1]]
+    p[0] = [DeclParam(id_nome, p[3], posicao) for id_nome, posicao in p[1]]
 
 # --- COMANDOS ---
 def p_comando_composto(p):
@@ -225,24 +298,37 @@ def p_comando_lista_opt(p):
     comando_lista_opt : comando_lista
                       | empty
     '''
-    p[0] = p[1] if p[1] else {'tipo': 'seq_comandos', 'primeiro': None, 'resto': None}
+    # comando_lista carrega o par (cabeca, cauda); aqui só a cabeça vai para a AST
+    p[0] = p[1][0] if p[1] else SeqComandos(None, None)
 
 def p_comando_lista(p):
     '''
     comando_lista : comando_lista PONTOV comando
                   | comando
     '''
+    # Mantém um ponteiro para o último nó da sequência, assim cada comando
+    # novo é encadeado em O(1) sem percorrer a lista desde o início.
+    if len(p) == 4:
+        cabeca, cauda = p[1]
+        novo = SeqComandos(p[3], None, _posicao(p[3]))
+        cauda.resto = novo
+        p[0] = (cabeca, novo)
+    else:
+        no = SeqComandos(p[1], None, _posicao(p[1]))
+        p[0] = (no, no)
+
+def p_comando_lista_erro(p):
+    '''
+    comando_lista : comando_lista PONTOV error
+                  | error
+    '''
+    # Recuperação: descarta o comando inválido até o próximo ';' ou 'end'.
+    # Só 'end' e ';' seguem uma lista de comandos, então a recuperação sempre avança.
     if len(p) == 4:
-        node = p[1]
-        while node and node.get('resto'):
-            node = node['resto']
-        if node and node.get('primeiro'):
-             node['resto'] = {'tipo': 'seq_comandos', 'primeiro': p[3], 'resto': None}
-        else:
-            p[1]['primeiro'] = p[3]
         p[0] = p[1]
     else:
-        p[0] = {'tipo': 'seq_comandos', 'primeiro': p[1], 'resto': None}
+        no = SeqComandos(None, None)
+        p[0] = (no, no)
 
 def p_comando(p):
     '''
@@ -258,11 +344,11 @@ def p_comando(p):
 
 def p_atribuicao(p):
     'atribuicao : IDENTIFICADOR ATRIB expressao'
-    p[0] = {'tipo': 'cmd_atrib', 'id': {'tipo': 'id', 'nome': p[1]}, 'exp': p[3]}
+    p[0] = CmdAtrib(p[1], p[3], p.lexpos(1))
 
 def p_chamada_procedimento(p):
     'chamada_procedimento : IDENTIFICADOR PARE lista_expressoes_opt PARD'
-    p[0] = {'tipo': 'chamada_proc', 'nome': p[1], 'args': p[3]}
+    p[0] = ChamadaProc(p[1], p[3], p.lexpos(1))
 
 def p_condicional(p):
     '''
@@ -270,22 +356,21 @@ def p_condicional(p):
                 | IF expressao THEN comando ELSE comando
     '''
     if len(p) == 5:
-        p[0] = {'tipo': 'cmd_condicional', 'condicao': p[2], 'corpo': p[4]}
+        p[0] = CmdCondicional(p[2], p[4], posicao=p.lexpos(1))
     else:
-        p[0] = {'tipo': 'cmd_condicional', 'condicao': p[2], 'corpo': p[4], 'senao': p[6]}
+        p[0] = CmdCondicional(p[2], p[4], p[6], p.lexpos(1))
 
 def p_repeticao(p):
     'repeticao : WHILE expressao DO comando'
-    p[0] = {'tipo': 'cmd_repeticao', 'condicao': p[2], 'corpo': p[4]}
+    p[0] = CmdRepeticao(p[2], p[4], p.lexpos(1))
 
 def p_escrita(p):
     'escrita : WRITE PARE lista_expressoes PARD'
-    p[0] = {'tipo': 'cmd_escrita', 'expressoes': p[3]}
+    p[0] = CmdEscrita(p[3], p.lexpos(1))
 
 def p_leitura(p):
     'leitura : READ PARE lista_ids PARD'
-    lista_id_nodes = [{'tipo': 'id', 'nome': id_nome} for id_nome in p[3]]
-    p[0] = {'tipo': 'cmd_leitura', 'vars': lista_id_nodes}
+    p[0] = CmdLeitura([nome for nome, _ in p[3]], p.lexpos(1))
 
 def p_lista_expressoes_opt(p):
     '''
@@ -311,7 +396,7 @@ def p_expressao(p):
               | expressao_simples
     '''
     if len(p) == 4:
-        p[0] = {'tipo': 'exp_binaria', 'op': p[2], 'esq': p[1], 'dir': p[3]}
+        p[0] = _expressao(p, ExpBinaria, p[2], p[1], p[3], p[1].posicao)
     else:
         p[0] = p[1]
 
@@ -330,7 +415,7 @@ def p_expressao_simples(p):
                       | expressao_simples MENOS termo
                       | expressao_simples OR termo
     '''
-    p[0] = {'tipo': 'exp_binaria', 'op': p[2], 'esq': p[1], 'dir': p[3]}
+    p[0] = _expressao(p, ExpBinaria, p[2], p[1], p[3], p[1].posicao)
 
 def p_expressao_simples_termo(p):
     'expressao_simples : termo'
@@ -342,7 +427,7 @@ def p_termo(p):
           | termo DIV fator
           | termo AND fator
     '''
-    p[0] = {'tipo': 'exp_binaria', 'op': p[2], 'esq': p[1], 'dir': p[3]}
+    p[0] = _expressao(p, ExpBinaria, p[2], p[1], p[3], p[1].posicao)
 
 def p_termo_fator(p):
     'termo : fator'
@@ -359,12 +444,12 @@ def p_fator(p):
           | MENOS fator %prec UMENOS
     '''
     if len(p) == 2:
-        if isinstance(p[1], dict):
+        if isinstance(p[1], int):
+             p[0] = _expressao(p, ExpNum, p[1], p.lexpos(1))
+        else:
              p[0] = p[1]
-        else: 
-             p[0] = {'tipo': 'exp_num', 'valor': p[1]}
     elif len(p) == 3:
-        p[0] = {'tipo': 'exp_unaria', 'op': p[1], 'exp': p[2]}
+        p[0] = _expressao(p, ExpUnaria, p[1], p[2], p.lexpos(1))
     else:
         p[0] = p[2]
 
@@ -373,46 +458,224 @@ def p_logico(p):
     logico : TRUE
            | FALSE
     '''
-    p[0] = {'tipo': 'logico', 'valor': p[1]}
+    p[0] = _expressao(p, Logico, p[1], p.lexpos(1))
 
 def p_variavel(p):
     'variavel : IDENTIFICADOR'
-    p[0] = {'tipo': 'exp_var', 'id': {'tipo': 'id', 'nome': p[1]}}
+    p[0] = _expressao(p, ExpVar, p[1], p.lexpos(1))
 
 def p_chamada_funcao(p):
     'chamada_funcao : IDENTIFICADOR PARE lista_expressoes_opt PARD'
-    p[0] = {'tipo': 'chamada_func', 'nome': p[1], 'args': p[3]}
+    p[0] = ChamadaFunc(p[1], p[3], p.lexpos(1))
 
 def p_empty(p):
     'empty :'
     pass
 
+class ErroSintatico(Exception):
+    '''
+    Erros de sintaxe de uma análise. A mensagem tem uma linha por erro; 'linha',
+    'tipo_token' e 'valor' descrevem o primeiro (None quando é no fim do arquivo)
+    e 'diagnosticos' traz todos os diagnósticos léxicos e sintáticos da análise.
+    '''
+    def __init__(self, mensagem, linha=None, tipo_token=None, valor=None, diagnosticos=None):
+        super().__init__(mensagem)
+        self.linha = linha
+        self.tipo_token = tipo_token
+        self.valor = valor
+        self.diagnosticos = diagnosticos if diagnosticos is not None else []
+
 def p_error(p):
-    if p:
-        print(f"Erro de sintaxe no token '{p.value}' (tipo: {p.type}) na linha {p.lineno}")
-    else:
-        print("Erro de sintaxe: Fim inesperado do arquivo (EOF).")
-    sys.exit(1)
+    # Registra o erro e deixa o PLY se recuperar pelas produções com 'error'.
+    # No fim do arquivo não há mais o que recuperar: a análise termina aqui.
+    if p is None:
+        raise ErroSintatico("Erro de sintaxe: Fim inesperado do arquivo (EOF).")
+    lexer = p.lexer
+    mensagem = f"Erro de sintaxe no token '{p.value}' (tipo: {p.type}) na linha {p.lineno}"
+    lexer.erros_sintaxe.append(ErroSintatico(mensagem, p.lineno, p.type, p.value))
+    lexer.diagnosticos.append(Diagnostico(SINTATICO, mensagem, p.lexpos, lexer.linhas))
+
+def analisar(parser, lexer, texto=None, tokenfunc=None, compartilhar=False):
+    '''
+    Análise sintática completa, recuperando-se dos erros de sintaxe. Devolve a
+    AST e os diagnósticos léxicos (em lexer.diagnosticos); se houve erro de
+    sintaxe, levanta um único ErroSintatico com todos eles.
+
+    Com 'texto', lexer.linhas passa a ser a TabelaLinhas desse texto; com
+    'tokenfunc', quem produz os tokens monta a tabela (ver fonte.tokens_arquivo).
+    Com compartilhar=True, expressões puras iguais de um mesmo corpo são um só
+    nó (ver _expressao), e a AST devolvida é um grafo acíclico.
+    '''
+    lexer.lineno = 1
+    lexer.deslocamento = 0
+    if texto is not None:
+        lexer.linhas = TabelaLinhas(texto)
+    lexer.diagnosticos = []
+    lexer.erros_sintaxe = []
+    lexer.expressoes = {} if compartilhar else None
+    try:
+        ast = parser.parse(texto, lexer=lexer, tokenfunc=tokenfunc)
+    except ErroSintatico as fim:
+        lexer.erros_sintaxe.append(fim)
+        lexer.diagnosticos.append(Diagnostico(SINTATICO, str(fim)))
+        ast = None
+    finally:
+        lexer.expressoes = None
+    if lexer.erros_sintaxe:
+        primeiro = lexer.erros_sintaxe[0]
+        # Os léxicos antes dos sintáticos, cada fase na ordem do código
+        diagnosticos = sorted(lexer.diagnosticos, key=lambda d: d.fase != LEXICO)
+        raise ErroSintatico('\n'.join(str(e) for e in lexer.erros_sintaxe), primeiro.linha,
+                            primeiro.tipo_token, primeiro.valor, diagnosticos)
+    return ast
+
+
+# PARTE 3: TABELAS PRÉ-GERADAS
+#
+# As tabelas do lexer e do LALR são geradas uma vez (python yacc.py --gerar-tabelas)
+# e carregadas direto dos módulos gerados nas execuções seguintes, sem a
+# introspecção/validação da gramática feita pelo PLY e sem escrever parser.out.
+# Cada módulo leva a assinatura da gramática que o gerou; se as regras mudarem,
+# as tabelas são refeitas automaticamente na próxima importação.
+
+DIRETORIO_TABELAS = os.path.dirname(os.path.abspath(__file__))
+MODULO_LEXTAB = 'lextab_rascal'
+MODULO_PARSETAB = 'parsetab_rascal'
+
+def assinatura_gramatica():
+    '''Hash das regras léxicas e sintáticas definidas neste módulo.'''
+    regras = []
+    for nome, valor in globals().items():
+        if nome.startswith(('t_', 'p_')):
+            if callable(valor):
+                regras.append((valor.__code__.co_firstlineno, nome, valor.__doc__))
+            else:
+                regras.append((0, nome, valor))
+    regras.sort()
+    partes = [yacc.__version__, repr(tokens), repr(reserved), repr(precedence)]
+    partes += [f"{nome}={regra}" for _, nome, regra in regras]
+    return hashlib.sha256('\n'.join(partes).encode('utf-8')).hexdigest()
+
+def _arquivo_tabela(nome):
+    return os.path.join(DIRETORIO_TABELAS, nome + '.py')
+
+def _importar_tabela(nome):
+    especificacao = importlib.util.spec_from_file_location(nome, _arquivo_tabela(nome))
+    modulo = importlib.util.module_from_spec(especificacao)
+    especificacao.loader.exec_module(modulo)
+    return modulo
+
+def gerar_tabelas(gravar=True):
+    '''Constrói o lexer e o parser a partir das regras e grava os módulos de tabelas.'''
+    modulo = sys.modules[__name__]
+    assinatura = assinatura_gramatica()
+    for nome in (MODULO_LEXTAB, MODULO_PARSETAB):
+        if os.path.exists(_arquivo_tabela(nome)):
+            os.remove(_arquivo_tabela(nome))
+
+    novo_lexer = lex.lex(module=modulo)
+    if gravar:
+        novo_lexer.writetab(MODULO_LEXTAB, DIRETORIO_TABELAS)
+    novo_parser = yacc.yacc(module=modulo, debug=False, write_tables=gravar,
+                            tabmodule=MODULO_PARSETAB, outputdir=DIRETORIO_TABELAS)
+    if gravar:
+        for nome in (MODULO_LEXTAB, MODULO_PARSETAB):
+            with open(_arquivo_tabela(nome), 'a') as arquivo:
+                arquivo.write(f"_assinatura_rascal = {assinatura!r}\n")
+    return novo_lexer, novo_parser
+
+def carregar_analisadores():
+    '''Lexer e parser a partir das tabelas gravadas; refaz as tabelas se estiverem desatualizadas.'''
+    assinatura = assinatura_gramatica()
+    try:
+        lextab = _importar_tabela(MODULO_LEXTAB)
+        parsetab = _importar_tabela(MODULO_PARSETAB)
+        if lextab._assinatura_rascal == assinatura == parsetab._assinatura_rascal:
+            novo_lexer = lex.Lexer()
+            novo_lexer.readtab(lextab, globals())
+            tabela = yacc.LRTable()
+            tabela.read_table(parsetab)
+            tabela.bind_callables(globals())
+            return novo_lexer, yacc.LRParser(tabela, p_error)
+    except (OSError, ImportError, AttributeError, yacc.VersionError):
+        pass
+
+    try:
+        return gerar_tabelas()
+    except OSError:
+        # Diretório sem permissão de escrita: usa as tabelas só em memória
+        return gerar_tabelas(gravar=False)
+
+def desativar_reducao_padrao_apos_error(parser):
+    '''
+    Nos estados alcançados ao empilhar 'error', o PLY reduziria sem olhar o
+    próximo token e, se esse token também fosse inválido, voltaria a empilhar
+    'error' no mesmo lugar para sempre. Sem a redução padrão, o token inválido
+    é descartado com 'error' no topo da pilha até surgir um que sincronize.
+    '''
+    for acoes in parser.action.values():
+        destino = acoes.get('error')
+        if destino is not None and destino > 0:
+            parser.defaulted_states.pop(destino, None)
+
+lexer, parser = carregar_analisadores()
+desativar_reducao_padrao_apos_error(parser)
+# Estado dos erros de cada análise (ver erro_lexico e analisar); as cópias feitas
+# por novos_analisadores() recebem listas novas a cada análise
+lexer.ecoar_erros = True
+lexer.deslocamento = 0
+lexer.linhas = TabelaLinhas()
+lexer.diagnosticos = []
+lexer.erros_sintaxe = []
+lexer.expressoes = None
+
+def novos_analisadores(lexer_dfa=False):
+    '''
+    Cópias independentes do lexer e do parser, que compartilham só as tabelas
+    (somente leitura). Com lexer_dfa=True, o lexer é o lexer_dfa.LexerDFA.
+    '''
+    if lexer_dfa:
+        from lexer_dfa import LexerDFA
 
-parser = yacc.yacc(debug=True)
+        return LexerDFA(), copy.copy(parser)
+    return lexer.clone(), copy.copy(parser)
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Como usar: python yacc.py caminho_do_arq_test.txt")
+    # Executado como script, este arquivo é o módulo __main__: sem o apelido, o
+    # 'from yacc import ...' do compilador.py e do lexer_dfa.py carregaria o
+    # arquivo de novo, com outra cópia do lexer, do parser e das tabelas
+    sys.modules.setdefault('yacc', sys.modules[__name__])
+
+    argumentos = sys.argv[1:]
+    lexer_dfa = '--lexer-dfa' in argumentos
+    binario = '--binario' in argumentos
+    argumentos = [a for a in argumentos if a not in ('--lexer-dfa', '--binario')]
+    if not argumentos:
+        print("Como usar: python yacc.py caminho_do_arq_test.txt [--lexer-dfa] [--binario]")
+        print("           python yacc.py --gerar-tabelas")
         sys.exit(1)
 
-    arquivo_teste = sys.argv[1]
-    nome_saida_ast = "ast.json"
+    if argumentos[0] == '--gerar-tabelas':
+        gerar_tabelas()
+        print(f"Tabelas geradas em '{MODULO_LEXTAB}.py' e '{MODULO_PARSETAB}.py'")
+        sys.exit(0)
+
+    arquivo_teste = argumentos[0]
+    # Com --binario, a AST vai para ast.bin no formato do arvore_binaria.py
+    nome_saida_ast = "ast.bin" if binario else "ast.json"
+
+    from compilador import SessaoCompilador, ErroSintatico
 
     try:
-        with open(arquivo_teste, "r") as f:
-            codigo = f.read()
-            
-            ast_result = parser.parse(codigo)
-            
-            if ast_result:
-                with open(nome_saida_ast, "w") as ast_file:
-                    json.dump(ast_result, ast_file, indent=2, ensure_ascii=False)
-                print(f"Análise sintática concluída com sucesso! AST salva em '{nome_saida_ast}'")
+        # O arquivo é mapeado em memória e lido em blocos (ver fonte.py)
+        resultado = SessaoCompilador(lexer_dfa).compilar_arquivo(arquivo_teste, semantica=False,
+                                                                  saida_json=None if binario else nome_saida_ast)
+        if resultado.ast and binario:
+            resultado.salvar_binario(nome_saida_ast)
+        if resultado.ast:
+            print(f"Análise sintática concluída com sucesso! AST salva em '{nome_saida_ast}'")
     except FileNotFoundError:
-        print(f"Erro: Arquivo '{arquivo_teste}' não encontrado.")
\ No newline at end of file
+        print(f"Erro: Arquivo '{arquivo_teste}' não encontrado.")
+    except ErroSintatico as e:
+        print(e)
+        sys.exit(1)
\ No newline at end of file